@@ -0,0 +1,173 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# -----------------------------
+# Benchmark Harness
+# -----------------------------
+
+
+def run_stage(name, fn, items_fn):
+    """
+    Run fn once with stdout silenced, returning timing and throughput.
+    items_fn(result) gives the number of items handled.
+    """
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn()
+    seconds = time.perf_counter() - start
+    items = items_fn(result)
+    return {
+        "stage": name,
+        "seconds": seconds,
+        "items": items,
+        "items_per_second": items / seconds if seconds else None,
+    }
+
+
+def peak_memory(fn):
+    """
+    Peak traced memory (MiB) of one run of fn. Kept apart from the timed
+    runs because tracemalloc slows Python-heavy code down several-fold.
+    """
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 2**20
+
+
+def benchmark(corpus, resize_limit=50, repeat=3):
+    """
+    Time the pipeline hot paths against a corpus built by
+    make_synthetic_corpus.py. Returns the best of `repeat` runs per stage,
+    plus the peak memory of one further traced run.
+    """
+    import call_lvlm
+    import merge
+    import verify_frames_in_csv
+    import video_match
+
+    corpus = Path(corpus).resolve()
+    cwd = os.getcwd()
+    os.chdir(corpus)  # the scripts resolve Frames/, preview_batch/, lvlm/ relative
+    try:
+        folders = call_lvlm.find_image_folders("Frames")
+        frames = [
+            Path(folder) / f
+            for folder in folders
+            for f in sorted(os.listdir(folder))
+            if f.lower().endswith(".jpg")
+        ][:resize_limit]
+        csv_files = verify_frames_in_csv.get_all_csv_files()
+        months = sorted(os.listdir("lvlm"))
+        months = [m for m in months if m.endswith(".json")]
+        out_dir = tempfile.mkdtemp(prefix="bench_merge_")
+
+        def merge_all():
+            for m in months:
+                merge.merge_json_and_csv(
+                    m, output_path=os.path.join(out_dir, f"merged_{m}.csv")
+                )
+            return months
+
+        def sample_all():
+            call_lvlm._PRIMARY_IMAGES.clear()
+            return [call_lvlm.sample_images(folder) for folder in folders]
+
+        stages = [
+            (
+                "find_image_folders",
+                lambda: call_lvlm.find_image_folders("Frames"),
+                len,
+            ),
+            ("sample_images", sample_all, len),
+            (
+                "resize_image_if_needed",
+                lambda: [call_lvlm.resize_image_if_needed(p) for p in frames],
+                len,
+            ),
+            (
+                "video_match.process_csv_file",
+                lambda: [video_match.process_csv_file(p) for p in csv_files],
+                lambda r: sum(pos + neg for pos, neg, _ in r),
+            ),
+            ("merge.merge_json_and_csv", merge_all, len),
+            (
+                "verify_frames_in_csv",
+                lambda: verify_frames_in_csv.main() or folders,
+                len,
+            ),
+        ]
+        results = []
+        for name, fn, items_fn in stages:
+            runs = [run_stage(name, fn, items_fn) for _ in range(repeat)]
+            best = min(runs, key=lambda r: r["seconds"])
+            best["peak_mib"] = peak_memory(fn)
+            results.append(best)
+        return results
+    finally:
+        os.chdir(cwd)
+
+
+def print_report(results, baseline=None):
+    previous = {r["stage"]: r for r in baseline or []}
+    print(
+        f"{'stage':32s} {'seconds':>9s} {'items/s':>11s} {'peak MiB':>9s} {'vs base':>8s}"
+    )
+    for r in results:
+        delta = ""
+        if r["stage"] in previous and previous[r["stage"]]["seconds"]:
+            change = r["seconds"] / previous[r["stage"]]["seconds"] - 1
+            delta = f"{change:+.0%}"
+        rate = r["items_per_second"] or 0
+        print(
+            f"{r['stage']:32s} {r['seconds']:9.4f} {rate:11.1f} {r['peak_mib']:9.2f} {delta:>8s}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark pipeline hot paths on a synthetic corpus."
+    )
+    parser.add_argument(
+        "--corpus",
+        type=str,
+        default="synthetic_corpus",
+        help="Corpus directory created by make_synthetic_corpus.py",
+    )
+    parser.add_argument("--resize_limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--output", type=str, default=None, help="Write results as JSON here"
+    )
+    parser.add_argument(
+        "--baseline",
+        type=str,
+        default=None,
+        help="JSON from a previous --output run to compare against",
+    )
+    args = parser.parse_args()
+    if not os.path.isdir(os.path.join(args.corpus, "Frames")):
+        from make_synthetic_corpus import generate_corpus
+
+        generate_corpus(args.corpus)
+    results = benchmark(args.corpus, args.resize_limit, args.repeat)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
@@ -0,0 +1,167 @@
+import argparse
+import json
+import os
+
+from crawler import get_crawler
+from thumb_store import store_for_path
+
+# -----------------------------
+# Configurable Parameters
+# -----------------------------
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png")
+THUMB_SIZE = (64, 48)  # (width, height) of the grayscale frames used for scoring
+BG_ALPHA = 0.2  # weight of each new frame in the running background
+PIXEL_DIFF = 18.0  # gray levels a pixel must differ from background to count as motion
+MOTION_THRESHOLD = 0.01  # fraction of moving pixels to keep a frame unconditionally
+DUPLICATE_THRESHOLD = (
+    4.0  # mean abs difference below which consecutive frames are duplicates
+)
+
+
+def load_gray(path, size=THUMB_SIZE):
+    """Decode a frame straight to a small grayscale float32 array."""
+    import numpy as np
+    from PIL import Image
+
+    with Image.open(path) as img:
+        # JPEG draft mode decodes at 1/2..1/8 scale, far cheaper than full decode
+        img.draft("L", (size[0] * 2, size[1] * 2))
+        img = img.convert("L").resize(size, Image.Resampling.BILINEAR)
+        return np.asarray(img, dtype=np.float32)
+
+
+def motion_scores(frames, alpha=BG_ALPHA, pixel_diff=PIXEL_DIFF):
+    """
+    Fraction of pixels in each frame that differ from a running background.
+    frames: (N, H, W) float32. The background starts at the folder median
+    (so animals passing through are mostly excluded) and is updated as an
+    exponential moving average. Frame means are removed first so exposure
+    changes and IR switching don't register as motion.
+    """
+    import numpy as np
+
+    frames = frames - frames.mean(axis=(1, 2), keepdims=True)
+    background = np.median(frames, axis=0)
+    scores = np.empty(len(frames), dtype=np.float32)
+    for i, frame in enumerate(frames):
+        scores[i] = np.count_nonzero(np.abs(frame - background) > pixel_diff)
+        background = (1 - alpha) * background + alpha * frame
+    return scores / frames[0].size
+
+
+def duplicate_clusters(frames, threshold=DUPLICATE_THRESHOLD):
+    """Label runs of consecutive near-identical frames with a cluster id."""
+    import numpy as np
+
+    if len(frames) < 2:
+        return np.zeros(len(frames), dtype=np.int64)
+    step_diff = np.abs(np.diff(frames, axis=0)).mean(axis=(1, 2))
+    return np.concatenate([[0], np.cumsum(step_diff > threshold)])
+
+
+def cull_folder(
+    folder,
+    motion_threshold=MOTION_THRESHOLD,
+    duplicate_threshold=DUPLICATE_THRESHOLD,
+    load=load_gray,
+):
+    """
+    Decide which frames of one folder go to the model.
+    Returns {"keep": [paths], "skipped": {path: representative path},
+    "motion": {path: score}}. Every frame above the motion threshold is kept,
+    plus the highest-motion frame of each near-duplicate cluster; a skipped
+    frame is represented by the kept frame of its cluster.
+    """
+    import numpy as np
+
+    names = get_crawler().list_files(folder, IMAGE_EXTS)
+    paths = [os.path.join(folder, name) for name in names]
+    if not paths:
+        return {"keep": [], "skipped": {}, "motion": {}}
+    frames = np.stack([load(p) for p in paths])
+    scores = motion_scores(frames)
+    clusters = duplicate_clusters(frames, duplicate_threshold)
+    keep = scores >= motion_threshold
+    representative = {}
+    for cluster in np.unique(clusters):
+        members = np.flatnonzero(clusters == cluster)
+        best = members[np.argmax(scores[members])]
+        keep[best] = True
+        representative[int(cluster)] = best
+    skipped = {}
+    for i in np.flatnonzero(~keep):
+        skipped[paths[i]] = paths[representative[int(clusters[i])]]
+    return {
+        "keep": [p for p, k in zip(paths, keep) if k],
+        "skipped": skipped,
+        "motion": {p: float(s) for p, s in zip(paths, scores)},
+    }
+
+
+def store_loader(path, size=THUMB_SIZE):
+    """load_gray() that reads the packed thumbnail store when it has the frame."""
+    store = store_for_path(path)
+    gray = store.gray(path, size) if store is not None else None
+    return gray if gray is not None else load_gray(path, size)
+
+
+def cull_tree(root):
+    """cull_folder() for every image folder under root, merged into one plan."""
+    plan = {"keep": [], "skipped": {}, "motion": {}}
+    for folder in get_crawler().find_dirs_with_files(root, IMAGE_EXTS):
+        folder_plan = cull_folder(folder, load=store_loader)
+        plan["keep"].extend(folder_plan["keep"])
+        plan["skipped"].update(folder_plan["skipped"])
+        plan["motion"].update(folder_plan["motion"])
+    get_crawler().save_manifest()
+    total = len(plan["keep"]) + len(plan["skipped"])
+    print(f"Culling kept {len(plan['keep'])} of {total} frames under {root}")
+    return plan
+
+
+def write_filepaths_txt(plan, path):
+    with open(path, "w") as f:
+        f.write("\n".join(plan["keep"]) + "\n")
+    return path
+
+
+def propagate_labels(predictions_json, plan):
+    """
+    Add a prediction for every culled frame to a SpeciesNet predictions JSON,
+    copied from its representative and marked with "propagated_from".
+    """
+    with open(predictions_json, "r") as f:
+        data = json.load(f)
+    by_path = {os.path.normpath(p["filepath"]): p for p in data.get("predictions", [])}
+    added = 0
+    for skipped, source in plan["skipped"].items():
+        source_pred = by_path.get(os.path.normpath(source))
+        if source_pred is None or os.path.normpath(skipped) in by_path:
+            continue
+        pred = dict(source_pred)
+        pred["filepath"] = skipped
+        pred["propagated_from"] = source
+        data["predictions"].append(pred)
+        added += 1
+    data["predictions"].sort(key=lambda p: p["filepath"])
+    with open(predictions_json, "w") as f:
+        json.dump(data, f, indent=1)
+    print(f"Propagated labels to {added} culled frames in {predictions_json}")
+    return added
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Score frames for motion and near-duplicates before inference."
+    )
+    parser.add_argument("folder", type=str, help="Image folder or tree to score")
+    parser.add_argument(
+        "--output", type=str, default=None, help="Write the cull plan JSON here"
+    )
+    args = parser.parse_args()
+    plan = cull_tree(args.folder)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(plan, f, indent=1)
+        print(f"Cull plan written to {args.output}")
@@ -1,13 +1,48 @@
 import os
 import base64
 import json
-import re
 import argparse
 import io
-from PIL import Image, ExifTags
+import time
 from pathlib import Path
 import csv
 import logging
+from lvlm_schema import (
+    ANALYSIS_SCHEMA,
+    OVERLAY_FIELDS,
+    SEQUENCE_KEY,
+    AnalysisError,
+    coerce_analysis,
+    packed_coerce,
+    packed_schema,
+    parse_analysis,
+    response_format,
+    without_fields,
+)
+from lvlm_compact import (
+    COMPACT_MAX_TOKENS,
+    COMPACT_OVERLAY_KEYS,
+    COMPACT_SCHEMA,
+    build_compact_prompt,
+    coerce_compact,
+    expand_compact,
+)
+from lvlm_retry import (
+    DEAD_LETTER_PATH,
+    FATAL,
+    CircuitBreaker,
+    RetriesExhausted,
+    append_dead_letter,
+    call_with_retry,
+    classify_error,
+    clear_dead_letters,
+    read_dead_letters,
+)
+from lvlm_metrics import METRICS, profiling
+from lvlm_stream import STREAM_OUTPUT_BUDGET, read_stream
+from crawler import get_crawler
+import lvlm_gate
+import lvlm_escalate
 
 # -----------------------------
 # Configurable Parameters
@@ -16,6 +51,44 @@ import logging
 DEFAULT_ROOT = "Frames"
 SAMPLES_PER_FOLDER = 5
 MAX_IMAGE_HEIGHT = 720
+# Extra passes over folders whose responses failed to parse or validate
+MAX_REQUEUE_PASSES = 2
+METRICS_JSON_PATH = Path("lvlm") / "metrics.json"
+METRICS_PROM_PATH = Path("lvlm") / "metrics.prom"
+MAX_OUTPUT_TOKENS = 2048
+# Request packing budgets (--pack): only folders with few sampled images are
+# packed, and a packed request stays under all of these
+PACK_MAX_FOLDER_IMAGES = 3
+PACK_MAX_SEQUENCES = 6
+PACK_MAX_IMAGES = 12
+PACK_MAX_INPUT_TOKENS = 12000
+PACK_MAX_OUTPUT_TOKENS = 8192
+PACK_IMAGE_TOKENS = {"low": 85, "auto": 765, "high": 765}  # 720p image estimate
+
+# Per-run behaviour switches, overridable from the CLI
+DEFAULT_OPTIONS = {
+    # Ask for the short-key, coded response format and expand it locally
+    "compact": False,
+    # Use SpeciesNet confidence to skip the LVLM or pick a cheaper tier
+    "gate": False,
+    "gate_thresholds": None,
+    # Crop frames to the SpeciesNet detections and add a scene thumbnail
+    "crop": False,
+    # Read date, time and temperature from the overlay locally (overlay_ocr.py)
+    "ocr": False,
+    # Analyse several short folders per request
+    "pack": False,
+    # Cheap first pass, then more frames at higher resolution where the
+    # answer disagrees with SpeciesNet or is unsure (lvlm_escalate.py)
+    "escalate": False,
+    # Reuse the analysis of a near-identical earlier sequence (lvlm_cache.py)
+    "cache": False,
+    "cache_distance": None,
+    # Stream responses and abort (re-queue) on schema deviations or past
+    # an output-token budget
+    "stream": False,
+    "stream_budget": None,
+}
 
 
 # -----------------------------
@@ -26,12 +99,11 @@ def load_api_key():
 
 
 def find_image_folders(root_dir):
-    image_folders = []
-    for dirpath, _, filenames in os.walk(root_dir):
-        if any(f.lower().endswith(".jpg") for f in filenames):
-            # Remove trailing slash
-            image_folders.append(dirpath.rstrip(os.sep))
-    return sorted(image_folders)
+    return get_crawler().find_dirs_with_files(root_dir, [".jpg"])
+
+
+# sequence_max_detections.csv contents per path, indexed by folder parts
+_PRIMARY_IMAGES = {}
 
 
 def get_csv_primary_image(folder_path):
@@ -47,25 +119,26 @@ def get_csv_primary_image(folder_path):
         / "sequence_max_detections.csv"
     )
 
-    if not csv_path.exists():
-        return None
-
-    with open(csv_path, "r") as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            file_path = Path(row["file_name"])
-            if file_path.parts[:-1] == folder_path.parts:
-                return file_path
-    return None
+    primary_images = _PRIMARY_IMAGES.get(csv_path)
+    METRICS.cache("primary_image_csv", primary_images is not None)
+    if primary_images is None:
+        primary_images = {}
+        if csv_path.exists():
+            with open(csv_path, "r") as csvfile:
+                reader = csv.DictReader(csvfile)
+                for row in reader:
+                    file_path = Path(row["file_name"])
+                    primary_images.setdefault(file_path.parts[:-1], file_path)
+        _PRIMARY_IMAGES[csv_path] = primary_images
+    return primary_images.get(folder_path.parts)
 
 
 def sample_images(folder_path, n=SAMPLES_PER_FOLDER):
-    all_jpgs = [
-        Path(folder_path) / f
-        for f in os.listdir(folder_path)
-        if f.lower().endswith(".jpg")
-    ]
-    all_jpgs = sorted(all_jpgs)
+    with METRICS.span("list"):
+        all_jpgs = [
+            Path(folder_path) / f
+            for f in get_crawler().list_files(folder_path, [".jpg"])
+        ]
     if n >= len(all_jpgs):
         return all_jpgs
     # Uniformly sample n images
@@ -84,6 +157,8 @@ def resize_image_if_needed(image_path, max_height=MAX_IMAGE_HEIGHT):
     Resize image to have a maximum height while maintaining aspect ratio.
     Returns the resized image as bytes.
     """
+    from PIL import Image
+
     with Image.open(image_path) as img:
         # Convert to RGB if needed (handles RGBA, grayscale, etc.)
         if img.mode != "RGB":
@@ -113,7 +188,16 @@ def resize_image_if_needed(image_path, max_height=MAX_IMAGE_HEIGHT):
 
 
 def get_image_datetime(image_path):
+    # The thumbnail store keeps EXIF times, saving a JPEG open per image
+    from thumb_store import store_for_path
+
+    store = store_for_path(image_path)
+    stored = store.datetime(image_path) if store is not None else None
+    if stored:
+        return stored
     try:
+        from PIL import ExifTags, Image
+
         with Image.open(image_path) as img:
             exif = img._getexif()
             if not exif:
@@ -134,9 +218,26 @@ def get_image_datetime(image_path):
 # -----------------------------
 
 
-def build_prompt():
-    return """
-You are a wildlife ecologist analyzing a camera trap image sequence'.
+# Prompt lines about overlay fields, dropped when local OCR has read them
+OVERLAY_PROMPT_LINES = (
+    "- Extract **date",
+    '"date"',
+    '"time"',
+    '"temperature"',
+    "- date:",
+    "- time:",
+)
+
+
+def drop_prompt_lines(prompt, prefixes):
+    return "\n".join(
+        line for line in prompt.splitlines() if not line.strip().startswith(prefixes)
+    )
+
+
+def build_prompt(overlay_known=False):
+    prompt = """
+You are a wildlife ecologist analyzing a camera trap image sequence.
 The location is near Bailey or Evergreen, Colorado — use this to inform habitat, species, and behavior.
 
 Your goals:
@@ -151,92 +252,175 @@ Your goals:
 Return one **JSON object** in this format (no extra explanation):
 
 ```json
-{{
-  "date": "YYYY-MM-DD",                // from image overlay if shown
-  "time": "HH:MM:SS",                  // or "day"/"night"
+{
+  "date": "YYYY-MM-DD",
+  "time": "HH:MM:SS",
   "habitat": "e.g., aspen meadow, riparian zone",
   "temperature": "e.g., 43F or unknown",
-  "weather": "e.g., sunny, snowy, raining, cold, hot,unknown
-  "count": total number of distinct animals seen,
+  "weather": "e.g., sunny, snowy, raining, cold, hot, unknown",
+  "count": 2,
   "individuals": [
-    {{
+    {
       "id": "elk_1",
       "species": "Cervus canadensis (elk)",
-      "sex":"female",                   // one of : male,female,unknown.
-      "approx_age": "adult",          // one of: baby, young, adult, old
-      "health": "healthy",            // or: thin, limping, wounded, etc.
-      "activity": "grazing",          // one of: grazing, browsing, walking, running, resting, alert, drinking, social, following, chasing, sniffing, playing, fleeing, nursing, vocalizing, marking
-      "interaction": "near elk_calf_1",  // or "none"
+      "sex": "female",
+      "approx_age": "adult",
+      "health": "healthy",
+      "activity": "grazing",
+      "interaction": "near elk_calf_1",
       "notes": "optional observations"
-    }}
-  ]
-   "summary": "A short paragraph summarizing the scene in natural language, suitable for a field biologist.
-   Mention key species, behaviors, habitat, group dynamics, and anything noteworthy like alertness, health, or time of day."
-}}
-}}
+    }
+  ],
+  "summary": "A short paragraph summarizing the scene in natural language, suitable for a field biologist."
+}
+```
+
+Field notes:
+- date: from the image overlay if shown, else "unknown".
+- time: from the overlay as HH:MM:SS, or "day"/"night".
+- count: total number of distinct animals seen.
+- sex: one of male, female, unknown.
+- approx_age: one of baby, young, adult, old, unknown.
+- health: healthy, or thin, limping, wounded, etc.
+- activity: one of grazing, browsing, walking, running, resting, alert, drinking, social, \
+following, chasing, sniffing, playing, fleeing, nursing, vocalizing, marking, unknown.
+- interaction: e.g. "near elk_calf_1", or "none".
+- summary: mention key species, behaviors, habitat, group dynamics, and anything noteworthy like alertness, health, or time of day.
 """.strip()
+    if overlay_known:
+        prompt = drop_prompt_lines(prompt, OVERLAY_PROMPT_LINES)
+    return prompt
 
 
 # -----------------------------
 # Vision Model Integration (OpenAI GPT-4o)
 # -----------------------------
-def extract_json(text):
-    """
-    Extract and parse a JSON object from a language model response.
-    Handles Markdown-wrapped code blocks and extra formatting.
-    """
-    # Try to find a JSON object inside triple backticks (Markdown-style)
-    match = re.search(r"```(?:json)?\s*({.*?})\s*```", text, re.DOTALL)
-    if match:
-        json_str = match.group(1)
-    else:
-        # Fallback: try to find any JSON object in the text
-        match = re.search(r"({.*})", text, re.DOTALL)
-        if match:
-            json_str = match.group(1)
-        else:
-            raise ValueError("No valid JSON found in the response.")
-
-    # Parse the cleaned JSON
-    try:
-        return json.loads(json_str)
-    except json.JSONDecodeError as e:
-        print("Error decoding JSON:", e)
-        print("Extracted string:", json_str)
-        raise
-
-
-def ask_openai(prompt_text, image_paths, client):
+def image_payload(image_bytes, detail="auto"):
     # Upload image files or serve from local web server
     # For now, encode directly as base64 with MIME type
-    def image_payload(path):
-        resized_image_bytes = resize_image_if_needed(path)
-        base64_image = base64.b64encode(resized_image_bytes).decode("utf-8")
-        return {
-            "type": "image_url",
-            "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"},
-        }
+    base64_image = base64.b64encode(image_bytes).decode("utf-8")
+    return {
+        "type": "image_url",
+        "image_url": {
+            "url": f"data:image/jpeg;base64,{base64_image}",
+            "detail": detail,
+        },
+    }
 
-    # Create message content list: prompt text first
-    content = [{"type": "text", "text": prompt_text}]
+
+def image_content(
+    image_paths, detail="auto", detections=None, max_height=MAX_IMAGE_HEIGHT
+):
+    """Message parts for one sequence: an order marker and the image, per image."""
+    content = []
+    thumbnail = None
     # Add each image with an explicit order marker (always) and EXIF time if available
     for i, img_path in enumerate(image_paths):
-        exif_time = get_image_datetime(img_path)
+        with METRICS.span("exif"):
+            exif_time = get_image_datetime(img_path)
         label = f"Image {i+1}"
         if exif_time:
-            label + f" EXIF datetime: {exif_time}):"
+            label += f" (EXIF datetime: {exif_time})"
+        with METRICS.span("encode"):
+            cropped = None
+            if detections is not None:
+                from lvlm_crop import crop_image
+
+                # Zoom on the detector boxes; one scene thumbnail per sequence
+                cropped = crop_image(
+                    img_path,
+                    detections.get(Path(img_path).name),
+                    with_thumbnail=thumbnail is None,
+                )
+            if cropped is None:
+                image_bytes = resize_image_if_needed(img_path, max_height)
+            else:
+                image_bytes, frame_thumbnail = cropped
+                thumbnail = thumbnail or frame_thumbnail
+                label += " (crop)"
+                METRICS.incr("cropped_images")
         print(label)
         content.append({"type": "text", "text": label})
-        content.append(image_payload(img_path))
+        content.append(image_payload(image_bytes, detail))
+    if thumbnail is not None:
+        content.append({"type": "text", "text": "Scene thumbnail"})
+        content.append(image_payload(thumbnail, "low"))
+    return content
+
+
+def create_completion(
+    content, client, breaker, schema, max_tokens, model, stream_budget=None
+):
+    # Transient errors (429, 5xx, timeouts) are retried here with backoff
+    request = {
+        "model": model,
+        "messages": [{"role": "user", "content": content}],
+        "temperature": 0.0,
+        "max_tokens": max_tokens,
+        "response_format": response_format(schema),
+    }
+
+    def streamed():
+        # Opening and reading the stream are one attempt, so a connection
+        # dropped mid-stream is retried like one that failed to open
+        started = time.perf_counter()
+        stream = client.chat.completions.create(
+            **request, stream=True, stream_options={"include_usage": True}
+        )
+        return read_stream(stream, schema, stream_budget, started)
+
+    with METRICS.span("network"):
+        if stream_budget is None:
+            return call_with_retry(
+                client.chat.completions.create, breaker=breaker, **request
+            )
+        return call_with_retry(streamed, breaker=breaker)
+
 
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[{"role": "user", "content": content}],
-        temperature=0.0,
-        max_tokens=2048,
+def ask_openai(
+    prompt_text,
+    image_paths,
+    client,
+    breaker=None,
+    schema=ANALYSIS_SCHEMA,
+    max_tokens=MAX_OUTPUT_TOKENS,
+    model="gpt-4o",
+    detail="auto",
+    detections=None,
+    max_height=MAX_IMAGE_HEIGHT,
+    stream_budget=None,
+):
+    # Create message content list: prompt text first
+    content = [{"type": "text", "text": prompt_text}]
+    content += image_content(image_paths, detail, detections, max_height)
+    return create_completion(
+        content, client, breaker, schema, max_tokens, model, stream_budget
     )
 
-    return response
+
+def ask_openai_packed(
+    prompt_text,
+    jobs,
+    client,
+    breaker,
+    schema,
+    max_tokens,
+    model,
+    detail,
+    stream_budget=None,
+):
+    """One request for several sequences, each introduced by a numbered marker."""
+    content = [{"type": "text", "text": prompt_text}]
+    for k, job in enumerate(jobs, 1):
+        marker = f"=== Sequence {k}: {Path(job['folder']).name} ({len(job['images'])} images) ==="
+        print(marker)
+        content.append({"type": "text", "text": marker})
+        content += image_content(
+            job["images"], detail, job["detections"], job["max_height"]
+        )
+    return create_completion(
+        content, client, breaker, schema, max_tokens, model, stream_budget
+    )
 
 
 # -----------------------------
@@ -256,15 +440,172 @@ def setup_logger(log_path):
     return logger
 
 
-def process_folder(folder, api_key, dry_run=False, logger=None, client=None):
-    images = sample_images(folder)
+def prepare_folder(folder, options, escalation_pass=None):
+    """
+    Everything needed to analyse one folder: sampled images, overlay OCR,
+    detections, gate decision, model tier, prompt and response schema.
+    escalation_pass (an lvlm_escalate pass dict) overrides the frame count,
+    resolution and detail; --escalate defaults it to the cheap first pass.
+    Returns None when the folder has no images.
+    """
+    if escalation_pass is None and options["escalate"]:
+        escalation_pass = lvlm_escalate.FIRST_PASS
+    samples, max_height = SAMPLES_PER_FOLDER, MAX_IMAGE_HEIGHT
+    if escalation_pass is not None:
+        samples, max_height = escalation_pass["samples"], escalation_pass["max_height"]
+    with METRICS.span("sample"):
+        images = sample_images(folder, samples)
     if not images:
         print(f"No images sampled for {folder}, skipping output.")
-        return None, None
-    prompt = build_prompt()
+        return None
+    overlay = None
+    if options["ocr"]:
+        # Date, time and temperature read locally don't need asking for
+        from overlay_ocr import overlay_fields
+
+        with METRICS.span("ocr"):
+            overlay = overlay_fields(images)
+        METRICS.incr("overlay_ocr_hits" if overlay else "overlay_ocr_misses")
+    if options["compact"]:
+        prompt = build_compact_prompt(overlay is not None)
+        schema = COMPACT_SCHEMA
+        if overlay is not None:
+            schema = without_fields(schema, COMPACT_OVERLAY_KEYS)
+        max_tokens = COMPACT_MAX_TOKENS
+    else:
+        prompt = build_prompt(overlay is not None)
+        schema = ANALYSIS_SCHEMA
+        if overlay is not None:
+            schema = without_fields(schema, OVERLAY_FIELDS)
+        max_tokens = MAX_OUTPUT_TOKENS
     print(f"Sampled {len(images)} images from {folder}.")
-    image_frames = [Path(img_path).name for img_path in images]
-    if dry_run:
+    hashes = None
+    if options["cache"]:
+        from lvlm_cache import fingerprint
+
+        with METRICS.span("fingerprint"):
+            hashes = fingerprint(images)
+    detections = None
+    if options["crop"]:
+        from lvlm_crop import CROP_PROMPT_NOTE, folder_detections
+
+        detections = folder_detections(folder)
+        prompt = CROP_PROMPT_NOTE + prompt
+    gate = None
+    model, detail = lvlm_gate.FULL_MODEL, "auto"
+    if options["gate"]:
+        gate = lvlm_gate.decide(
+            folder, options["gate_thresholds"] or lvlm_gate.load_thresholds()
+        )
+        METRICS.incr(f"gate_{gate['decision']}")
+        print(f"Gate: {gate['decision']} ({gate['species']}, score={gate['score']})")
+        if gate["decision"] == lvlm_gate.CHEAP:
+            model, detail = lvlm_gate.CHEAP_MODEL, "low"
+    if escalation_pass is not None:
+        model = escalation_pass.get("model", model)
+        if detail != "low" or "model" in escalation_pass:
+            detail = escalation_pass["detail"]
+    return {
+        "folder": folder,
+        "images": images,
+        "image_frames": [Path(img_path).name for img_path in images],
+        "overlay": overlay,
+        "detections": detections,
+        "gate": gate,
+        "model": model,
+        "detail": detail,
+        "prompt": prompt,
+        "schema": schema,
+        "max_tokens": max_tokens,
+        "max_height": max_height,
+        "escalation_pass": escalation_pass,
+        "fingerprint": hashes,
+    }
+
+
+def parse_response(response_content, schema, options):
+    with METRICS.span("parse"):
+        if options["compact"]:
+            return expand_compact(
+                parse_analysis(response_content, schema, coerce_compact)
+            )
+        return parse_analysis(response_content, schema)
+
+
+def finish_folder(job, analysis_results, log_entry, logger, options, packed=None):
+    """Build the lvlm/<month>.json entry for a folder and record its usage."""
+    folder = job["folder"]
+    gate = job["gate"]
+    if job["overlay"] is not None:
+        # Keep the usual key order with the OCR values filled in
+        merged = {**analysis_results, **job["overlay"]}
+        analysis_results = {k: merged[k] for k in ANALYSIS_SCHEMA["properties"]}
+    result = {
+        "folder": folder,
+        "image_frames": job["image_frames"],
+        "analysis": analysis_results,
+        "metadata": {
+            "total_images_in_folder": len(get_crawler().list_files(folder, [".jpg"])),
+            "sampled_images": len(job["images"]),
+            "response_format": "compact" if options["compact"] else "full",
+            "crop": options["crop"],
+            "overlay_ocr": job["overlay"] is not None,
+        },
+    }
+    if gate is not None:
+        result["metadata"]["gate"] = {
+            **gate,
+            "model": None if gate["decision"] == lvlm_gate.SKIP else job["model"],
+        }
+    if packed is not None:
+        result["metadata"]["packed"] = packed
+    if job["escalation_pass"] is not None:
+        result["metadata"]["pass"] = {
+            "name": job["escalation_pass"]["name"],
+            "model": job["model"],
+            "detail": job["detail"],
+            "max_height": job["max_height"],
+        }
+    METRICS.incr("folders")
+    METRICS.incr("sampled_images", len(job["images"]))
+    METRICS.incr("input_tokens", log_entry["input_tokens"] or 0)
+    METRICS.incr("output_tokens", log_entry["output_tokens"] or 0)
+    # Log immediately if logger is provided
+    if logger is not None:
+        logger.info(
+            f"{folder}\t{log_entry['input_tokens']}\t{log_entry['output_tokens']}"
+        )
+    return result, log_entry
+
+
+def process_folder(
+    folder,
+    api_key,
+    dry_run=False,
+    logger=None,
+    client=None,
+    breaker=None,
+    options=None,
+):
+    options = {**DEFAULT_OPTIONS, **(options or {})}
+    with METRICS.span("folder"):
+        job = prepare_folder(folder, options)
+        if job is None:
+            return None, None
+        return run_job(job, dry_run, logger, client, breaker, options)
+
+
+def run_job(job, dry_run, logger, client, breaker, options):
+    folder = job["folder"]
+    gate = job["gate"]
+    if gate is not None and gate["decision"] == lvlm_gate.SKIP:
+        analysis_results = lvlm_gate.synthesize_analysis(gate)
+        log_entry = {
+            "folder": folder,
+            "input_tokens": None,
+            "output_tokens": None,
+        }
+    elif dry_run:
         print("[DRY RUN] Skipping OpenAI API call.")
         analysis_results = {
             "date": "unknown",
@@ -283,68 +624,425 @@ def process_folder(folder, api_key, dry_run=False, logger=None, client=None):
         }
     else:
         try:
-            response = ask_openai(prompt, images, client)
+            response = ask_openai(
+                job["prompt"],
+                job["images"],
+                client,
+                breaker,
+                job["schema"],
+                job["max_tokens"],
+                job["model"],
+                job["detail"],
+                job["detections"],
+                job["max_height"],
+                output_budget([job], options),
+            )
             response_content = response.choices[0].message.content
             print(f"Response content: {response_content}")
-            analysis_results = extract_json(response_content)
+            analysis_results = parse_response(response_content, job["schema"], options)
             log_entry = {
                 "folder": folder,
                 "input_tokens": response.usage.prompt_tokens,
                 "output_tokens": response.usage.completion_tokens,
             }
+        except AnalysisError as e:
+            # Leave it to process_month to re-queue just this folder
+            print(f"\n⚠️ Invalid analysis for folder {folder}: {e}")
+            raise
         except Exception as e:
-            import sys
-            import traceback
-
             print(f"\n❌ Error processing folder {folder}: {e}")
-            if (
-                "AuthenticationError" in str(type(e))
-                or "401" in str(e)
-                or "API key" in str(e)
-            ):
-                print(
-                    "\nAuthentication error: Please check your OpenAI API key and try again."
-                )
-                sys.exit(1)
-            else:
-                traceback.print_exc()
-                sys.exit(1)
-    result = {
-        "folder": folder,
-        "image_frames": image_frames,
-        "analysis": analysis_results,
-        "metadata": {
-            "total_images_in_folder": len(
-                [f for f in os.listdir(folder) if f.lower().endswith(".jpg")]
+            check_fatal(e)
+            raise
+    return finish_folder(job, analysis_results, log_entry, logger, options)
+
+
+def reuse_cached(job, cache, logger, options):
+    """
+    finish_folder() output adapted from a near-duplicate earlier sequence
+    in the cache, or None when there is no close enough match.
+    """
+    from lvlm_cache import adapt_analysis
+
+    gate = job["gate"]
+    if job["fingerprint"] is None or (
+        gate is not None and gate["decision"] == lvlm_gate.SKIP
+    ):
+        return None
+    match = cache.lookup(job["folder"], job["fingerprint"])
+    METRICS.cache("sequence", match is not None)
+    if match is None:
+        return None
+    source, entry, d = match
+    print(f"♻️ Reusing the analysis of {source} (distance {d:.1f})")
+    taken = get_image_datetime(job["images"][0])
+    analysis_results = adapt_analysis(entry["analysis"], source, job["overlay"], taken)
+    log_entry = {"folder": job["folder"], "input_tokens": None, "output_tokens": None}
+    result, log_entry = finish_folder(job, analysis_results, log_entry, logger, options)
+    result["metadata"]["reused"] = {"from": source, "distance": round(d, 2)}
+    cache.reused.append(
+        {
+            "folder": job["folder"],
+            "from": source,
+            "distance": round(d, 2),
+            "count": analysis_results.get("count"),
+            "summary": analysis_results.get("summary"),
+        }
+    )
+    return result, log_entry
+
+
+def output_budget(jobs, options):
+    """Streaming output-token budget for a request, or None when not streaming."""
+    if not options["stream"]:
+        return None
+    per_sequence = options["stream_budget"] or STREAM_OUTPUT_BUDGET
+    return sum(min(job["max_tokens"], per_sequence) for job in jobs)
+
+
+def check_fatal(e):
+    if classify_error(e) == FATAL:
+        import sys
+
+        print("\nAuthentication error: Please check your OpenAI API key and try again.")
+        sys.exit(1)
+
+
+# -----------------------------
+# Request Packing
+# -----------------------------
+
+
+def estimate_input_tokens(job):
+    """Rough prompt-token cost of a job's images (tiles at "auto", flat at "low")."""
+    per_image = PACK_IMAGE_TOKENS.get(job["detail"], PACK_IMAGE_TOKENS["auto"])
+    return per_image * len(job["images"])
+
+
+def pack_jobs(jobs):
+    """
+    Group short folders of the same month into packed requests. Jobs are
+    packed with others sharing their model tier and schema, in folder
+    order, until an image, sequence, input-token or output-token budget
+    is reached. Returns a list of units, each a list of jobs.
+    """
+    units = []
+    open_batches = {}
+    for job in jobs:
+        skipped = job["gate"] is not None and job["gate"]["decision"] == lvlm_gate.SKIP
+        if skipped or len(job["images"]) > PACK_MAX_FOLDER_IMAGES:
+            units.append([job])
+            continue
+        key = (
+            job["model"],
+            job["detail"],
+            job["max_height"],
+            job["overlay"] is not None,
+        )
+        batch = open_batches.get(key)
+        if batch is not None and (
+            len(batch) >= PACK_MAX_SEQUENCES
+            or sum(len(j["images"]) for j in batch) + len(job["images"])
+            > PACK_MAX_IMAGES
+            or sum(estimate_input_tokens(j) for j in batch) + estimate_input_tokens(job)
+            > PACK_MAX_INPUT_TOKENS
+            or sum(j["max_tokens"] for j in batch) + job["max_tokens"]
+            > PACK_MAX_OUTPUT_TOKENS
+        ):
+            batch = None
+        if batch is None:
+            batch = open_batches[key] = []
+            units.append(batch)
+        batch.append(job)
+    return units
+
+
+def build_packed_prompt(prompt, n):
+    return (
+        prompt
+        + f"""
+
+PACKED REQUEST: the images below belong to {n} separate camera-trap sequences, each introduced by a line "=== Sequence k: <name> ===".
+Analyse every sequence independently (never carry animals across sequences) and return one JSON object
+{{"sequences": [...]}} holding one analysis object per sequence, in the format described above plus "{SEQUENCE_KEY}": k."""
+    )
+
+
+def run_batch(batch, logger, client, breaker, options):
+    """
+    Analyse a packed batch with one request. Returns the per-folder
+    (result, log_entry) pairs and {folder: AnalysisError} for sequences the
+    response left out, which process_month re-queues on their own.
+    """
+    first = batch[0]
+    schema = packed_schema(first["schema"])
+    coerce = coerce_compact if options["compact"] else coerce_analysis
+    folders = [job["folder"] for job in batch]
+    print(f"Packing {len(batch)} folders into one request: {folders}")
+    try:
+        response = ask_openai_packed(
+            build_packed_prompt(first["prompt"], len(batch)),
+            batch,
+            client,
+            breaker,
+            schema,
+            sum(job["max_tokens"] for job in batch),
+            first["model"],
+            first["detail"],
+            output_budget(batch, options),
+        )
+        response_content = response.choices[0].message.content
+        print(f"Response content: {response_content}")
+        with METRICS.span("parse"):
+            parsed = parse_analysis(
+                response_content, schema, packed_coerce(coerce, first["schema"])
+            )
+    except AnalysisError as e:
+        print(f"\n⚠️ Invalid packed analysis for {len(batch)} folders: {e}")
+        raise
+    except Exception as e:
+        print(f"\n❌ Error processing packed request: {e}")
+        check_fatal(e)
+        raise
+    METRICS.incr("packed_requests")
+    by_number = {}
+    for item in parsed["sequences"]:
+        by_number.setdefault(item.pop(SEQUENCE_KEY), item)
+    # Usage is only known per request; share it out by image count
+    total_images = sum(len(job["images"]) for job in batch)
+    outcomes, missing = [], {}
+    for k, job in enumerate(batch, 1):
+        item = by_number.get(k)
+        if item is None:
+            missing[job["folder"]] = AnalysisError(
+                f"packed response has no sequence {k}", response_content
+            )
+            continue
+        analysis_results = expand_compact(item) if options["compact"] else item
+        share = len(job["images"]) / total_images
+        log_entry = {
+            "folder": job["folder"],
+            "input_tokens": round((response.usage.prompt_tokens or 0) * share),
+            "output_tokens": round(
+                (response.usage.completion_tokens or 0) / len(batch)
             ),
-            "sampled_images": len(images),
-        },
-    }
-    # Log immediately if logger is provided
-    if logger is not None:
-        logger.info(
-            f"{folder}\t{log_entry['input_tokens']}\t{log_entry['output_tokens']}"
+        }
+        packed = {"sequence": k, "sequences": len(batch)}
+        outcomes.append(
+            finish_folder(job, analysis_results, log_entry, logger, options, packed)
         )
-    return result, log_entry
+    return outcomes, missing
 
 
-def process_month(month, month_folders, api_key, dry_run=False, logger=None):
+def process_month(
+    month,
+    month_folders,
+    api_key,
+    dry_run=False,
+    logger=None,
+    breaker=None,
+    base_url=None,
+    options=None,
+    cache=None,
+):
     from openai import OpenAI
 
-    client = OpenAI(api_key=api_key)
+    options = {**DEFAULT_OPTIONS, **(options or {})}
+    # Retries are handled by lvlm_retry, not the client
+    client = OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
     results = []
     log_entries = []
-    for folder in month_folders:
-        print(f"\nProcessing: {folder}")
-        result, log_entry = process_folder(folder, api_key, dry_run, logger, client)
-        if result is not None:
-            results.append(result)
-            log_entries.append(log_entry)
+    pending = list(month_folders)
+    errors = {}
+    fingerprints = {}
+    for attempt in range(1 + MAX_REQUEUE_PASSES):
+        if attempt:
+            print(f"\n🔁 Re-queueing {len(pending)} failed folder(s) for {month}")
+        failed = []
+        jobs = []
+        for folder in pending:
+            print(f"\nPreparing: {folder}")
+            try:
+                job = prepare_folder(folder, options)
+            except Exception as e:
+                import traceback
+
+                traceback.print_exc()
+                append_dead_letter(folder, e)
+                continue
+            if job is not None:
+                jobs.append(job)
+                fingerprints[job["folder"]] = job["fingerprint"]
+        # Packing is for the first pass; re-queued folders go on their own
+        if options["pack"] and not dry_run and not attempt:
+            units = pack_jobs(jobs)
+        else:
+            units = [[job] for job in jobs]
+        for unit in units:
+            if cache is not None:
+                remaining = []
+                for job in unit:
+                    reused = reuse_cached(job, cache, logger, options)
+                    if reused is None:
+                        remaining.append(job)
+                        continue
+                    results.append(reused[0])
+                    log_entries.append(reused[1])
+                unit = remaining
+                if not unit:
+                    continue
+            print(f"\nProcessing: {', '.join(job['folder'] for job in unit)}")
+            try:
+                if len(unit) == 1:
+                    with METRICS.span("folder"):
+                        outcomes = [
+                            run_job(unit[0], dry_run, logger, client, breaker, options)
+                        ]
+                    missing = {}
+                else:
+                    with METRICS.span("batch"):
+                        outcomes, missing = run_batch(
+                            unit, logger, client, breaker, options
+                        )
+            except AnalysisError as e:
+                for job in unit:
+                    errors[job["folder"]] = e
+                    failed.append(job["folder"])
+                continue
+            except Exception as e:
+                # Retries exhausted or a non-retryable request error
+                if not isinstance(e, RetriesExhausted):
+                    import traceback
+
+                    traceback.print_exc()
+                for job in unit:
+                    append_dead_letter(job["folder"], e)
+                continue
+            for result, log_entry in outcomes:
+                results.append(result)
+                log_entries.append(log_entry)
+                if cache is not None and not dry_run:
+                    cache_result(cache, result, fingerprints)
+            errors.update(missing)
+            failed.extend(missing)
+        pending = failed
+        if not pending:
+            break
+    for folder in pending:
+        print(f"❌ Giving up on {folder} after {1 + MAX_REQUEUE_PASSES} attempts")
+        append_dead_letter(folder, errors[folder])
+    if options["escalate"] and not dry_run:
+        results, escalated_entries = escalate_results(
+            results, logger, client, breaker, options
+        )
+        log_entries.extend(escalated_entries)
+        if cache is not None:
+            # Cache the second-pass answers in place of the first
+            for result in results:
+                if "first_pass" in result["metadata"]["escalation"]:
+                    cache_result(cache, result, fingerprints)
+    results.sort(key=lambda r: r["folder"])
     return results, log_entries
 
 
-def process_all_folders(root_dir, api_key, dry_run=False):
-    folders = find_image_folders(root_dir)
+def cache_result(cache, result, fingerprints):
+    """Add a fresh LVLM answer to the sequence cache (never gated or reused ones)."""
+    metadata = result["metadata"]
+    gate = metadata.get("gate") or {}
+    if "reused" in metadata or gate.get("decision") == lvlm_gate.SKIP:
+        return
+    hashes = fingerprints.get(result["folder"])
+    if hashes:
+        cache.add(result["folder"], hashes, result["analysis"])
+
+
+def escalate_results(results, logger, client, breaker, options):
+    """
+    Second pass of --escalate: re-analyse, with more frames at a higher
+    resolution, the folders whose first answer disagrees with SpeciesNet
+    or is unsure. The first answer is kept under metadata["escalation"];
+    if the second pass fails, the first answer stands.
+    """
+    final, log_entries = [], []
+    for result in results:
+        folder = result["folder"]
+        gate = result["metadata"].get("gate") or {}
+        reasons = []
+        if (
+            gate.get("decision") != lvlm_gate.SKIP
+            and "reused" not in result["metadata"]
+        ):
+            reasons = lvlm_escalate.escalation_reasons(folder, result["analysis"])
+        result["metadata"]["escalation"] = {"reasons": reasons}
+        if not reasons:
+            final.append(result)
+            continue
+        METRICS.incr("escalated")
+        for reason in reasons:
+            METRICS.incr(f"escalated_{reason}")
+        print(f"\n⏫ Escalating {folder}: {', '.join(reasons)}")
+        try:
+            job = prepare_folder(folder, options, lvlm_escalate.SECOND_PASS)
+            with METRICS.span("folder"):
+                second, log_entry = run_job(
+                    job, False, logger, client, breaker, options
+                )
+        except Exception as e:
+            if not isinstance(e, (AnalysisError, RetriesExhausted)):
+                import traceback
+
+                traceback.print_exc()
+            print(f"⚠️ Keeping the first pass for {folder}: {e}")
+            result["metadata"]["escalation"]["error"] = str(e)
+            final.append(result)
+            continue
+        first_metadata = dict(result["metadata"])
+        del first_metadata["escalation"]
+        second["metadata"]["escalation"] = {
+            "reasons": reasons,
+            "first_pass": {
+                "image_frames": result["image_frames"],
+                "analysis": result["analysis"],
+                "metadata": first_metadata,
+            },
+        }
+        final.append(second)
+        log_entries.append(log_entry)
+    return final, log_entries
+
+
+def save_month_results(month, results, merge_existing=False):
+    """Write lvlm/<month>.json, optionally replacing entries in an existing file."""
+    output_folder = Path("lvlm")
+    output_folder.mkdir(parents=True, exist_ok=True)
+    output_path = output_folder / f"{month}.json"
+    if merge_existing and output_path.exists():
+        with open(output_path, "r") as f:
+            by_folder = {entry["folder"]: entry for entry in json.load(f)}
+        by_folder.update({entry["folder"]: entry for entry in results})
+        results = sorted(by_folder.values(), key=lambda r: r["folder"])
+    with open(output_path, "w") as f:
+        json.dump(results, f, indent=2)
+    return output_path
+
+
+def process_all_folders(
+    root_dir, api_key, dry_run=False, folders=None, base_url=None, options=None
+):
+    """
+    Analyse every image folder under root_dir, or only the given folders.
+    When folders is given (e.g. from the dead-letter file), the results are
+    merged into the existing month JSON files instead of replacing them.
+    Returns the folders of this run left in the dead-letter file.
+    """
+    options = {**DEFAULT_OPTIONS, **(options or {})}
+    merge_existing = folders is not None
+    cache = None
+    if options["cache"]:
+        from lvlm_cache import MAX_DISTANCE, SequenceCache
+
+        cache = SequenceCache(max_distance=options["cache_distance"] or MAX_DISTANCE)
+    if folders is None:
+        folders = find_image_folders(root_dir)
     print(f"Found {len(folders)} folders with images.")
     from collections import defaultdict
 
@@ -357,16 +1055,26 @@ def process_all_folders(root_dir, api_key, dry_run=False):
     log_path = Path("lvlm") / "wildlife_lvlm_log.txt"
     log_path.parent.mkdir(parents=True, exist_ok=True)
     logger = setup_logger(log_path)
+    breaker = CircuitBreaker()
     for month, month_folders in month_to_folders.items():
         results, log_entries = process_month(
-            month, month_folders, api_key, dry_run, logger
+            month,
+            month_folders,
+            api_key,
+            dry_run,
+            logger,
+            breaker,
+            base_url,
+            options,
+            cache,
         )
-        output_folder = Path("lvlm")
-        output_folder.mkdir(parents=True, exist_ok=True)
-        output_path = output_folder / f"{month}.json"
-        with open(output_path, "w") as f:
-            json.dump(results, f, indent=2)
+        if cache is not None and not dry_run:
+            cache.save()
+        output_path = save_month_results(month, results, merge_existing)
         print(f"\n✅ Metadata for {month} saved to: {output_path}")
+        if not dry_run:
+            # Folders that failed on an earlier run and have now succeeded
+            clear_dead_letters(result["folder"] for result in results)
         all_log_entries.extend(log_entries)
     # Calculate total tokens
     total_input_tokens = sum(e["input_tokens"] or 0 for e in all_log_entries)
@@ -376,6 +1084,42 @@ def process_all_folders(root_dir, api_key, dry_run=False):
     # Append totals to log file
     logger.info(f"TOTAL\t{total_input_tokens}\t{total_output_tokens}")
     print(f"\n📝 Log saved to: {log_path}")
+    if cache is not None:
+        review_path = cache.write_review()
+        if review_path is not None:
+            print(
+                f"♻️ {len(cache.reused)} reused analyses listed for review in: {review_path}"
+            )
+    folders = {str(folder) for folder in folders}
+    failed = sorted(
+        entry["folder"] for entry in read_dead_letters() if entry["folder"] in folders
+    )
+    if failed:
+        print(f"☠️  {len(failed)} failed folder(s) recorded in: {DEAD_LETTER_PATH}")
+    get_crawler().save_manifest()
+    METRICS.write_json(METRICS_JSON_PATH)
+    METRICS.write_prometheus(METRICS_PROM_PATH)
+    print(f"📈 Metrics saved to: {METRICS_JSON_PATH} and {METRICS_PROM_PATH}")
+    return failed
+
+
+def retry_dead_letters(api_key, dry_run=False, base_url=None, options=None):
+    """Re-run the folders recorded in the dead-letter file."""
+    entries = read_dead_letters()
+    if not entries:
+        print(f"No dead-letter entries in {DEAD_LETTER_PATH}")
+        return []
+    # Start a fresh file; folders that fail again are re-recorded
+    DEAD_LETTER_PATH.unlink()
+    folders = sorted(entry["folder"] for entry in entries)
+    return process_all_folders(
+        None,
+        api_key,
+        dry_run=dry_run,
+        folders=folders,
+        base_url=base_url,
+        options=options,
+    )
 
 
 # -----------------------------
@@ -397,6 +1141,115 @@ if __name__ == "__main__":
         action="store_true",
         help="If set, do not call the OpenAI API, just print sampled images and prompt.",
     )
+    parser.add_argument(
+        "--retry-dead-letter",
+        action="store_true",
+        help=f"Re-run only the folders recorded in {DEAD_LETTER_PATH}.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Capture cProfile and tracemalloc output into lvlm/profile/.",
+    )
+    parser.add_argument(
+        "--base-url",
+        type=str,
+        default=os.getenv("OPENAI_BASE_URL"),
+        help="OpenAI-compatible API base URL, e.g. http://127.0.0.1:8089/v1 "
+        "for stub_openai_server.py.",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Use the compact coded response format (fewer output tokens).",
+    )
+    parser.add_argument(
+        "--gate",
+        action="store_true",
+        help="Skip or downgrade folders SpeciesNet already classified confidently.",
+    )
+    parser.add_argument(
+        "--gate-config",
+        type=str,
+        default=None,
+        help="JSON file of per-class {'skip': x, 'cheap': y} confidence thresholds.",
+    )
+    parser.add_argument(
+        "--crop",
+        action="store_true",
+        help="Send crops around SpeciesNet detections plus a small scene thumbnail.",
+    )
+    parser.add_argument(
+        "--ocr",
+        action="store_true",
+        help="Read date, time and temperature from the overlay locally "
+        "(learn templates first with overlay_ocr.py learn).",
+    )
+    parser.add_argument(
+        "--pack",
+        action="store_true",
+        help="Pack several short folders of a month into one request.",
+    )
+    parser.add_argument(
+        "--escalate",
+        action="store_true",
+        help="Cheap first pass; re-ask with more, sharper frames only where GPT "
+        "disagrees with SpeciesNet or is unsure.",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Reuse the analysis of a visually near-identical earlier sequence.",
+    )
+    parser.add_argument(
+        "--cache-distance",
+        type=float,
+        default=None,
+        help="Mean per-frame hash distance (bits of 64) counted as the same scene.",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream responses and abort (re-queue) responses that leave the "
+        "schema or exceed the output budget.",
+    )
+    parser.add_argument(
+        "--stream-budget",
+        type=int,
+        default=None,
+        help=f"Output tokens per sequence before a streamed response is aborted "
+        f"(default {STREAM_OUTPUT_BUDGET}).",
+    )
     api_key = load_api_key()
     args = parser.parse_args()
-    process_all_folders(args.root, api_key, dry_run=args.dry_run)
+    options = {
+        "compact": args.compact,
+        "gate": args.gate,
+        "gate_thresholds": lvlm_gate.load_thresholds(args.gate_config),
+        "crop": args.crop,
+        "ocr": args.ocr,
+        "pack": args.pack,
+        "escalate": args.escalate,
+        "cache": args.cache,
+        "cache_distance": args.cache_distance,
+        "stream": args.stream,
+        "stream_budget": args.stream_budget,
+    }
+    if args.base_url and not api_key:
+        api_key = "stub"  # local servers don't check the key
+    with profiling(args.profile, Path("lvlm") / "profile"):
+        if args.retry_dead_letter:
+            failed = retry_dead_letters(
+                api_key, dry_run=args.dry_run, base_url=args.base_url, options=options
+            )
+        else:
+            failed = process_all_folders(
+                args.root,
+                api_key,
+                dry_run=args.dry_run,
+                base_url=args.base_url,
+                options=options,
+            )
+    # Non-zero so the pipeline doesn't mark the month done and retries it
+    if failed:
+        raise SystemExit(1)
@@ -0,0 +1,420 @@
+import time
+
+STARTED = time.perf_counter()
+
+import argparse  # noqa: E402
+import json  # noqa: E402
+import os  # noqa: E402
+import runpy  # noqa: E402
+import socket  # noqa: E402
+import subprocess  # noqa: E402
+import sys  # noqa: E402
+from pathlib import Path  # noqa: E402
+
+# -----------------------------
+# Configurable Parameters
+# -----------------------------
+
+REPO_DIR = Path(__file__).resolve().parent
+SOCKET_PATH = REPO_DIR / ".cameratrap.sock"
+DAEMON_LOG = REPO_DIR / "logs" / "cameratrap_daemon.log"
+DAEMON_START_TIMEOUT = 60.0
+EXIT_MARKER = b"\0cameratrap-exit:"
+# Imported once by the daemon so commands start warm; missing optional ones are skipped
+PRELOAD = [
+    "numpy",
+    "pandas",
+    "PIL.Image",
+    "openai",
+    "onnxruntime",
+    "bs4",
+    "tqdm",
+    "call_lvlm",
+    "lvlm_cache",
+    "overlay_ocr",
+    "thumb_store",
+    "burst_cull",
+    "evaluate",
+    "speciesnet_onnx",
+]
+# Module caches built from files a previous command may have rewritten;
+# cleared before every daemon command. Imported libraries, loaded models
+# (speciesnet_onnx._MODELS) and the crawler, which revalidates listings by
+# mtime, stay warm.
+RESET_CACHES = [
+    ("lvlm_gate", "_MONTH_EVIDENCE"),
+    ("thumb_store", "_STORES"),
+    ("call_lvlm", "_PRIMARY_IMAGES"),
+]
+
+# name: (script, runs in the daemon, help). Long-running servers and the
+# commands that time or orchestrate fresh processes always run locally.
+COMMANDS = {
+    "speciesnet": ("run_speciesnet.py", True, "SpeciesNet and sequence smoothing"),
+    "onnx": ("speciesnet_onnx.py", True, "Export, tune or run SpeciesNet on ONNX"),
+    "cull": ("burst_cull.py", True, "Plan which frames SpeciesNet needs to see"),
+    "video-ingest": ("video_ingest.py", True, "Decode sampled video frames"),
+    "thumbs": ("thumb_store.py", True, "Update the packed thumbnail stores"),
+    "convert-md": (
+        "convert_speciesnet_to_md.py",
+        True,
+        "Convert results to MegaDetector format",
+    ),
+    "postprocess": (
+        "postprocess_results.py",
+        True,
+        "Preview pages and sequence CSVs",
+    ),
+    "video-match": ("video_match.py", True, "Check labels against folder names"),
+    "verify": ("verify_frames_in_csv.py", True, "Find frame folders missing from CSVs"),
+    "metadata": ("extract_image_metadata.py", True, "EXIF and overlay metadata CSV"),
+    "ocr": ("overlay_ocr.py", True, "Learn or read overlay templates"),
+    "lvlm": ("call_lvlm.py", True, "LVLM analysis of every sequence"),
+    "merge": ("merge.py", True, "Merge LVLM JSON with the sequence CSVs"),
+    "copy-images": (
+        "streamlit_app/copy_images_and_update_csv.py",
+        True,
+        "Copy sample images for the Streamlit app",
+    ),
+    "evaluate": ("evaluate.py", True, "Filename/SpeciesNet/GPT agreement report"),
+    "compare-backends": (
+        "compare_backends.py",
+        False,
+        "SpeciesNet backend accuracy vs speed",
+    ),
+    "pipeline": ("pipeline.py", False, "Incremental run of the whole pipeline"),
+    "benchmark": ("benchmark.py", False, "Time the hot paths on a synthetic corpus"),
+    "corpus": ("make_synthetic_corpus.py", True, "Build a synthetic test corpus"),
+    "stub": ("stub_openai_server.py", False, "Local OpenAI-compatible stub server"),
+}
+
+
+# -----------------------------
+# Running Commands
+# -----------------------------
+
+
+def run_script(name, args):
+    """Run a command's script as __main__ in this process; returns its exit code."""
+    script = COMMANDS[name][0]
+    sys.argv = [script, *args]
+    try:
+        runpy.run_path(str(REPO_DIR / script), run_name="__main__")
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    return 0
+
+
+def reset_caches():
+    for module_name, attr in RESET_CACHES:
+        module = sys.modules.get(module_name)
+        if module is not None:
+            getattr(module, attr).clear()
+    metrics = sys.modules.get("lvlm_metrics")
+    if metrics is not None:
+        metrics.METRICS.__init__()
+
+
+def send_request(request, timeout=None):
+    """Connected socket with request sent, or None when no daemon is listening."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(str(SOCKET_PATH))
+    except (FileNotFoundError, ConnectionRefusedError):
+        sock.close()
+        return None
+    sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+    return sock
+
+
+def relay(sock):
+    """Copy daemon output to stdout until the exit trailer; returns the exit code."""
+    out = sys.stdout.buffer
+    tail = b""
+    with sock:
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                break
+            tail += data
+            # Hold back enough bytes that the trailer is never split
+            if len(tail) > 64:
+                out.write(tail[:-64])
+                out.flush()
+                tail = tail[-64:]
+    text, marker, code = tail.rpartition(EXIT_MARKER)
+    if not marker:
+        out.write(tail)
+        print("❌ The daemon closed the connection mid-command.", file=sys.stderr)
+        return 1
+    out.write(text)
+    out.flush()
+    return int(code.decode().strip() or 1)
+
+
+def run_in_daemon(name, args):
+    """Exit code from the daemon, or None if it isn't running."""
+    sock = send_request(
+        {
+            "command": name,
+            "args": args,
+            "cwd": os.getcwd(),
+            "env": dict(os.environ),
+        }
+    )
+    if sock is None:
+        return None
+    return relay(sock)
+
+
+# -----------------------------
+# Daemon
+# -----------------------------
+
+
+def serve():
+    """
+    Keep heavy imports, loaded models and clients warm and run commands
+    sent by the cameratrap client, one at a time. The client's working
+    directory, arguments and environment apply to each command; its
+    stdout and stderr (including subprocesses') go back over the socket.
+    """
+    sys.path.insert(0, str(REPO_DIR))
+    sys.stdout.reconfigure(line_buffering=True)
+    preloaded = {}
+    for module_name in PRELOAD:
+        start = time.perf_counter()
+        try:
+            __import__(module_name)
+        except ImportError as e:
+            print(f"⚠️ Not preloading {module_name}: {e}")
+            continue
+        preloaded[module_name] = round((time.perf_counter() - start) * 1000, 1)
+    print(f"✅ Preloaded {len(preloaded)} modules: {preloaded}")
+    if SOCKET_PATH.exists():
+        SOCKET_PATH.unlink()
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(SOCKET_PATH))
+    server.listen(8)
+    started, served = time.time(), 0
+    print(f"▶️ cameratrap daemon {os.getpid()} listening on {SOCKET_PATH}")
+    try:
+        while True:
+            conn, _ = server.accept()
+            with conn:
+                request = json.loads(conn.makefile("rb").readline() or b"{}")
+                command = request.get("command")
+                if command == "__stop__":
+                    conn.sendall(EXIT_MARKER + b"0\n")
+                    break
+                if command == "__status__":
+                    status = {
+                        "pid": os.getpid(),
+                        "uptime_seconds": round(time.time() - started),
+                        "commands_served": served,
+                        "preloaded": preloaded,
+                    }
+                    conn.sendall(json.dumps(status).encode() + b"\n")
+                    conn.sendall(EXIT_MARKER + b"0\n")
+                    continue
+                if command not in COMMANDS or not COMMANDS[command][1]:
+                    conn.sendall(f"❌ Not a daemon command: {command}\n".encode())
+                    conn.sendall(EXIT_MARKER + b"2\n")
+                    continue
+                served += 1
+                code = run_request(conn, request)
+                print(f"{command} {' '.join(request['args'])} -> exit {code}")
+                try:
+                    conn.sendall(EXIT_MARKER + f"{code}\n".encode())
+                except OSError:
+                    pass  # client went away
+    finally:
+        server.close()
+        SOCKET_PATH.unlink(missing_ok=True)
+        print("✅ cameratrap daemon stopped")
+
+
+def run_request(conn, request):
+    """Run one command with fds 1 and 2 pointed at the client's socket."""
+    reset_caches()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved_fds = os.dup(1), os.dup(2)
+    saved_env, saved_argv = dict(os.environ), sys.argv
+    os.dup2(conn.fileno(), 1)
+    os.dup2(conn.fileno(), 2)
+    os.environ.clear()
+    os.environ.update(request["env"])
+    try:
+        os.chdir(request["cwd"])
+        return run_script(request["command"], request["args"])
+    except Exception:
+        import traceback
+
+        traceback.print_exc()
+        return 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        except OSError:
+            pass
+        os.dup2(saved_fds[0], 1)
+        os.dup2(saved_fds[1], 2)
+        for fd in saved_fds:
+            os.close(fd)
+        os.environ.clear()
+        os.environ.update(saved_env)
+        sys.argv = saved_argv
+        os.chdir(REPO_DIR)
+
+
+def daemon_start():
+    sock = send_request({"command": "__status__"})
+    if sock is not None:
+        relay(sock)
+        print("✅ The daemon is already running.")
+        return 0
+    DAEMON_LOG.parent.mkdir(parents=True, exist_ok=True)
+    with open(DAEMON_LOG, "a") as log:
+        process = subprocess.Popen(
+            [sys.executable, str(REPO_DIR / "cameratrap.py"), "daemon", "serve"],
+            cwd=REPO_DIR,
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+    deadline = time.monotonic() + DAEMON_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            print(f"❌ The daemon exited; see {DAEMON_LOG}")
+            return 1
+        sock = send_request({"command": "__status__"})
+        if sock is not None:
+            relay(sock)
+            print(f"✅ Daemon {process.pid} started (log: {DAEMON_LOG})")
+            return 0
+        time.sleep(0.1)
+    print(
+        f"❌ The daemon didn't start within {DAEMON_START_TIMEOUT:g}s; see {DAEMON_LOG}"
+    )
+    return 1
+
+
+def daemon(action):
+    if action == "serve":
+        serve()
+        return 0
+    if action == "start":
+        return daemon_start()
+    sock = send_request({"command": f"__{action}__"})
+    if sock is None:
+        print("⚠️ No daemon is running.")
+        return 1 if action == "status" else 0
+    return relay(sock)
+
+
+# -----------------------------
+# Startup Measurement
+# -----------------------------
+
+
+def measure_startup(names, repeat):
+    """Best-of-repeat wall time of `<command> --help`, locally and via the daemon."""
+
+    def best(argv):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, str(REPO_DIR / "cameratrap.py"), *argv, "--help"],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            if result.returncode:
+                return None
+            times.append((time.perf_counter() - start) * 1000)
+        return min(times)
+
+    probe = send_request({"command": "__status__"})
+    warm = probe is not None
+    if warm:
+        probe.close()
+    print(f"{'command':18s} {'local ms':>10s} {'daemon ms':>10s}")
+    for name in names:
+        local = best(["--local", name])
+        daemon_ms = best([name]) if warm and COMMANDS[name][1] else None
+        cells = [
+            f"{t:10.0f}" if t is not None else f"{'-':>10s}" for t in (local, daemon_ms)
+        ]
+        print(f"{name:18s} " + " ".join(cells))
+    if not warm:
+        print("(start the daemon with `cameratrap daemon start` to compare)")
+
+
+# -----------------------------
+# CLI Entry Point
+# -----------------------------
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="cameratrap",
+        description="Camera-trap pipeline commands. Run `cameratrap <command> --help` "
+        "for a command's own options.",
+        epilog="commands:\n"
+        + "\n".join(f"  {name:18s}{info[2]}" for name, info in COMMANDS.items())
+        + "\n  daemon            start | stop | status | serve the warm worker"
+        + "\n  startup           measure command startup time",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--local", action="store_true", help="Run here even if a daemon is running."
+    )
+    parser.add_argument(
+        "--timings", action="store_true", help="Print startup and run time to stderr."
+    )
+    parser.add_argument(
+        "command", choices=[*COMMANDS, "daemon", "startup"], metavar="command"
+    )
+    parser.add_argument("args", nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+
+    if args.command == "daemon":
+        action = argparse.ArgumentParser(prog="cameratrap daemon")
+        action.add_argument("action", choices=["start", "stop", "status", "serve"])
+        return daemon(action.parse_args(args.args).action)
+    if args.command == "startup":
+        startup = argparse.ArgumentParser(prog="cameratrap startup")
+        startup.add_argument("commands", nargs="*", default=list(COMMANDS))
+        startup.add_argument("--repeat", type=int, default=3)
+        startup_args = startup.parse_args(args.args)
+        measure_startup(startup_args.commands, startup_args.repeat)
+        return 0
+
+    ready = time.perf_counter()
+    code = None
+    where = "local"
+    if not args.local and COMMANDS[args.command][1]:
+        code = run_in_daemon(args.command, args.args)
+        where = "daemon"
+    if code is None:
+        where = "local"
+        sys.path.insert(0, str(REPO_DIR))
+        code = run_script(args.command, args.args)
+    if args.timings:
+        print(
+            f"⏱️ {args.command} ({where}): ready in {(ready - STARTED) * 1000:.0f} ms, "
+            f"ran in {(time.perf_counter() - ready) * 1000:.0f} ms",
+            file=sys.stderr,
+        )
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+import argparse
+import json
+import os
+import random
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from crawler import get_crawler
+from speciesnet_results import load_predictions
+from taxonomy import taxon_key
+
+# -----------------------------
+# Configurable Parameters
+# -----------------------------
+
+FRAMES_DIR = "Frames"
+IMAGE_EXTS = (".jpg", ".jpeg", ".png")
+REPORT_PATH = Path("evaluation") / "backends.json"
+COUNTRY, ADMIN1_REGION = "USA", "CO"
+DETECTION_THRESHOLD = 0.2  # "animal present" decision compared between backends
+BACKENDS = {
+    "speciesnet": ["python", "-m", "speciesnet.scripts.run_model"],
+    "onnx_fp32": ["python", "speciesnet_onnx.py", "run", "--precision", "fp32"],
+    "onnx_int8": ["python", "speciesnet_onnx.py", "run", "--precision", "int8"],
+}
+REFERENCE = "speciesnet"
+
+
+def labelled_subset(frames_dir=FRAMES_DIR, per_label=10, seed=0):
+    """Up to per_label frames for every species named by a folder, sampled evenly."""
+    by_label = {}
+    crawler = get_crawler()
+    for folder in crawler.find_dirs_with_files(frames_dir, IMAGE_EXTS):
+        label = taxon_key(os.path.basename(folder))
+        if label is None:
+            continue
+        files = crawler.list_files(folder, IMAGE_EXTS)
+        by_label.setdefault(label, []).extend(os.path.join(folder, f) for f in files)
+    rng = random.Random(seed)
+    subset = {}
+    for label, paths in sorted(by_label.items()):
+        for path in rng.sample(sorted(paths), min(per_label, len(paths))):
+            subset[path] = label
+    return subset
+
+
+def run_backend(name, filepaths_txt, out_dir, tag=""):
+    """Run one backend in a fresh process; returns (predictions, wall seconds)."""
+    output = os.path.join(out_dir, f"{name}{tag}.json")
+    cmd = BACKENDS[name] + [
+        "--filepaths_txt",
+        filepaths_txt,
+        "--predictions_json",
+        output,
+        "--country",
+        COUNTRY,
+        "--admin1_region",
+        ADMIN1_REGION,
+    ]
+    print(f'Running: {" ".join(cmd)}')
+    start = time.perf_counter()
+    subprocess.run(cmd, check=True)
+    return load_predictions(output), time.perf_counter() - start
+
+
+def time_backend(name, filepaths_txt, out_dir):
+    """
+    Run a backend on the first image, then on all of them. The one-image run
+    measures process start-up and model loading, which are subtracted so
+    images/s compares inference alone. Returns (predictions, seconds,
+    load seconds).
+    """
+    warmup_txt = os.path.join(out_dir, "warmup.txt")
+    with open(filepaths_txt, "r") as src, open(warmup_txt, "w") as f:
+        f.write(src.readline())
+    _, load_seconds = run_backend(name, warmup_txt, out_dir, tag="_warmup")
+    records, seconds = run_backend(name, filepaths_txt, out_dir)
+    return records, seconds, load_seconds
+
+
+def _top_box(record):
+    dets = [d for d in record["detections"] if d["conf"] >= DETECTION_THRESHOLD]
+    return max(dets, key=lambda d: d["conf"])["bbox"] if dets else None
+
+
+def _iou(a, b):
+    ax1, ay1, bx1, by1 = a[0] + a[2], a[1] + a[3], b[0] + b[2], b[1] + b[3]
+    iw = max(0.0, min(ax1, bx1) - max(a[0], b[0]))
+    ih = max(0.0, min(ay1, by1) - max(a[1], b[1]))
+    inter = iw * ih
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union > 0 else 0.0
+
+
+def compare(records, reference, labels):
+    """Accuracy against folder labels and agreement with the reference backend."""
+    paths = [p for p in labels if p in records]
+    correct = sum(
+        taxon_key(records[p]["species"], records[p]["species"]) == labels[p]
+        for p in paths
+    )
+    stats = {
+        "images": len(paths),
+        "accuracy": round(correct / len(paths), 4) if paths else None,
+    }
+    shared = [p for p in paths if p in reference]
+    if shared:
+        same = sum(records[p]["species"] == reference[p]["species"] for p in shared)
+        score_diff = [
+            abs((records[p]["score"] or 0) - (reference[p]["score"] or 0))
+            for p in shared
+        ]
+        boxes = [(_top_box(records[p]), _top_box(reference[p])) for p in shared]
+        present = sum((a is None) == (b is None) for a, b in boxes)
+        ious = [_iou(a, b) for a, b in boxes if a and b]
+        stats.update(
+            {
+                "species_agreement": round(same / len(shared), 4),
+                "mean_score_diff": round(sum(score_diff) / len(shared), 4),
+                "detection_agreement": round(present / len(shared), 4),
+                "mean_top_box_iou": round(sum(ious) / len(ious), 4) if ious else None,
+            }
+        )
+    return stats
+
+
+def print_report(report):
+    print(
+        f"{'backend':12s} {'load s':>7s} {'img/s':>8s} {'speedup':>8s} {'accuracy':>9s} "
+        f"{'agree':>7s} {'det agree':>10s} {'box IoU':>8s}"
+    )
+    for name, row in report["backends"].items():
+        cells = [
+            f"{row['load_seconds']:7.1f}",
+            f"{row['images_per_second']:8.2f}",
+            f"{row['speedup']:8.2f}" if row.get("speedup") else f"{'-':>8s}",
+        ]
+        for key, width in [
+            ("accuracy", 9),
+            ("species_agreement", 7),
+            ("detection_agreement", 10),
+            ("mean_top_box_iou", 8),
+        ]:
+            value = row.get(key)
+            cells.append(
+                f"{value:{width}.3f}" if value is not None else f"{'-':>{width}s}"
+            )
+        print(f"{name:12s} " + " ".join(cells))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Accuracy vs speed of SpeciesNet backends on folder-labelled frames."
+    )
+    parser.add_argument("--frames_dir", type=str, default=FRAMES_DIR)
+    parser.add_argument("--per_label", type=int, default=10, help="Frames per species")
+    parser.add_argument(
+        "--backends", nargs="*", default=list(BACKENDS), choices=list(BACKENDS)
+    )
+    parser.add_argument("--output", type=str, default=str(REPORT_PATH))
+    args = parser.parse_args()
+
+    labels = labelled_subset(args.frames_dir, args.per_label)
+    if not labels:
+        print("❌ No frames in folders named after a species.")
+        raise SystemExit(1)
+    print(f"🔢 {len(labels)} frames across {len(set(labels.values()))} species")
+    out_dir = tempfile.mkdtemp(prefix="backends_")
+    filepaths_txt = os.path.join(out_dir, "filepaths.txt")
+    with open(filepaths_txt, "w") as f:
+        f.write("\n".join(labels) + "\n")
+
+    results = {
+        name: time_backend(name, filepaths_txt, out_dir) for name in args.backends
+    }
+    reference = results.get(REFERENCE, (None, None, None))
+    report = {"images": len(labels), "backends": {}}
+    for name, (records, seconds, load_seconds) in results.items():
+        # The warm-up image is inside load_seconds; count the rest
+        inference = max(seconds - load_seconds, 1e-6)
+        row = {
+            "seconds": round(seconds, 2),
+            "load_seconds": round(load_seconds, 2),
+            "images_per_second": max(len(labels) - 1, 1) / inference,
+        }
+        if reference[1]:
+            ref_inference = max(reference[1] - reference[2], 1e-6)
+            row["speedup"] = ref_inference / inference
+        row.update(
+            compare(
+                records,
+                reference[0] if name != REFERENCE and reference[0] else {},
+                labels,
+            )
+        )
+        report["backends"][name] = row
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=1)
+    print_report(report)
+    print(f"✅ Report written to {args.output}")
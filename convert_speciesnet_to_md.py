@@ -1,23 +1,42 @@
 import os
 import subprocess
+import argparse
 
 # Parameters
 results_dir = "results"
 md_results_dir = "results_md"
-os.makedirs(md_results_dir, exist_ok=True)
 
-# List all results files in results_dir
-results_files = [f for f in os.listdir(results_dir) if f.endswith(".json")]
 
-for results_file in results_files:
-    input_path = os.path.join(results_dir, results_file)
-    output_path = os.path.join(md_results_dir, f"md_{results_file}")
-    cmd = [
-        "python",
-        "-m",
-        "speciesnet.scripts.speciesnet_to_md",
-        input_path,
-        output_path,
-    ]
-    print(f'Running: {" ".join(cmd)}')
-    subprocess.run(cmd, check=True)
+def main(results_file=None):
+    """Convert SpeciesNet results in results/ to MegaDetector format in results_md/."""
+    os.makedirs(md_results_dir, exist_ok=True)
+    # List all results files in results_dir
+    if results_file:
+        results_files = [os.path.basename(results_file)]
+    else:
+        results_files = [f for f in os.listdir(results_dir) if f.endswith(".json")]
+
+    for results_file in results_files:
+        input_path = os.path.join(results_dir, results_file)
+        output_path = os.path.join(md_results_dir, f"md_{results_file}")
+        cmd = [
+            "python",
+            "-m",
+            "speciesnet.scripts.speciesnet_to_md",
+            input_path,
+            output_path,
+        ]
+        print(f'Running: {" ".join(cmd)}')
+        subprocess.run(cmd, check=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--results_file",
+        type=str,
+        default=None,
+        help="Convert only this file from results/ (default: all)",
+    )
+    args = parser.parse_args()
+    main(args.results_file)
@@ -0,0 +1,157 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# -----------------------------
+# Configurable Parameters
+# -----------------------------
+
+MANIFEST_PATH = Path(".crawl_manifest.json")
+MANIFEST_VERSION = 3  # 2: symlinked directories are no longer listed, 3: scanned_ns
+# Coarsest directory mtime granularity expected (FAT/exFAT: 2 s)
+MTIME_RESOLUTION_NS = 2_000_000_000
+CRAWL_WORKERS = 8
+
+
+class Crawler:
+    """
+    Directory lister shared by the pipeline scripts.
+    Listings come from os.scandir (file/dir type from the cached DirEntry, so
+    no per-entry stat) and are kept in memory and in an on-disk manifest.
+    A manifest entry is reused while the directory's mtime is unchanged, so
+    an unchanged subtree costs one stat per directory instead of a re-list.
+    Listings taken within MTIME_RESOLUTION_NS of the directory's mtime are
+    not trusted, since a later change could leave the same coarse mtime.
+    """
+
+    def __init__(self, manifest_path=MANIFEST_PATH, workers=CRAWL_WORKERS):
+        self.manifest_path = Path(manifest_path) if manifest_path else None
+        self.workers = workers
+        self.listings = {}
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._load_manifest()
+
+    def _load_manifest(self):
+        if not self.manifest_path or not self.manifest_path.exists():
+            return
+        try:
+            with open(self.manifest_path, "r") as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        if manifest.get("version") == MANIFEST_VERSION:
+            self.listings = manifest.get("dirs", {})
+
+    def save_manifest(self):
+        """Write the manifest if any listing changed since it was loaded."""
+        if not self.manifest_path or not self.dirty:
+            return
+        # A unique temp file: pipeline stages in parallel processes save too
+        with self.lock:
+            manifest = {"version": MANIFEST_VERSION, "dirs": self.listings}
+            with tempfile.NamedTemporaryFile(
+                "w",
+                dir=self.manifest_path.parent,
+                prefix=self.manifest_path.name,
+                suffix=".tmp",
+                delete=False,
+            ) as f:
+                json.dump(manifest, f)
+            self.dirty = False
+        os.replace(f.name, self.manifest_path)
+
+    def listdir(self, path):
+        """Return {"files": [...], "dirs": [...]} for path, sorted by name."""
+        key = os.path.abspath(path)
+        scanned_ns = time.time_ns()
+        mtime_ns = os.stat(key).st_mtime_ns
+        listing = self.listings.get(key)
+        if (
+            listing is not None
+            and listing["mtime_ns"] == mtime_ns
+            and listing["scanned_ns"] - mtime_ns > MTIME_RESOLUTION_NS
+        ):
+            self.hits += 1
+            return listing
+        self.misses += 1
+        files, dirs = [], []
+        with os.scandir(key) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(entry.name)
+                elif entry.is_file():
+                    files.append(entry.name)
+        listing = {
+            "mtime_ns": mtime_ns,
+            "scanned_ns": scanned_ns,
+            "files": sorted(files),
+            "dirs": sorted(dirs),
+        }
+        with self.lock:
+            self.listings[key] = listing
+            self.dirty = True
+        return listing
+
+    def list_files(self, path, exts=None):
+        """File names in path, optionally filtered by lower-case extension."""
+        files = self.listdir(path)["files"]
+        if exts is None:
+            return files
+        exts = tuple(exts)
+        return [f for f in files if f.lower().endswith(exts)]
+
+    def list_dirs(self, path):
+        return self.listdir(path)["dirs"]
+
+    def walk(self, root):
+        """
+        Like os.walk(root) (top-down, no symlink following), but each level of
+        the tree is listed in parallel. Yields (dirpath, dirnames, filenames).
+        """
+        root = str(root).rstrip(os.sep) or os.sep
+        if not os.path.isdir(root):
+            return
+        level = [root]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while level:
+                listings = list(pool.map(self.listdir, level))
+                next_level = []
+                for dirpath, listing in zip(level, listings):
+                    yield dirpath, list(listing["dirs"]), list(listing["files"])
+                    next_level.extend(os.path.join(dirpath, d) for d in listing["dirs"])
+                level = next_level
+
+    def iter_files(self, root, exts=None):
+        """Yield paths of all files under root, optionally filtered by extension."""
+        exts = tuple(exts) if exts is not None else None
+        for dirpath, _, filenames in self.walk(root):
+            for name in filenames:
+                if exts is None or name.lower().endswith(exts):
+                    yield os.path.join(dirpath, name)
+
+    def find_dirs_with_files(self, root, exts):
+        """Sorted directories under root that directly contain matching files."""
+        exts = tuple(exts)
+        return sorted(
+            dirpath
+            for dirpath, _, filenames in self.walk(root)
+            if any(f.lower().endswith(exts) for f in filenames)
+        )
+
+
+_default_crawler = None
+
+
+def get_crawler():
+    """The process-wide crawler backed by the default manifest."""
+    global _default_crawler
+    if _default_crawler is None:
+        _default_crawler = Crawler()
+    return _default_crawler
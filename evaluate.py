@@ -0,0 +1,229 @@
+import argparse
+import json
+import os
+from pathlib import Path
+
+from crawler import get_crawler
+from speciesnet_results import PREVIEW_BATCH_DIR, sequence_csv_path
+from taxonomy import BLANK, taxon_key
+
+# -----------------------------
+# Configurable Parameters
+# -----------------------------
+
+LVLM_DIR = "lvlm"
+REPORT_PATH = Path("evaluation") / "report.json"
+# (prediction, reference) pairs compared for every sequence
+PAIRS = [("speciesnet", "file"), ("gpt", "file"), ("gpt", "speciesnet")]
+
+
+# -----------------------------
+# Loading
+# -----------------------------
+
+
+def _gpt_label(analysis):
+    """Most frequent species among the individuals; blank when there are none."""
+    species = [ind.get("species", "") for ind in analysis.get("individuals") or []]
+    if not species or not analysis.get("count"):
+        return BLANK
+    return max(set(species), key=species.count)
+
+
+def load_month(month):
+    """One row per sequence: folder, SpeciesNet label/count and GPT label/count."""
+    import pandas as pd
+
+    csv_path = sequence_csv_path(month)
+    sequences = pd.DataFrame(columns=["folder", "speciesnet", "speciesnet_count"])
+    if csv_path.exists():
+        csv_df = pd.read_csv(
+            csv_path, usecols=["file_name", "species", "max_count"], dtype=str
+        )
+        sequences = pd.DataFrame(
+            {
+                "folder": csv_df["file_name"].str.rsplit("/", n=1).str[0],
+                "speciesnet": csv_df["species"],
+                "speciesnet_count": pd.to_numeric(csv_df["max_count"], errors="coerce"),
+            }
+        ).drop_duplicates("folder")
+    records = []
+    json_path = os.path.join(LVLM_DIR, f"{month}.json")
+    if os.path.exists(json_path):
+        with open(json_path, "r") as f:
+            for entry in json.load(f):
+                gate = entry.get("metadata", {}).get("gate") or {}
+                if gate.get("decision") == "skip":
+                    # Synthesised from SpeciesNet, so not an independent opinion
+                    continue
+                records.append(
+                    {
+                        "folder": Path(entry["folder"]).as_posix(),
+                        "gpt": _gpt_label(entry["analysis"]),
+                        "gpt_count": entry["analysis"].get("count"),
+                    }
+                )
+    gpt = pd.DataFrame(records, columns=["folder", "gpt", "gpt_count"])
+    df = sequences.merge(gpt, on="folder", how="outer")
+    df["month"] = month
+    return df
+
+
+def load_archive(months=None):
+    import pandas as pd
+
+    if months is None:
+        months = sorted(
+            d.removeprefix("predictions_").removesuffix("_smoothed")
+            for d in get_crawler().list_dirs(PREVIEW_BATCH_DIR)
+            if d.endswith("_smoothed")
+        )
+    frames = [load_month(month) for month in months]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def normalise(df, coarse=False):
+    """Add file/speciesnet/gpt taxonomy key columns, mapping each distinct label once."""
+    df = df.copy()
+    sources = {
+        "file": df["folder"].str.rsplit("/", n=1).str[-1],
+        "speciesnet": df["speciesnet"],
+        "gpt": df["gpt"],
+    }
+    for name, labels in sources.items():
+        # Unlabelled folders have no reference; other unmatched labels keep their text
+        mapping = {
+            label: taxon_key(
+                label, None if name == "file" else label.strip().lower(), coarse
+            )
+            for label in labels.dropna().unique()
+        }
+        df[f"{name}_key"] = labels.map(mapping)
+    return df
+
+
+# -----------------------------
+# Metrics
+# -----------------------------
+
+
+def confusion(reference, prediction):
+    """Confusion matrix as (labels, counts[reference, prediction])."""
+    import numpy as np
+
+    labels = np.union1d(reference.unique(), prediction.unique())
+    ref_idx = np.searchsorted(labels, reference.to_numpy())
+    pred_idx = np.searchsorted(labels, prediction.to_numpy())
+    counts = np.zeros((len(labels), len(labels)), dtype=np.int64)
+    np.add.at(counts, (ref_idx, pred_idx), 1)
+    return labels, counts
+
+
+def label_agreement(df, pred, ref):
+    import numpy as np
+
+    both = df[f"{pred}_key"].notna() & df[f"{ref}_key"].notna()
+    reference = df.loc[both, f"{ref}_key"]
+    prediction = df.loc[both, f"{pred}_key"]
+    if reference.empty:
+        return {"n": 0}
+    labels, counts = confusion(reference, prediction)
+    tp = np.diag(counts)
+    predicted = counts.sum(axis=0)
+    support = counts.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(predicted > 0, tp / predicted, np.nan)
+        recall = np.where(support > 0, tp / support, np.nan)
+    per_species = {
+        str(label): {
+            "precision": None if np.isnan(p) else round(float(p), 4),
+            "recall": None if np.isnan(r) else round(float(r), 4),
+            "support": int(s),
+        }
+        for label, p, r, s in zip(labels, precision, recall, support)
+    }
+    return {
+        "n": int(counts.sum()),
+        "accuracy": round(float(tp.sum() / counts.sum()), 4),
+        "per_species": per_species,
+        "confusion": {"labels": labels.tolist(), "matrix": counts.tolist()},
+    }
+
+
+def count_agreement(df):
+    import numpy as np
+
+    both = df["speciesnet_count"].notna() & df["gpt_count"].notna()
+    a = df.loc[both, "speciesnet_count"].to_numpy(dtype=float)
+    b = df.loc[both, "gpt_count"].to_numpy(dtype=float)
+    if not len(a):
+        return {"n": 0}
+    diff = b - a
+    stats = {
+        "n": int(len(a)),
+        "exact": round(float(np.mean(diff == 0)), 4),
+        "within_1": round(float(np.mean(np.abs(diff) <= 1)), 4),
+        "mean_abs_diff": round(float(np.mean(np.abs(diff))), 4),
+        "gpt_minus_speciesnet": round(float(np.mean(diff)), 4),
+    }
+    if len(a) > 1 and a.std() > 0 and b.std() > 0:
+        stats["pearson_r"] = round(float(np.corrcoef(a, b)[0, 1]), 4)
+    return stats
+
+
+def evaluate(df):
+    """Agreement for every pair plus count statistics, overall and per month."""
+
+    def section(part):
+        return {
+            "sequences": int(len(part)),
+            **{f"{p}_vs_{r}": label_agreement(part, p, r) for p, r in PAIRS},
+            "counts": count_agreement(part),
+        }
+
+    return {
+        "overall": section(df),
+        "months": {month: section(part) for month, part in df.groupby("month")},
+    }
+
+
+def print_report(report):
+    header = f"{'month':10s} {'seqs':>6s}"
+    for p, r in PAIRS:
+        header += f" {p + '/' + r:>18s}"
+    print(header + f" {'count exact':>12s}")
+    rows = list(report["months"].items()) + [("overall", report["overall"])]
+    for month, section in rows:
+        line = f"{month:10s} {section['sequences']:6d}"
+        for p, r in PAIRS:
+            pair = section[f"{p}_vs_{r}"]
+            cell = f"{pair['accuracy']:.3f} (n={pair['n']})" if pair["n"] else "-"
+            line += f" {cell:>18s}"
+        counts = section["counts"]
+        line += f" {counts['exact'] if counts['n'] else '-':>12}"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Filename vs SpeciesNet vs GPT agreement across all months."
+    )
+    parser.add_argument(
+        "--months", nargs="*", default=None, help="Months to include (default: all)"
+    )
+    parser.add_argument(
+        "--coarse", action="store_true", help="Compare all bird species as 'bird'"
+    )
+    parser.add_argument("--output", type=str, default=str(REPORT_PATH))
+    args = parser.parse_args()
+    df = load_archive(args.months)
+    if df.empty:
+        print("❌ No sequence CSVs or LVLM results found.")
+        raise SystemExit(1)
+    df = normalise(df, coarse=args.coarse)
+    report = evaluate(df)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, separators=(",", ":"))
+    print_report(report)
+    print(f"✅ Report for {len(df)} sequences written to {args.output}")
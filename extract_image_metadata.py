@@ -1,62 +1,96 @@
-import os
-from tqdm import tqdm
-import pandas as pd
-from PIL import Image
+from concurrent.futures import ThreadPoolExecutor
 import re
+from crawler import get_crawler
+
+OCR_WORKERS = 8
+EXIF_IFD = 0x8769
 
 
 def find_images(root_dir, exts={".jpg", ".jpeg", ".png", ".tiff", ".bmp", ".gif"}):
-    for dirpath, _, filenames in os.walk(root_dir):
-        for fname in filenames:
-            if any(fname.lower().endswith(ext) for ext in exts):
-                yield os.path.join(dirpath, fname)
+    yield from get_crawler().iter_files(root_dir, exts)
 
 
 def extract_datetime_and_temp(image_path):
+    from PIL import Image
+
+    with Image.open(image_path) as img:
+        return exif_datetime_and_temp(img)
+
+
+def exif_datetime_and_temp(img):
     date_time = None
     temperature = None
-    with Image.open(image_path) as img:
-        exif = img._getexif()
-        from PIL.ExifTags import TAGS
-
-        meta = {TAGS.get(k, k): v for k, v in exif.items()}
-        print(meta)
-        exit()
-        # DateTimeOriginal
-        date_time = meta.get("DateTimeOriginal")
-        # Print MakerNote type and length if present
-        if "MakerNote" in meta:
-            maker = meta["MakerNote"]
-            if isinstance(maker, (bytes, bytearray)):
-                decoded = maker.decode("ascii", errors="ignore")
-            else:
-                decoded = str(maker)
-            m = re.search(r"temp[^:]*:?\s*([\-0-9.]+[CF])", decoded, re.IGNORECASE)
-            if m:
-                temperature = m.group(1)
+    # Public getexif() works for every format (BMP and GIF have no _getexif);
+    # DateTimeOriginal and MakerNote sit in its Exif sub-IFD
+    exif = img.getexif()
+    from PIL.ExifTags import TAGS
+
+    tags = {**exif, **exif.get_ifd(EXIF_IFD)}
+    meta = {TAGS.get(k, k): v for k, v in tags.items()}
+    # DateTimeOriginal
+    date_time = meta.get("DateTimeOriginal")
+    # Print MakerNote type and length if present
+    if "MakerNote" in meta:
+        maker = meta["MakerNote"]
+        if isinstance(maker, (bytes, bytearray)):
+            decoded = maker.decode("ascii", errors="ignore")
+        else:
+            decoded = str(maker)
+        m = re.search(r"temp[^:]*:?\s*([\-0-9.]+[CF])", decoded, re.IGNORECASE)
+        if m:
+            temperature = m.group(1)
 
     return date_time, temperature
 
 
-def main():
-    image_dir = "cameradata"
-    output_csv = "image_metadata.csv"
+def extract_metadata(img_path):
+    from PIL import Image
+
+    from overlay_ocr import read_overlay_image
+
+    # One open serves both the EXIF fields and the overlay strip
+    with Image.open(img_path) as img:
+        dt, temp = exif_datetime_and_temp(img)
+        overlay = read_overlay_image(img)
+    return {
+        "file_path": img_path,
+        "DateTimeOriginal": dt,
+        # The overlay reading wins over the MakerNote guess when both exist
+        "Temperature": overlay["temperature"] or temp,
+        "OverlayDate": overlay["date"],
+        "OverlayTime": overlay["time"],
+        "OverlayText": overlay["text"],
+    }
+
+
+def main(image_dir="cameradata", output_csv="image_metadata.csv"):
+    import pandas as pd
+    from tqdm import tqdm
+
     images = list(find_images(image_dir))
-    metadata_list = []
+    get_crawler().save_manifest()
 
-    for img_path in tqdm(images):
-        dt, temp = extract_datetime_and_temp(img_path)
-        metadata_list.append(
-            {"file_path": img_path, "DateTimeOriginal": dt, "Temperature": temp}
+    # JPEG decoding releases the GIL, so threads scale across cores
+    with ThreadPoolExecutor(max_workers=OCR_WORKERS) as pool:
+        metadata_list = list(
+            tqdm(pool.map(extract_metadata, images), total=len(images))
         )
 
     df = pd.DataFrame(metadata_list)
     df = df.sort_values("file_path")
     df.to_csv(output_csv, index=False)
     print(
-        f"Extracted DateTimeOriginal and Temperature for {len(images)} images to {output_csv}"
+        f"Extracted DateTimeOriginal, Temperature and overlay text for {len(images)} images to {output_csv}"
     )
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Extract EXIF time and overlay date, time and temperature to a CSV."
+    )
+    parser.add_argument("--image_dir", type=str, default="cameradata")
+    parser.add_argument("--output_csv", type=str, default="image_metadata.csv")
+    args = parser.parse_args()
+    main(args.image_dir, args.output_csv)
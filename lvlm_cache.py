@@ -0,0 +1,134 @@
+import csv
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from burst_cull import store_loader
+from lvlm_gate import month_evidence
+from taxonomy import UNKNOWN, taxon_key
+
+# -----------------------------
+# Configurable Parameters
+# -----------------------------
+
+CACHE_PATH = Path("lvlm") / "sequence_cache.json"
+REVIEW_PATH = Path("lvlm") / "reused.csv"
+HASH_W, HASH_H = 9, 8  # difference hash: 8x8 = 64 bits per frame
+LOAD_SIZE = (64, 48)  # grayscale frame the hash is computed from
+# Vertical band hashed; the burnt-in info bars above and below change every sequence
+HASH_BAND = (0.08, 0.92)
+# Mean per-frame Hamming distance (bits of 64) under which sequences are duplicates
+MAX_DISTANCE = 5.0
+REUSE_NOTE = "[REUSED]"
+
+
+def frame_hash(path):
+    """64-bit difference hash of a frame, ignoring the overlay bars."""
+    gray = store_loader(path, LOAD_SIZE)
+    top, bottom = (round(f * LOAD_SIZE[1]) for f in HASH_BAND)
+    band = Image.fromarray(gray[top:bottom].astype(np.uint8))
+    small = np.asarray(band.resize((HASH_W, HASH_H), Image.Resampling.BILINEAR))
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int("".join("1" if b else "0" for b in bits), 2)
+
+
+def fingerprint(images):
+    """Per-sequence fingerprint: the hashes of its sampled frames."""
+    return [frame_hash(path) for path in images]
+
+
+def distance(a, b):
+    """
+    Symmetric mean nearest-frame Hamming distance between two fingerprints,
+    so sequences sampled at different frame counts still compare.
+    """
+
+    def one_way(xs, ys):
+        return sum(min(bin(x ^ y).count("1") for y in ys) for x in xs) / len(xs)
+
+    return max(one_way(a, b), one_way(b, a))
+
+
+def speciesnet_key(folder):
+    """Taxonomy key of SpeciesNet's sequence label, or None without a CSV row."""
+    rows, _ = month_evidence(Path(folder).parts[1])
+    row = rows.get(Path(folder).as_posix())
+    if row is None:
+        return None
+    return taxon_key(row.get("species", "").strip().lower() or "blank", UNKNOWN)
+
+
+class SequenceCache:
+    """
+    On-disk index of {folder: {"hashes", "speciesnet", "analysis"}} for
+    sequences the LVLM has analysed. lookup() finds the nearest earlier
+    sequence within max_distance whose SpeciesNet label agrees.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_distance=MAX_DISTANCE):
+        self.path = Path(path)
+        self.max_distance = max_distance
+        self.entries = {}
+        if self.path.exists():
+            with open(self.path, "r") as f:
+                self.entries = json.load(f)
+        self.reused = []
+
+    def lookup(self, folder, hashes):
+        """(source folder, entry, distance) of the closest match, or None."""
+        if not hashes:
+            return None
+        key = speciesnet_key(folder)
+        best = None
+        for source, entry in self.entries.items():
+            if source == folder or entry["speciesnet"] != key:
+                continue
+            d = distance(hashes, [int(h, 16) for h in entry["hashes"]])
+            if d <= self.max_distance and (best is None or d < best[2]):
+                best = (source, entry, d)
+        return best
+
+    def add(self, folder, hashes, analysis):
+        self.entries[folder] = {
+            "hashes": [f"{h:016x}" for h in hashes],
+            "speciesnet": speciesnet_key(folder),
+            "analysis": analysis,
+        }
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.path)
+
+    def write_review(self, path=REVIEW_PATH):
+        """CSV of this run's reused entries, for a human to spot-check."""
+        if not self.reused:
+            return None
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(self.reused[0]))
+            writer.writeheader()
+            writer.writerows(self.reused)
+        return path
+
+
+def adapt_analysis(analysis, source, overlay=None, taken=None):
+    """
+    Copy of a cached analysis for a new folder: date, time and temperature
+    come from this folder (overlay OCR, else EXIF time) and the summary
+    says where it was reused from.
+    """
+    adapted = json.loads(json.dumps(analysis))
+    adapted.update({"date": "unknown", "time": "unknown", "temperature": "unknown"})
+    if taken:
+        date, _, time = str(taken).partition(" ")
+        adapted["date"], adapted["time"] = date.replace(":", "-"), time or "unknown"
+    if overlay:
+        adapted.update(overlay)
+    summary = str(analysis.get("summary", ""))
+    adapted["summary"] = f"{REUSE_NOTE} Same scene as {source}. {summary}".strip()
+    return adapted
@@ -0,0 +1,250 @@
+from lvlm_schema import ACTIVITY_VALUES
+
+# -----------------------------
+# Code Tables
+# -----------------------------
+
+# Species seen (or plausible) near Bailey / Evergreen, Colorado
+SPECIES_CODES = {
+    "ELK": "Cervus canadensis (elk)",
+    "MUDE": "Odocoileus hemionus (mule deer)",
+    "WTDE": "Odocoileus virginianus (white-tailed deer)",
+    "MOOS": "Alces alces (moose)",
+    "BLBE": "Ursus americanus (black bear)",
+    "PUMA": "Puma concolor (mountain lion)",
+    "BOBC": "Lynx rufus (bobcat)",
+    "COYO": "Canis latrans (coyote)",
+    "RFOX": "Vulpes vulpes (red fox)",
+    "GFOX": "Urocyon cinereoargenteus (gray fox)",
+    "RACC": "Procyon lotor (raccoon)",
+    "SKUN": "Mephitis mephitis (striped skunk)",
+    "PORC": "Erethizon dorsatum (porcupine)",
+    "BADG": "Taxidea taxus (American badger)",
+    "MART": "Martes americana (American marten)",
+    "MINK": "Neogale vison (American mink)",
+    "WEAS": "Neogale frenata (long-tailed weasel)",
+    "BEAV": "Castor canadensis (beaver)",
+    "MUSK": "Ondatra zibethicus (muskrat)",
+    "SNHA": "Lepus americanus (snowshoe hare)",
+    "COTT": "Sylvilagus sp. (cottontail)",
+    "ABSQ": "Sciurus aberti (Abert's squirrel)",
+    "RSQU": "Tamiasciurus hudsonicus (red squirrel)",
+    "CHIP": "Neotamias sp. (chipmunk)",
+    "TURK": "Meleagris gallopavo (wild turkey)",
+    "GHOW": "Bubo virginianus (great horned owl)",
+    "GBHE": "Ardea herodias (great blue heron)",
+    "MALL": "Anas platyrhynchos (mallard)",
+    "CORA": "Corvus corax (common raven)",
+    "AMCR": "Corvus brachyrhynchos (American crow)",
+    "BBMA": "Pica hudsonia (black-billed magpie)",
+    "STJA": "Cyanocitta stelleri (Steller's jay)",
+    "RECR": "Loxia curvirostra (red crossbill)",
+    "CLNU": "Nucifraga columbiana (Clark's nutcracker)",
+    "HAWK": "Accipitridae (hawk)",
+    "BIRD": "Aves (bird, unidentified)",
+    "DOG": "Canis familiaris (domestic dog)",
+    "CAT": "Felis catus (domestic cat)",
+    "HUM": "Homo sapiens (human)",
+    "UNK": "unknown animal",
+}
+SEX_CODES = {"M": "male", "F": "female", "U": "unknown"}
+AGE_CODES = {"B": "baby", "Y": "young", "A": "adult", "O": "old", "U": "unknown"}
+HEALTH_CODES = {
+    "H": "healthy",
+    "T": "thin",
+    "L": "limping",
+    "W": "wounded",
+    "S": "sick",
+    "U": "unknown",
+}
+ACTIVITY_CODES = {
+    "GR": "grazing",
+    "BR": "browsing",
+    "WA": "walking",
+    "RU": "running",
+    "RE": "resting",
+    "AL": "alert",
+    "DR": "drinking",
+    "SO": "social",
+    "FO": "following",
+    "CH": "chasing",
+    "SN": "sniffing",
+    "PL": "playing",
+    "FL": "fleeing",
+    "NU": "nursing",
+    "VO": "vocalizing",
+    "MA": "marking",
+    "UN": "unknown",
+}
+assert set(ACTIVITY_CODES.values()) == set(ACTIVITY_VALUES)
+
+# Output budget for compact answers (the full format allows 2048)
+COMPACT_MAX_TOKENS = 700
+
+
+def _enum(codes):
+    return {"type": "string", "enum": list(codes)}
+
+
+COMPACT_INDIVIDUAL_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "s": _enum(SPECIES_CODES),
+        "x": _enum(SEX_CODES),
+        "a": _enum(AGE_CODES),
+        "h": _enum(HEALTH_CODES),
+        "c": _enum(ACTIVITY_CODES),
+        "i": {"type": "integer", "minimum": 0},
+        "o": {"type": "string"},
+    },
+    "required": ["s", "x", "a", "h", "c", "i", "o"],
+    "additionalProperties": False,
+}
+
+COMPACT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "d": {"type": "string"},
+        "t": {"type": "string"},
+        "hb": {"type": "string"},
+        "tp": {"type": "string"},
+        "w": {"type": "string"},
+        "n": {"type": "integer", "minimum": 0},
+        "ind": {"type": "array", "items": COMPACT_INDIVIDUAL_SCHEMA},
+        "sm": {"type": "string"},
+    },
+    "required": ["d", "t", "hb", "tp", "w", "n", "ind", "sm"],
+    "additionalProperties": False,
+}
+
+
+# -----------------------------
+# Prompt Construction
+# -----------------------------
+
+
+def _code_list(codes):
+    return ", ".join(f"{code}={name}" for code, name in codes.items())
+
+
+# Prompt lines for the overlay keys, dropped when local OCR has read them
+COMPACT_OVERLAY_LINES = ("- d:", "- t:", "- tp:")
+COMPACT_OVERLAY_KEYS = ["d", "t", "tp"]
+
+
+def build_compact_prompt(overlay_known=False):
+    species = ", ".join(
+        f"{code}={name.split('(')[-1].rstrip(')')}"
+        for code, name in SPECIES_CODES.items()
+    )
+    prompt = f"""
+You are a wildlife ecologist analyzing a camera trap image sequence.
+The location is near Bailey or Evergreen, Colorado — use this to inform habitat, species, and behavior.
+
+Identify each distinct animal across the sequence once (animals may pass through sequentially; avoid double-counting unless clearly distinct).
+Answer with one compact JSON object using these keys only:
+- d: date from the image overlay (YYYY-MM-DD) or "?"
+- t: time from the overlay (HH:MM:SS), or "day"/"night"
+- hb: habitat, 1-3 words
+- tp: temperature from the overlay (e.g. 43F) or "?"
+- w: weather, 1-2 words or "?"
+- n: number of distinct animals
+- ind: one entry per animal with
+  s: species code ({species})
+  x: sex ({_code_list(SEX_CODES)})
+  a: age ({_code_list(AGE_CODES)})
+  h: health ({_code_list(HEALTH_CODES)})
+  c: activity ({_code_list(ACTIVITY_CODES)})
+  i: index (1-based, within this list) of the animal it interacts with, or 0 for none
+  o: notes, at most 8 words, or ""
+- sm: summary for a field biologist, at most 40 words.
+""".strip()
+    if overlay_known:
+        prompt = "\n".join(
+            line
+            for line in prompt.splitlines()
+            if not line.startswith(COMPACT_OVERLAY_LINES)
+        )
+    return prompt
+
+
+# -----------------------------
+# Local Expansion
+# -----------------------------
+
+
+def coerce_compact(obj):
+    """Fix case and out-of-vocabulary codes in a compact answer, in place."""
+    if not isinstance(obj, dict):
+        return obj
+    individuals = obj.get("ind")
+    obj["ind"] = [ind for ind in individuals or [] if isinstance(ind, dict)]
+    for ind in obj["ind"]:
+        for key, codes, default in [
+            ("s", SPECIES_CODES, "UNK"),
+            ("x", SEX_CODES, "U"),
+            ("a", AGE_CODES, "U"),
+            ("h", HEALTH_CODES, "U"),
+            ("c", ACTIVITY_CODES, "UN"),
+        ]:
+            code = str(ind.get(key, "")).strip().upper()
+            ind[key] = code if code in codes else default
+        if not isinstance(ind.get("i"), int):
+            ind["i"] = 0
+        if not isinstance(ind.get("o"), str):
+            ind["o"] = ""
+    for key in ["d", "t", "hb", "tp", "w", "sm"]:
+        if not isinstance(obj.get(key), str):
+            obj[key] = "?"
+    try:
+        obj["n"] = max(0, int(obj.get("n")))
+    except (TypeError, ValueError):
+        obj["n"] = len(obj["ind"])
+    return obj
+
+
+def _short_name(species_code):
+    name = SPECIES_CODES[species_code]
+    return name.split("(")[-1].rstrip(")").split(",")[0].replace(" ", "_").lower()
+
+
+def expand_compact(obj):
+    """Expand a validated compact answer into the full analysis structure."""
+
+    def text(value):
+        return "unknown" if value in ("", "?") else value
+
+    ids = []
+    seen = {}
+    for ind in obj["ind"]:
+        name = _short_name(ind["s"])
+        seen[name] = seen.get(name, 0) + 1
+        ids.append(f"{name}_{seen[name]}")
+    individuals = []
+    for k, ind in enumerate(obj["ind"]):
+        partner = ind["i"]
+        interaction = "none"
+        if 1 <= partner <= len(ids) and partner != k + 1:
+            interaction = f"near {ids[partner - 1]}"
+        individuals.append(
+            {
+                "id": ids[k],
+                "species": SPECIES_CODES[ind["s"]],
+                "sex": SEX_CODES[ind["x"]],
+                "approx_age": AGE_CODES[ind["a"]],
+                "health": HEALTH_CODES[ind["h"]],
+                "activity": ACTIVITY_CODES[ind["c"]],
+                "interaction": interaction,
+                "notes": ind["o"],
+            }
+        )
+    return {
+        "date": text(obj.get("d", "?")),
+        "time": text(obj.get("t", "?")),
+        "habitat": text(obj["hb"]),
+        "temperature": text(obj.get("tp", "?")),
+        "weather": text(obj["w"]),
+        "count": obj["n"],
+        "individuals": individuals,
+        "summary": obj["sm"],
+    }
@@ -0,0 +1,108 @@
+import io
+from pathlib import Path
+
+from PIL import Image
+
+from lvlm_gate import month_evidence
+
+# -----------------------------
+# Configurable Parameters
+# -----------------------------
+
+MIN_DETECTION_CONF = 0.2  # boxes below this are ignored when building the crop
+CROP_PADDING = 0.25  # context added on each side, as a fraction of the box size
+MIN_CROP_FRACTION = (
+    0.15  # crops never get narrower/shorter than this share of the frame
+)
+MAX_CROP_AREA = 0.6  # union boxes covering more of the frame than this aren't cropped
+CROP_MAX_SIDE = 768  # longer side of the crop sent to the model
+CROP_MAX_UPSCALE = 2.0  # small crops are enlarged at most this much
+THUMB_MAX_SIDE = 256  # longer side of the whole-scene thumbnail (sent at detail "low")
+JPEG_QUALITY = 85
+
+CROP_PROMPT_NOTE = (
+    "Images marked 'crop' are zoomed on the detected animals; the 'scene' "
+    "thumbnail shows the whole frame for habitat and weather. Base counts "
+    "on the crops, but only count each animal once.\n\n"
+)
+
+
+def folder_detections(folder):
+    """{frame name: detections} for a Frames/<month>/<sequence> folder."""
+    month = Path(folder).parts[1]
+    _, by_folder = month_evidence(month)
+    frames = by_folder.get(str(Path(folder)), {})
+    return {name: record["detections"] for name, record in frames.items()}
+
+
+def union_box(detections, min_conf=MIN_DETECTION_CONF):
+    """
+    Normalised [x0, y0, x1, y1] around every confident detection, or None.
+    Detector boxes are [x_min, y_min, width, height].
+    """
+    boxes = [
+        d["bbox"] for d in detections or [] if d.get("bbox") and d["conf"] >= min_conf
+    ]
+    if not boxes:
+        return None
+    return [
+        min(b[0] for b in boxes),
+        min(b[1] for b in boxes),
+        max(b[0] + b[2] for b in boxes),
+        max(b[1] + b[3] for b in boxes),
+    ]
+
+
+def pad_box(box, padding=CROP_PADDING, min_fraction=MIN_CROP_FRACTION):
+    """Grow a normalised box by padding (and up to min_fraction), clamped to the frame."""
+    padded = []
+    for lo, hi in ((box[0], box[2]), (box[1], box[3])):
+        size = hi - lo
+        grow = max(size * padding, (min_fraction - size) / 2, 0.0)
+        lo, hi = lo - grow, hi + grow
+        # Shift rather than clip so the crop keeps its size at frame edges
+        if lo < 0:
+            lo, hi = 0.0, min(1.0, hi - lo)
+        if hi > 1:
+            lo, hi = max(0.0, lo - (hi - 1)), 1.0
+        padded.append((lo, hi))
+    (x0, x1), (y0, y1) = padded
+    return [x0, y0, x1, y1]
+
+
+def _jpeg(img):
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=JPEG_QUALITY)
+    return buffer.getvalue()
+
+
+def _fit(img, max_side, max_upscale=1.0):
+    scale = min(max_side / max(img.size), max_upscale)
+    if abs(scale - 1.0) < 0.01:
+        return img
+    size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    return img.resize(size, Image.Resampling.LANCZOS)
+
+
+def crop_image(image_path, detections, with_thumbnail=False):
+    """
+    Crop a frame to its padded detection box.
+    Returns (crop JPEG bytes, thumbnail JPEG bytes or None), or None when the
+    frame has no confident detections or the box covers most of the frame.
+    """
+    box = union_box(detections)
+    if box is None:
+        return None
+    x0, y0, x1, y1 = pad_box(box)
+    if (x1 - x0) * (y1 - y0) > MAX_CROP_AREA:
+        return None
+    with Image.open(image_path) as img:
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        w, h = img.size
+        crop = img.crop((round(x0 * w), round(y0 * h), round(x1 * w), round(y1 * h)))
+        crop = _fit(crop, CROP_MAX_SIDE, CROP_MAX_UPSCALE)
+        thumbnail = None
+        if with_thumbnail:
+            thumbnail = _jpeg(_fit(img, THUMB_MAX_SIDE))
+    return _jpeg(crop), thumbnail
@@ -0,0 +1,79 @@
+from pathlib import Path
+
+from lvlm_gate import FULL_MODEL, month_evidence
+from taxonomy import BIRD, BIRD_KEYS, BLANK, HUMAN, UNKNOWN, VEHICLE, taxon_key
+
+# -----------------------------
+# Configurable Parameters
+# -----------------------------
+
+# Cheap first pass for every folder, then a second pass for the ones that need it
+FIRST_PASS = {"name": "first", "samples": 3, "max_height": 480, "detail": "low"}
+SECOND_PASS = {
+    "name": "second",
+    "samples": 8,
+    "max_height": 1080,
+    "detail": "high",
+    "model": FULL_MODEL,
+}
+COUNT_TOLERANCE = 0  # allowed |GPT count - SpeciesNet max_count|
+# Words in a species name or note that mean the model wasn't sure
+HEDGE_WORDS = (
+    "possibly",
+    "possible",
+    "probably",
+    "likely",
+    "unclear",
+    "uncertain",
+    "unidentified",
+    "unsure",
+    "maybe",
+    "?",
+)
+NOT_ANIMALS = {BLANK, HUMAN, VEHICLE}
+
+
+def _compatible(a, b):
+    """Same taxon, or one side is only a coarser label for the other."""
+    if a == b:
+        return True
+    pair = {a, b}
+    if BIRD in pair and (pair - {BIRD}) <= BIRD_KEYS:
+        return True
+    return UNKNOWN in pair and not (pair & NOT_ANIMALS)
+
+
+def _hedged(text):
+    text = str(text or "").lower()
+    return any(word in text for word in HEDGE_WORDS)
+
+
+def escalation_reasons(folder, analysis):
+    """
+    Why a first-pass analysis should be re-asked, as a list drawn from
+    "species" and "count" (disagreement with sequence_max_detections.csv)
+    and "uncertain" (unknown or hedged species). Empty when it can stand.
+    """
+    reasons = []
+    individuals = analysis.get("individuals") or []
+    count = analysis.get("count") or 0
+    gpt_keys = {taxon_key(ind.get("species"), UNKNOWN) for ind in individuals}
+    if not count:
+        gpt_keys = {BLANK}
+    rows, _ = month_evidence(Path(folder).parts[1])
+    row = rows.get(Path(folder).as_posix())
+    if row is not None:
+        species = row.get("species", "").strip().lower() or BLANK
+        speciesnet_key = taxon_key(species, UNKNOWN)
+        if not any(_compatible(speciesnet_key, key) for key in gpt_keys):
+            reasons.append("species")
+        max_count = (
+            0 if speciesnet_key == BLANK else int(float(row.get("max_count") or 0))
+        )
+        if abs(count - max_count) > COUNT_TOLERANCE:
+            reasons.append("count")
+    if UNKNOWN in gpt_keys or any(
+        _hedged(ind.get("species")) or _hedged(ind.get("notes")) for ind in individuals
+    ):
+        reasons.append("uncertain")
+    return reasons
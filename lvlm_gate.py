@@ -0,0 +1,164 @@
+import json
+from pathlib import Path
+
+from lvlm_compact import SPECIES_CODES
+from speciesnet_results import (
+    load_predictions,
+    load_sequence_rows,
+    predictions_by_folder,
+    predictions_json_path,
+)
+
+# -----------------------------
+# Configurable Parameters
+# -----------------------------
+
+SKIP = "skip"
+CHEAP = "cheap"
+FULL = "full"
+
+CHEAP_MODEL = "gpt-4o-mini"
+FULL_MODEL = "gpt-4o"
+
+# Per SpeciesNet class: sequence confidence needed to skip the LVLM entirely,
+# or to use the cheap tier. None disables that tier. "*" covers other classes.
+DEFAULT_THRESHOLDS = {
+    "blank": {"skip": 0.90, "cheap": 0.60},
+    "human": {"skip": 0.85, "cheap": 0.60},
+    "vehicle": {"skip": 0.85, "cheap": 0.60},
+    "elk": {"skip": 0.95, "cheap": 0.75},
+    "mule deer": {"skip": 0.95, "cheap": 0.75},
+    "moose": {"skip": 0.95, "cheap": 0.75},
+    "american black bear": {"skip": None, "cheap": 0.85},
+    "animal": {"skip": None, "cheap": None},
+    "*": {"skip": None, "cheap": 0.90},
+}
+
+# SpeciesNet common names whose GPT-style name differs from the code table
+SPECIESNET_ALIASES = {
+    "american black bear": "black bear",
+    "puma": "mountain lion",
+    "cougar": "mountain lion",
+    "grey fox": "gray fox",
+}
+
+
+def load_thresholds(path=None):
+    """DEFAULT_THRESHOLDS, overridden per class by an optional JSON file."""
+    thresholds = {k: dict(v) for k, v in DEFAULT_THRESHOLDS.items()}
+    if path:
+        with open(path, "r") as f:
+            for name, tiers in json.load(f).items():
+                thresholds.setdefault(name.lower(), {}).update(tiers)
+    return thresholds
+
+
+def gpt_species_name(speciesnet_name):
+    """Map a SpeciesNet common name to the full name used in LVLM analyses."""
+    name = SPECIESNET_ALIASES.get(speciesnet_name, speciesnet_name)
+    for full_name in SPECIES_CODES.values():
+        if full_name.split("(")[-1].rstrip(")").lower() == name:
+            return full_name
+    return speciesnet_name
+
+
+# -----------------------------
+# Gate Decisions
+# -----------------------------
+
+# Month evidence (CSV rows and predictions grouped by folder), loaded once
+_MONTH_EVIDENCE = {}
+
+
+def month_evidence(month):
+    if month not in _MONTH_EVIDENCE:
+        predictions_path = predictions_json_path(month)
+        by_folder = {}
+        if predictions_path.exists():
+            by_folder = predictions_by_folder(load_predictions(predictions_path))
+        _MONTH_EVIDENCE[month] = (load_sequence_rows(month), by_folder)
+    return _MONTH_EVIDENCE[month]
+
+
+def sequence_confidence(species, frame_records):
+    """Highest per-frame score for the sequence species across its frames."""
+    scores = [
+        r["score"]
+        for r in frame_records.values()
+        if r["species"] == species and r["score"] is not None
+    ]
+    return max(scores, default=None)
+
+
+def decide(folder, thresholds):
+    """
+    Return a gate decision dict for a Frames/<month>/<sequence> folder:
+    {"decision", "species", "score", "max_count", "date", "time"}.
+    Folders without SpeciesNet evidence always get the full analysis.
+    """
+    month = Path(folder).parts[1]
+    rows, by_folder = month_evidence(month)
+    key = Path(folder).as_posix()
+    row = rows.get(key)
+    decision = {"decision": FULL, "species": None, "score": None}
+    if row is None:
+        return decision
+    species = row.get("species", "").strip().lower() or "blank"
+    frames = by_folder.get(str(Path(folder)), {})
+    score = sequence_confidence(species, frames)
+    decision.update(
+        {
+            "species": species,
+            "score": score,
+            "max_count": int(float(row.get("max_count") or 0)),
+            "date": row.get("date") or "unknown",
+            "time": row.get("time") or "unknown",
+        }
+    )
+    if score is None:
+        return decision
+    tiers = thresholds.get(species, thresholds["*"])
+    if tiers.get("skip") is not None and score >= tiers["skip"]:
+        decision["decision"] = SKIP
+    elif tiers.get("cheap") is not None and score >= tiers["cheap"]:
+        decision["decision"] = CHEAP
+    return decision
+
+
+def synthesize_analysis(decision):
+    """Analysis record for a skipped folder, built from SpeciesNet alone."""
+    species = decision["species"]
+    count = 0 if species == "blank" else decision["max_count"]
+    individuals = []
+    if species not in ("blank", "human", "vehicle"):
+        full_name = gpt_species_name(species)
+        for i in range(count):
+            individuals.append(
+                {
+                    "id": f"{species.replace(' ', '_')}_{i + 1}",
+                    "species": full_name,
+                    "sex": "unknown",
+                    "approx_age": "unknown",
+                    "health": "unknown",
+                    "activity": "unknown",
+                    "interaction": "none",
+                    "notes": "",
+                }
+            )
+    if species == "blank":
+        summary = "[GATED] SpeciesNet found no animals; LVLM analysis skipped."
+    else:
+        summary = (
+            f"[GATED] SpeciesNet: {species} ({decision['score']:.2f}), "
+            f"{count} individual(s); LVLM analysis skipped."
+        )
+    return {
+        "date": decision.get("date", "unknown"),
+        "time": decision.get("time", "unknown"),
+        "habitat": "unknown",
+        "temperature": "unknown",
+        "weather": "unknown",
+        "count": count,
+        "individuals": individuals,
+        "summary": summary,
+    }
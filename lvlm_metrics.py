@@ -0,0 +1,153 @@
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+QUANTILES = [0.5, 0.95, 0.99]
+
+
+def percentile(sorted_values, q):
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    pos = (len(sorted_values) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+class Metrics:
+    """
+    In-process timing spans, value histograms and counters for one run.
+    Stage latencies are recorded in seconds under the span name.
+    """
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.counters = defaultdict(int)
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples[name].append(time.perf_counter() - start)
+
+    def observe(self, name, value):
+        self.samples[name].append(value)
+
+    def incr(self, name, n=1):
+        self.counters[name] += n
+
+    def cache(self, name, hit):
+        self.incr(f"cache_{name}_{'hits' if hit else 'misses'}")
+
+    def summary(self):
+        stages = {}
+        for name, values in self.samples.items():
+            values = sorted(values)
+            stages[name] = {
+                "count": len(values),
+                "sum": sum(values),
+                "mean": sum(values) / len(values),
+                "max": values[-1],
+                **{f"p{int(q * 100)}": percentile(values, q) for q in QUANTILES},
+            }
+        caches = {}
+        for key in self.counters:
+            if key.startswith("cache_") and key.endswith("_hits"):
+                cache = key[len("cache_") : -len("_hits")]
+                hits = self.counters[key]
+                total = hits + self.counters.get(f"cache_{cache}_misses", 0)
+                caches[cache] = hits / total if total else None
+        network = sum(self.samples.get("network", []))
+        output_tokens = self.counters.get("output_tokens", 0)
+        return {
+            "wall_seconds": time.perf_counter() - self.started,
+            "stages": stages,
+            "counters": dict(self.counters),
+            "cache_hit_rate": caches,
+            "output_tokens_per_second": output_tokens / network if network else None,
+        }
+
+    def write_json(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+        return path
+
+    def write_prometheus(self, path, prefix="lvlm"):
+        """Write the summary in Prometheus text exposition format."""
+        summary = self.summary()
+        lines = [
+            f"# HELP {prefix}_stage_seconds Latency of each pipeline stage.",
+            f"# TYPE {prefix}_stage_seconds summary",
+        ]
+        for stage, stats in sorted(summary["stages"].items()):
+            for q in QUANTILES:
+                value = stats[f"p{int(q * 100)}"]
+                lines.append(
+                    f'{prefix}_stage_seconds{{stage="{stage}",quantile="{q}"}} {value:.6f}'
+                )
+            lines.append(
+                f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {stats["sum"]:.6f}'
+            )
+            lines.append(
+                f'{prefix}_stage_seconds_count{{stage="{stage}"}} {stats["count"]}'
+            )
+        for name, value in sorted(summary["counters"].items()):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        for cache, rate in sorted(summary["cache_hit_rate"].items()):
+            if rate is not None:
+                lines.append(f'{prefix}_cache_hit_ratio{{cache="{cache}"}} {rate:.6f}')
+        if summary["output_tokens_per_second"] is not None:
+            lines.append(
+                f"{prefix}_output_tokens_per_second {summary['output_tokens_per_second']:.6f}"
+            )
+        lines.append(f"{prefix}_wall_seconds {summary['wall_seconds']:.6f}")
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        return path
+
+
+# Shared registry for the current process
+METRICS = Metrics()
+
+
+@contextmanager
+def profiling(enabled, output_dir, top=25):
+    """
+    Capture a cProfile trace and a tracemalloc snapshot of the enclosed block.
+    Writes profile.pstats and tracemalloc_top.txt into output_dir.
+    """
+    if not enabled:
+        yield
+        return
+    import cProfile
+    import tracemalloc
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        profiler.dump_stats(output_dir / "profile.pstats")
+        with open(output_dir / "tracemalloc_top.txt", "w") as f:
+            f.write(f"peak_bytes\t{peak}\n")
+            for stat in snapshot.statistics("lineno")[:top]:
+                f.write(f"{stat}\n")
+        print(f"🧪 Profile written to {output_dir}")
@@ -0,0 +1,232 @@
+import email.utils
+import json
+import random
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from lvlm_metrics import METRICS
+from lvlm_schema import AnalysisError
+
+# -----------------------------
+# Configurable Parameters
+# -----------------------------
+
+MAX_ATTEMPTS = 6
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_CAP_SECONDS = 60.0
+BREAKER_THRESHOLD = 5  # consecutive retryable failures before pausing dispatch
+BREAKER_COOLDOWN_SECONDS = 30.0
+BREAKER_MAX_COOLDOWN_SECONDS = 600.0
+DEAD_LETTER_PATH = Path("lvlm") / "dead_letter.jsonl"
+
+# Error classes
+FATAL = "fatal"
+RETRYABLE = "retryable"
+CONTENT = "content"
+
+RETRYABLE_STATUS = {408, 409, 429}
+FATAL_STATUS = {401, 403}
+RETRYABLE_NAMES = {
+    "RateLimitError",
+    "InternalServerError",
+    "APIConnectionError",
+    "APITimeoutError",
+    "ConnectionError",
+    "TimeoutError",
+    # httpx errors raised while iterating a streamed response
+    "TransportError",
+    "TimeoutException",
+}
+FATAL_NAMES = {"AuthenticationError", "PermissionDeniedError"}
+
+
+class RetriesExhausted(Exception):
+    """Raised when a retryable error persists through every attempt."""
+
+    def __init__(self, last_error, attempts):
+        super().__init__(f"gave up after {attempts} attempts: {last_error}")
+        self.last_error = last_error
+        self.attempts = attempts
+
+
+# -----------------------------
+# Error Classification
+# -----------------------------
+
+
+def _status_code(error):
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def classify_error(error):
+    """Return FATAL, RETRYABLE or CONTENT for an exception from an LVLM call."""
+    if isinstance(error, AnalysisError):
+        return CONTENT
+    names = {cls.__name__ for cls in type(error).__mro__}
+    status = _status_code(error)
+    if names & FATAL_NAMES or status in FATAL_STATUS:
+        return FATAL
+    if names & RETRYABLE_NAMES or status in RETRYABLE_STATUS:
+        return RETRYABLE
+    if status is not None and status >= 500:
+        return RETRYABLE
+    return CONTENT
+
+
+def retry_after_seconds(error):
+    """Read a Retry-After (or retry-after-ms) hint from an API error, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value is not None:
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE_SECONDS, cap=BACKOFF_CAP_SECONDS):
+    """Exponential backoff with full jitter for the given 0-based attempt."""
+    return random.uniform(0, min(cap, base * (2**attempt)))
+
+
+# -----------------------------
+# Circuit Breaker
+# -----------------------------
+
+
+class CircuitBreaker:
+    """
+    Pause dispatch after a run of consecutive retryable failures.
+    While open, wait() blocks until the cooldown has passed; the next call is
+    a trial, and each further failure doubles the cooldown up to a cap.
+    """
+
+    def __init__(
+        self,
+        threshold=BREAKER_THRESHOLD,
+        cooldown=BREAKER_COOLDOWN_SECONDS,
+        max_cooldown=BREAKER_MAX_COOLDOWN_SECONDS,
+    ):
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.failures = 0
+        self.open_until = 0.0
+
+    def wait(self):
+        remaining = self.open_until - time.monotonic()
+        if remaining > 0:
+            print(f"⏸️  Circuit open, pausing dispatch for {remaining:.0f}s")
+            METRICS.incr("breaker_pauses")
+            time.sleep(remaining)
+
+    def record_success(self):
+        self.failures = 0
+        self.cooldown = self.base_cooldown
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.open_until = time.monotonic() + self.cooldown
+            self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+
+
+def call_with_retry(fn, *args, breaker=None, max_attempts=MAX_ATTEMPTS, **kwargs):
+    """
+    Call fn(*args, **kwargs), retrying retryable errors with jittered backoff.
+    Fatal and content errors are raised immediately; retryable errors that
+    outlast max_attempts raise RetriesExhausted.
+    """
+    for attempt in range(max_attempts):
+        if breaker is not None:
+            breaker.wait()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            if classify_error(e) != RETRYABLE:
+                raise
+            METRICS.incr("retryable_errors")
+            if breaker is not None:
+                breaker.record_failure()
+            if attempt + 1 == max_attempts:
+                raise RetriesExhausted(e, max_attempts) from e
+            delay = max(retry_after_seconds(e) or 0.0, backoff_delay(attempt))
+            print(
+                f"⚠️  {type(e).__name__} (attempt {attempt + 1}/{max_attempts}), retrying in {delay:.1f}s"
+            )
+            time.sleep(delay)
+            continue
+        if breaker is not None:
+            breaker.record_success()
+        return result
+
+
+# -----------------------------
+# Dead-Letter Queue
+# -----------------------------
+
+
+def append_dead_letter(folder, error, path=DEAD_LETTER_PATH):
+    """Record a folder that could not be analysed so it can be re-run later."""
+    cause = error.last_error if isinstance(error, RetriesExhausted) else error
+    entry = {
+        "folder": str(folder),
+        "error_class": classify_error(cause),
+        "error_type": type(cause).__name__,
+        "error": str(error),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    METRICS.incr("dead_letters")
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+def read_dead_letters(path=DEAD_LETTER_PATH):
+    """Return the dead-letter entries, one per folder (latest wins)."""
+    path = Path(path)
+    if not path.exists():
+        return []
+    entries = {}
+    with open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                entries[entry["folder"]] = entry
+    return list(entries.values())
+
+
+def clear_dead_letters(folders, path=DEAD_LETTER_PATH):
+    """Drop the entries of folders that have since been analysed."""
+    path = Path(path)
+    done = {str(folder) for folder in folders}
+    entries = read_dead_letters(path)
+    remaining = [entry for entry in entries if entry["folder"] not in done]
+    if len(remaining) == len(entries):
+        return
+    if not remaining:
+        path.unlink()
+        return
+    with open(path, "w") as f:
+        for entry in remaining:
+            f.write(json.dumps(entry) + "\n")
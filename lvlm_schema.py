@@ -0,0 +1,385 @@
+import json
+import re
+
+# -----------------------------
+# Analysis Schema
+# -----------------------------
+
+SEX_VALUES = ["male", "female", "unknown"]
+AGE_VALUES = ["baby", "young", "adult", "old", "unknown"]
+ACTIVITY_VALUES = [
+    "grazing",
+    "browsing",
+    "walking",
+    "running",
+    "resting",
+    "alert",
+    "drinking",
+    "social",
+    "following",
+    "chasing",
+    "sniffing",
+    "playing",
+    "fleeing",
+    "nursing",
+    "vocalizing",
+    "marking",
+    "unknown",
+]
+
+INDIVIDUAL_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "id": {"type": "string"},
+        "species": {"type": "string"},
+        "sex": {"type": "string", "enum": SEX_VALUES},
+        "approx_age": {"type": "string", "enum": AGE_VALUES},
+        "health": {"type": "string"},
+        "activity": {"type": "string", "enum": ACTIVITY_VALUES},
+        "interaction": {"type": "string"},
+        "notes": {"type": "string"},
+    },
+    "required": [
+        "id",
+        "species",
+        "sex",
+        "approx_age",
+        "health",
+        "activity",
+        "interaction",
+        "notes",
+    ],
+    "additionalProperties": False,
+}
+
+# Strict structured-output mode requires every property to be listed in
+# "required" and additionalProperties to be false.
+ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "date": {"type": "string"},
+        "time": {"type": "string"},
+        "habitat": {"type": "string"},
+        "temperature": {"type": "string"},
+        "weather": {"type": "string"},
+        "count": {"type": "integer", "minimum": 0},
+        "individuals": {"type": "array", "items": INDIVIDUAL_SCHEMA},
+        "summary": {"type": "string"},
+    },
+    "required": [
+        "date",
+        "time",
+        "habitat",
+        "temperature",
+        "weather",
+        "count",
+        "individuals",
+        "summary",
+    ],
+    "additionalProperties": False,
+}
+
+
+# Fields read off the camera's burned-in overlay
+OVERLAY_FIELDS = ["date", "time", "temperature"]
+
+
+def without_fields(schema, fields):
+    """Copy of an object schema with some top-level properties removed."""
+    return {
+        **schema,
+        "properties": {
+            k: v for k, v in schema["properties"].items() if k not in fields
+        },
+        "required": [k for k in schema["required"] if k not in fields],
+    }
+
+
+# Several sequences answered in one response: {"sequences": [{"sequence": k, ...}]}
+SEQUENCE_KEY = "sequence"
+
+
+def packed_schema(schema):
+    """Schema for a packed response whose items follow schema plus a sequence number."""
+    item = {
+        **schema,
+        "properties": {SEQUENCE_KEY: {"type": "integer"}, **schema["properties"]},
+        "required": [SEQUENCE_KEY] + schema["required"],
+    }
+    return {
+        "type": "object",
+        "properties": {"sequences": {"type": "array", "items": item}},
+        "required": ["sequences"],
+        "additionalProperties": False,
+    }
+
+
+class AnalysisError(ValueError):
+    """Raised when a model response cannot be turned into a valid analysis."""
+
+    def __init__(self, message, raw_text=None):
+        super().__init__(message)
+        self.raw_text = raw_text
+
+
+def response_format(schema=ANALYSIS_SCHEMA, name="camera_trap_analysis"):
+    """Return the chat-completions `response_format` for schema-constrained output."""
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "strict": True, "schema": schema},
+    }
+
+
+# -----------------------------
+# Validation
+# -----------------------------
+
+_JSON_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "boolean": bool,
+    "null": type(None),
+}
+
+
+def _is_type(value, expected):
+    if expected == "integer":
+        return isinstance(value, int) and not isinstance(value, bool)
+    if expected == "number":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    return isinstance(value, _JSON_TYPES[expected])
+
+
+def validate(obj, schema=ANALYSIS_SCHEMA, path="$"):
+    """
+    Validate obj against the subset of JSON Schema used in this module.
+    Returns a list of error strings (empty when valid).
+    """
+    errors = []
+    expected = schema.get("type")
+    if expected and not _is_type(obj, expected):
+        return [f"{path}: expected {expected}, got {type(obj).__name__}"]
+    if "enum" in schema and obj not in schema["enum"]:
+        errors.append(f"{path}: {obj!r} not one of {schema['enum']}")
+    if "minimum" in schema and obj < schema["minimum"]:
+        errors.append(f"{path}: {obj} is below minimum {schema['minimum']}")
+    if expected == "object":
+        properties = schema.get("properties", {})
+        for key in schema.get("required", []):
+            if key not in obj:
+                errors.append(f"{path}: missing required key '{key}'")
+        for key, value in obj.items():
+            if key in properties:
+                errors.extend(validate(value, properties[key], f"{path}.{key}"))
+            elif schema.get("additionalProperties") is False:
+                errors.append(f"{path}: unexpected key '{key}'")
+    if expected == "array" and "items" in schema:
+        for i, item in enumerate(obj):
+            errors.extend(validate(item, schema["items"], f"{path}[{i}]"))
+    return errors
+
+
+# -----------------------------
+# Extraction and Repair
+# -----------------------------
+
+
+def _balanced_object(text):
+    """
+    Return the first top-level {...} span in text, respecting string literals.
+    A string still open at a line break is taken to end there (JSON strings
+    can't span lines; _strip_comments adds the missing quote). If the object
+    is truncated, the open strings and brackets are closed.
+    """
+    start = text.find("{")
+    if start < 0:
+        return None
+    stack = []
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch in '"\n':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                return text[start : i + 1]
+    # Truncated response: close whatever is still open
+    tail = '"' if in_string else ""
+    return text[start:] + tail + "".join(reversed(stack))
+
+
+def _strip_comments(text):
+    """Remove // line comments that are outside string literals."""
+    out = []
+    in_string = False
+    escaped = False
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if in_string:
+            out.append(ch)
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            elif ch == "\n":
+                # Unterminated string: end it at the line break
+                out.insert(len(out) - 1, '"')
+                in_string = False
+        elif ch == '"':
+            in_string = True
+            out.append(ch)
+        elif text.startswith("//", i):
+            while i < len(text) and text[i] != "\n":
+                i += 1
+            continue
+        else:
+            out.append(ch)
+        i += 1
+    return "".join(out)
+
+
+# Cheap, targeted fixes for near-valid JSON, applied in order until it parses.
+_REPAIRS = [
+    _strip_comments,
+    lambda s: re.sub(r",\s*([}\]])", r"\1", s),  # trailing commas
+    lambda s: re.sub(r"([\[{])\s*,", r"\1", s),  # leading commas
+    lambda s: re.sub(r'(["}\]\d]|true|false|null)(\s*\n\s*)(["{\[])', r"\1,\2\3", s),
+    lambda s: re.sub(r"\bTrue\b", "true", re.sub(r"\bFalse\b", "false", s)),
+    lambda s: re.sub(r"\bNone\b", "null", s),
+    lambda s: s.replace("“", '"').replace("”", '"'),
+]
+
+
+def repair_json(text):
+    """
+    Parse a JSON object from model text, applying local repairs if needed.
+    Raises AnalysisError if the text cannot be repaired.
+    """
+    json_str = _balanced_object(text)
+    if json_str is None:
+        raise AnalysisError("No JSON object found in the response.", text)
+    try:
+        return json.loads(json_str)
+    except json.JSONDecodeError:
+        pass
+    for repair in _REPAIRS:
+        json_str = repair(json_str)
+        try:
+            return json.loads(json_str)
+        except json.JSONDecodeError:
+            continue
+    raise AnalysisError("Response JSON could not be repaired.", text)
+
+
+def extract_json(text):
+    """
+    Extract and parse a JSON object from a language model response.
+    Handles Markdown-wrapped code blocks, truncation and common syntax slips.
+    """
+    match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", text, re.DOTALL)
+    if match:
+        try:
+            return json.loads(match.group(1))
+        except json.JSONDecodeError:
+            pass
+    return repair_json(text)
+
+
+def _coerce_enum(value, allowed, default="unknown"):
+    value = str(value).strip().lower()
+    return value if value in allowed else default
+
+
+def coerce_analysis(obj):
+    """
+    Fix common schema slips in place: missing string fields, counts given as
+    strings, and enum values with stray case or out-of-vocabulary words.
+    """
+    if not isinstance(obj, dict):
+        return obj
+    for key in list(obj):
+        if key not in ANALYSIS_SCHEMA["properties"]:
+            del obj[key]
+    for key in ["date", "time", "habitat", "temperature", "weather", "summary"]:
+        if not isinstance(obj.get(key), str):
+            obj[key] = "unknown" if obj.get(key) is None else str(obj[key])
+    individuals = obj.get("individuals")
+    if not isinstance(individuals, list):
+        individuals = []
+    obj["individuals"] = [ind for ind in individuals if isinstance(ind, dict)]
+    for ind in obj["individuals"]:
+        for key in list(ind):
+            if key not in INDIVIDUAL_SCHEMA["properties"]:
+                del ind[key]
+        for key in ["id", "species", "health", "interaction", "notes"]:
+            if not isinstance(ind.get(key), str):
+                ind[key] = "" if ind.get(key) is None else str(ind[key])
+        ind["sex"] = _coerce_enum(ind.get("sex"), SEX_VALUES)
+        ind["approx_age"] = _coerce_enum(ind.get("approx_age"), AGE_VALUES)
+        ind["activity"] = _coerce_enum(ind.get("activity"), ACTIVITY_VALUES)
+    try:
+        obj["count"] = max(0, int(obj.get("count")))
+    except (TypeError, ValueError):
+        obj["count"] = len(obj["individuals"])
+    return obj
+
+
+def parse_analysis(text, schema=ANALYSIS_SCHEMA, coerce=coerce_analysis):
+    """
+    Parse, repair and validate a model response into an analysis dict.
+    Raises AnalysisError when the result still does not match the schema.
+    """
+    obj = extract_json(text)
+    errors = validate(obj, schema)
+    if errors:
+        obj = coerce(obj)
+        if isinstance(obj, dict) and schema.get("additionalProperties") is False:
+            # Coercion may fill fields this (reduced) schema leaves out
+            obj = {k: v for k, v in obj.items() if k in schema["properties"]}
+        errors = validate(obj, schema)
+    if errors:
+        raise AnalysisError("; ".join(errors[:5]), text)
+    return obj
+
+
+def packed_coerce(coerce, schema):
+    """
+    Wrap a per-analysis coerce function for packed responses. Items without
+    an integer sequence number are dropped so the rest can still be used.
+    """
+
+    def coerce_packed(obj):
+        if not isinstance(obj, dict):
+            return obj
+        items = obj.get("sequences")
+        obj = {"sequences": []}
+        for item in items if isinstance(items, list) else []:
+            if not isinstance(item, dict) or not isinstance(
+                item.get(SEQUENCE_KEY), int
+            ):
+                continue
+            number = item.pop(SEQUENCE_KEY)
+            item = coerce(item)
+            if isinstance(item, dict):
+                item = {k: v for k, v in item.items() if k in schema["properties"]}
+                obj["sequences"].append({SEQUENCE_KEY: number, **item})
+        return obj
+
+    return coerce_packed
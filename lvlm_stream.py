@@ -0,0 +1,204 @@
+import time
+from types import SimpleNamespace
+
+from lvlm_metrics import METRICS
+from lvlm_schema import AnalysisError
+
+# -----------------------------
+# Configurable Parameters
+# -----------------------------
+
+STREAM_OUTPUT_BUDGET = 1200  # output tokens allowed per sequence before aborting
+MAX_PREFIX_CHARS = 64  # text tolerated before the JSON object starts (e.g. a ``` fence)
+MAX_STRING_CHARS = 2000  # a longer string value is the model rambling
+MAX_ARRAY_ITEMS = 40  # e.g. individuals; more is a repetition loop
+CONTAINER_TYPES = {"{": "object", "[": "array"}
+
+
+class StreamChecker:
+    """
+    Incremental check that a streamed JSON response is still on schema.
+    feed() takes each text delta and raises AnalysisError as soon as the
+    response clearly deviates: prose instead of JSON, a key the schema
+    does not have, a scalar where an object or array belongs, or a
+    runaway string or array. done turns True when the top-level object
+    closes; later text is not checked. It is deliberately lenient
+    about anything parse_analysis() can still repair or coerce.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.text = []
+        self.prefix = 0
+        self.done = False
+        # Frames: {"schema", "type", "key", "expect", "items"}
+        self.stack = []
+        self.in_string = False
+        self.escaped = False
+        self.string_is_key = False
+        self.string = []
+
+    def _deviate(self, message):
+        raise AnalysisError(f"stream deviates from schema: {message}", self.value())
+
+    def value(self):
+        return "".join(self.text)
+
+    def _child_schema(self, frame):
+        schema = frame["schema"] or {}
+        if frame["type"] == "array":
+            return schema.get("items")
+        return (schema.get("properties") or {}).get(frame["key"])
+
+    def _start_value(self, ch):
+        """A value begins in the innermost container: check it fits the schema."""
+        frame = self.stack[-1]
+        child = self._child_schema(frame)
+        if frame["type"] == "array":
+            frame["items"] += 1
+            if frame["items"] > MAX_ARRAY_ITEMS:
+                self._deviate(f"more than {MAX_ARRAY_ITEMS} array items")
+        expected = (child or {}).get("type")
+        actual = CONTAINER_TYPES.get(ch)
+        if expected in ("object", "array") and actual != expected:
+            self._deviate(f"'{frame['key']}' should be an {expected}")
+        if actual is not None and expected not in (None, actual):
+            self._deviate(f"'{frame['key']}' should be a {expected}")
+        frame["expect"] = "comma"
+        return child
+
+    def _push(self, ch, schema):
+        self.stack.append(
+            {
+                "schema": schema,
+                "type": CONTAINER_TYPES[ch],
+                "key": None,
+                "expect": "key" if ch == "{" else "value",
+                "items": 0,
+            }
+        )
+
+    def _end_string(self):
+        frame = self.stack[-1]
+        if not self.string_is_key:
+            return
+        key = "".join(self.string)
+        schema = frame["schema"] or {}
+        if schema.get("additionalProperties") is False and key not in schema.get(
+            "properties", {}
+        ):
+            self._deviate(f"unexpected key '{key}'")
+        frame["key"] = key
+        frame["expect"] = "colon"
+
+    def feed(self, delta):
+        self.text.append(delta)
+        for ch in delta:
+            if self.done:
+                return
+            if not self.stack:
+                if ch == "{":
+                    self._push(ch, self.schema)
+                    continue
+                self.prefix += 1
+                if self.prefix > MAX_PREFIX_CHARS:
+                    self._deviate("no JSON object at the start of the response")
+                continue
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+                    self._end_string()
+                    continue
+                self.string.append(ch)
+                if len(self.string) > MAX_STRING_CHARS:
+                    self._deviate(f"string longer than {MAX_STRING_CHARS} characters")
+                continue
+            frame = self.stack[-1]
+            if ch.isspace():
+                continue
+            if ch == '"':
+                self.in_string, self.string = True, []
+                self.string_is_key = (
+                    frame["type"] == "object" and frame["expect"] == "key"
+                )
+                if not self.string_is_key:
+                    self._start_value(ch)
+            elif ch in "{[":
+                child = self._start_value(ch) if frame["expect"] != "key" else None
+                self._push(ch, child)
+            elif ch in "}]":
+                self.stack.pop()
+                if not self.stack:
+                    self.done = True
+            elif ch == ":":
+                frame["expect"] = "value"
+            elif ch == ",":
+                frame["expect"] = "key" if frame["type"] == "object" else "value"
+            elif frame["expect"] == "value":
+                # Number, true, false or null
+                self._start_value(ch)
+
+
+def read_stream(stream, schema, budget, started=None):
+    """
+    Consume a chat-completions stream through a StreamChecker. Reads to
+    the end so the closing usage chunk arrives; text after the JSON object
+    is ignored. Aborts (closing the stream and raising AnalysisError, so
+    the folder is re-queued) on a schema deviation or after `budget`
+    output tokens before the object closes. Tokens of a stream abandoned
+    for any reason still count towards output_tokens. Returns a response
+    object shaped like a non-streamed completion. Time to first token is
+    measured from `started` (perf_counter() when the request was sent).
+    """
+    checker = StreamChecker(schema)
+    start = started or time.perf_counter()
+    first_token = None
+    tokens = 0
+    usage = None
+    try:
+        for chunk in stream:
+            if getattr(chunk, "usage", None) is not None:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            if first_token is None:
+                first_token = time.perf_counter() - start
+                METRICS.observe("time_to_first_token", first_token)
+            tokens += 1  # one content delta per token
+            if checker.done:
+                if delta.strip():
+                    METRICS.incr("stream_trailing_tokens")
+                continue
+            checker.feed(delta)
+            if tokens > budget and not checker.done:
+                raise AnalysisError(
+                    f"output budget of {budget} tokens exceeded", checker.value()
+                )
+    except Exception as e:
+        # Abandoned: the response is discarded but its tokens were paid for
+        if isinstance(e, AnalysisError):
+            METRICS.incr("stream_aborts")
+        METRICS.incr("stream_wasted_tokens", tokens)
+        METRICS.incr("output_tokens", tokens)
+        raise
+    finally:
+        stream.close()
+    completion_tokens = tokens
+    prompt_tokens = None
+    if usage is not None:
+        prompt_tokens = usage.prompt_tokens
+        completion_tokens = max(tokens, usage.completion_tokens or 0)
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=checker.value()))],
+        usage=SimpleNamespace(
+            prompt_tokens=prompt_tokens, completion_tokens=completion_tokens
+        ),
+        time_to_first_token=first_token,
+    )
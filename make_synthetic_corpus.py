@@ -0,0 +1,255 @@
+import argparse
+import csv
+import json
+import os
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# -----------------------------
+# Configurable Parameters
+# -----------------------------
+
+LOCATIONS = [
+    "Aspen Meadow Spring",
+    "Waxwing Spring",
+    "Mosquito Spring",
+    "Rootball Spring",
+    "WR Woods",
+    "Wetlands",
+    "Birdbath",
+    "Lodge",
+]
+# (label used in folder names, SpeciesNet common name, GPT species string)
+SPECIES = [
+    ("Elk", "elk", "Cervus canadensis (elk)"),
+    ("Mule Deer", "mule deer", "Odocoileus hemionus (mule deer)"),
+    ("Moose", "moose", "Alces alces (moose)"),
+    ("Bear", "american black bear", "Ursus americanus (black bear)"),
+    ("Coyote", "coyote", "Canis latrans (coyote)"),
+    ("Fox", "red fox", "Vulpes vulpes (red fox)"),
+    ("Grey Fox", "gray fox", "Urocyon cinereoargenteus (gray fox)"),
+    ("Bobcat", "bobcat", "Lynx rufus (bobcat)"),
+    ("Shoulder", "blank", None),
+    ("Trespasser", "human", None),
+]
+EXIF_DATETIME_ORIGINAL = 36867
+EXIF_DATETIME = 306
+MISLABEL_RATE = 0.1  # fraction of sequences where SpeciesNet disagrees
+
+
+def make_background(rng, width, height):
+    """Cheap textured background: vertical gradient plus a few blobs."""
+    from PIL import Image, ImageDraw
+
+    base = rng.randint(40, 120)
+    img = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    img = Image.blend(
+        img, Image.new("RGB", (width, height), (base, base + 20, base)), 0.6
+    )
+    draw = ImageDraw.Draw(img)
+    for _ in range(12):
+        x, y = rng.randrange(width), rng.randrange(height)
+        r = rng.randint(width // 40, width // 8)
+        shade = rng.randint(20, 90)
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=(shade, shade + 30, shade))
+    return img
+
+
+def write_sequence(rng, folder, n_frames, width, height, start, animals):
+    """
+    Write frame_NNNN.jpg files with a moving blob per animal and EXIF times.
+    Returns the frame names and, per frame, normalised [x, y, w, h] boxes.
+    """
+    from PIL import Image, ImageDraw
+
+    folder.mkdir(parents=True, exist_ok=True)
+    background = make_background(rng, width, height)
+    tracks = [
+        (
+            rng.uniform(0, width),
+            rng.uniform(height * 0.4, height * 0.9),
+            rng.uniform(-width / 30, width / 30),
+            rng.randint(width // 30, width // 10),
+        )
+        for _ in range(animals)
+    ]
+    frame_names = []
+    frame_boxes = []
+    for i in range(n_frames):
+        img = background.copy()
+        draw = ImageDraw.Draw(img)
+        boxes = []
+        for x, y, dx, size in tracks:
+            cx = (x + dx * i) % width
+            box = (cx - size, y - size / 2, cx + size, y + size / 2)
+            draw.ellipse(box, fill=(110, 80, 50))
+            x0, y0 = max(0, box[0]), max(0, box[1])
+            x1, y1 = min(width, box[2]), min(height, box[3])
+            boxes.append(
+                [x0 / width, y0 / height, (x1 - x0) / width, (y1 - y0) / height]
+            )
+        frame_boxes.append(boxes)
+        stamp = (start + timedelta(seconds=2 * i)).strftime("%Y:%m:%d %H:%M:%S")
+        exif = Image.Exif()
+        exif[EXIF_DATETIME] = stamp
+        exif[EXIF_DATETIME_ORIGINAL] = stamp
+        name = f"frame_{i + 1:04d}.jpg"
+        img.save(folder / name, format="JPEG", quality=80, exif=exif.tobytes())
+        frame_names.append(name)
+    return frame_names, frame_boxes
+
+
+def fake_analysis(gpt_species, count, start):
+    individuals = [
+        {
+            "id": f"{gpt_species.split('(')[-1].rstrip(')').replace(' ', '_')}_{k + 1}",
+            "species": gpt_species,
+            "sex": "unknown",
+            "approx_age": "adult",
+            "health": "healthy",
+            "activity": "walking",
+            "interaction": "none",
+            "notes": "",
+        }
+        for k in range(count)
+    ]
+    return {
+        "date": start.strftime("%Y-%m-%d"),
+        "time": start.strftime("%H:%M:%S"),
+        "habitat": "aspen meadow",
+        "temperature": "unknown",
+        "weather": "unknown",
+        "count": count,
+        "individuals": individuals,
+        "summary": f"{count} animal(s) walking through the scene.",
+    }
+
+
+def generate_month(rng, out_dir, month, n_sequences, frames, width, height):
+    month_start = datetime.strptime(month + "01", "%Y%m%d")
+    csv_rows = []
+    lvlm_entries = []
+    predictions = []
+    for s in range(n_sequences):
+        location = rng.choice(LOCATIONS)
+        label, speciesnet_name, gpt_species = rng.choice(SPECIES)
+        sequence = f"{location} {label} {s + 1}"
+        rel_folder = Path("Frames") / month / sequence
+        n_frames = max(1, int(rng.gauss(frames, frames / 3)))
+        count = 0 if gpt_species is None else rng.randint(1, 3)
+        start = month_start + timedelta(minutes=rng.randrange(28 * 24 * 60))
+        frame_names, frame_boxes = write_sequence(
+            rng, out_dir / rel_folder, n_frames, width, height, start, count
+        )
+        end = start + timedelta(seconds=2 * (n_frames - 1))
+        detected = speciesnet_name
+        if rng.random() < MISLABEL_RATE:
+            detected = rng.choice(SPECIES)[1]
+        for name, boxes in zip(frame_names, frame_boxes):
+            predictions.append(
+                {
+                    "filepath": (rel_folder / name).as_posix(),
+                    "prediction": f"synthetic;;;;;;{detected}",
+                    "prediction_score": round(rng.uniform(0.55, 0.99), 4),
+                    "detections": [
+                        {
+                            "category": "1",
+                            "label": "animal",
+                            "conf": round(rng.uniform(0.5, 0.98), 4),
+                            "bbox": [round(v, 4) for v in box],
+                        }
+                        for box in boxes
+                    ],
+                }
+            )
+        csv_rows.append(
+            {
+                "file_name": (rel_folder / frame_names[0]).as_posix(),
+                "date": start.strftime("%Y-%m-%d"),
+                "time": start.strftime("%H:%M:%S"),
+                "seq_id": f"folder_{sequence}_{s}",
+                "species": detected,
+                "max_count": count,
+                "start_time": start.strftime("%Y-%m-%d %H:%M:%S"),
+                "end_time": end.strftime("%Y-%m-%d %H:%M:%S"),
+                "duration_seconds": int((end - start).total_seconds()),
+            }
+        )
+        if gpt_species is None:
+            analysis = fake_analysis("none", 0, start)
+        else:
+            analysis = fake_analysis(gpt_species, count, start)
+        sampled = frame_names[:: max(1, len(frame_names) // 5)][:5]
+        lvlm_entries.append(
+            {
+                "folder": rel_folder.as_posix(),
+                "image_frames": sampled,
+                "analysis": analysis,
+                "metadata": {
+                    "total_images_in_folder": len(frame_names),
+                    "sampled_images": len(sampled),
+                },
+            }
+        )
+    csv_dir = out_dir / "preview_batch" / f"predictions_{month}_smoothed"
+    csv_dir.mkdir(parents=True, exist_ok=True)
+    with open(csv_dir / "sequence_max_detections.csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(csv_rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(csv_rows)
+    results_dir = out_dir / "results"
+    results_dir.mkdir(parents=True, exist_ok=True)
+    with open(results_dir / f"predictions_{month}_smoothed.json", "w") as f:
+        json.dump({"predictions": predictions}, f)
+    lvlm_dir = out_dir / "lvlm"
+    lvlm_dir.mkdir(parents=True, exist_ok=True)
+    with open(lvlm_dir / f"{month}.json", "w") as f:
+        json.dump(lvlm_entries, f, indent=2)
+    return sum(e["metadata"]["total_images_in_folder"] for e in lvlm_entries)
+
+
+def generate_corpus(
+    out_dir, months=2, sequences=40, frames=15, width=1280, height=720, seed=0
+):
+    """
+    Build a synthetic Frames/<month>/<sequence>/frame_NNNN.jpg tree plus the
+    matching SpeciesNet predictions, preview_batch CSVs and lvlm JSON under out_dir.
+    """
+    rng = random.Random(seed)
+    out_dir = Path(out_dir)
+    total = 0
+    for m in range(months):
+        year, month = divmod(5 + m, 12)
+        month_name = f"{2025 + year}{month + 1:02d}"
+        total += generate_month(
+            rng, out_dir, month_name, sequences, frames, width, height
+        )
+        print(f"Generated {month_name}")
+    print(f"✅ {total} frames in {months * sequences} sequences under {out_dir}")
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic camera-trap corpus for benchmarking."
+    )
+    parser.add_argument("--out", type=str, default="synthetic_corpus")
+    parser.add_argument("--months", type=int, default=2)
+    parser.add_argument("--sequences", type=int, default=40, help="Per month")
+    parser.add_argument("--frames", type=int, default=15, help="Mean per sequence")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if os.path.exists(os.path.join(args.out, "Frames")):
+        print(f"Warning: adding to existing corpus in {args.out}")
+    generate_corpus(
+        args.out,
+        months=args.months,
+        sequences=args.sequences,
+        frames=args.frames,
+        width=args.width,
+        height=args.height,
+        seed=args.seed,
+    )
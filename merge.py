@@ -1,4 +1,3 @@
-import pandas as pd
 import json
 import os
 import glob
@@ -35,6 +34,8 @@ def merge_json_and_csv(
         output_path = os.path.join(
             csv_folder, f"merged_{os.path.splitext(json_month)[0]}.csv"
         )
+    import pandas as pd
+
     # Load CSV
     csv_df = pd.read_csv(csv_path)
     # Load JSON
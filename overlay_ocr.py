@@ -0,0 +1,334 @@
+import argparse
+import re
+from datetime import datetime
+from pathlib import Path
+
+from crawler import get_crawler
+
+# -----------------------------
+# Configurable Parameters
+# -----------------------------
+
+TEMPLATES_DIR = Path("ocr_templates")
+IMAGE_EXTS = (".jpg", ".jpeg")
+GLYPH_H, GLYPH_W = 16, 12  # normalised glyph cell
+WORD_GAP = 0.45  # column gap, as a fraction of text height, that separates words
+MIN_MATCH = 0.6  # correlation below which a glyph is read as "?"
+EXIF_MODEL = 272
+EXIF_DATETIME_ORIGINAL = 36867
+EXIF_IFD = 0x8769
+
+# Where each camera model burns in its overlay. "strip" is the band of the
+# frame (fractions of the height) holding the text; "words" index the
+# space-separated groups of that text, counted from the end when negative.
+DEFAULT_LAYOUT = {
+    "strip": (0.93, 1.0),
+    "decode_scale": 2,  # JPEG draft reduction; templates are learned at this scale
+    "words": {"temperature": 0, "date": -2, "time": -1},
+    "date_format": "%m/%d/%Y",
+    "time_format": "%H:%M:%S",
+    "temperature_unit": "F",  # used when the unit glyph has no template
+}
+LAYOUTS = {}  # camera model -> overrides of DEFAULT_LAYOUT
+
+
+def camera_layout(model):
+    return {**DEFAULT_LAYOUT, **LAYOUTS.get(model, {})}
+
+
+def template_path(model):
+    name = re.sub(r"\W+", "_", model or "").strip("_") or "default"
+    return TEMPLATES_DIR / f"{name}.npz"
+
+
+# -----------------------------
+# Segmentation
+# -----------------------------
+
+
+def _runs(flags):
+    """(start, end) of each run of True values in a 1-D bool array."""
+    import numpy as np
+
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], flags.view(np.int8), [0]])))
+    return edges.reshape(-1, 2)
+
+
+def _normalise(glyph, scale):
+    """Place a glyph (text height rows) in a GLYPH_H x GLYPH_W cell, keeping its width."""
+    import numpy as np
+
+    rows = np.minimum((np.arange(GLYPH_H) + 0.5) / scale, glyph.shape[0] - 1).astype(
+        int
+    )
+    cols = (np.arange(GLYPH_W) - GLYPH_W / 2 + 0.5) / scale + glyph.shape[1] / 2
+    valid = (cols >= 0) & (cols < glyph.shape[1])
+    cell = np.zeros((GLYPH_H, GLYPH_W), dtype=np.float32)
+    cell[:, valid] = glyph[np.ix_(rows, cols[valid].astype(int))]
+    vec = cell.ravel()
+    vec -= vec.mean()
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+def load_strip(image_path):
+    """Decode just enough of a frame to return (camera model, overlay strip, layout)."""
+    from PIL import Image
+
+    with Image.open(image_path) as img:
+        return image_strip(img)
+
+
+def image_strip(img):
+    """load_strip() for a frame that is open but not yet decoded."""
+    import numpy as np
+
+    exif = img.getexif()
+    model = str(exif.get(EXIF_MODEL, "")).strip("\x00 ")
+    layout = camera_layout(model)
+    scale = layout["decode_scale"]
+    img.draft("L", (img.width // scale, img.height // scale))
+    top, bottom = layout["strip"]
+    strip = img.convert("L").crop(
+        (0, int(top * img.height), img.width, int(bottom * img.height))
+    )
+    return model, np.asarray(strip, dtype=np.float32), layout
+
+
+def segment(strip):
+    """
+    Split an overlay strip into words of normalised glyph vectors.
+    Ink is whichever side of the mid-grey threshold is the minority, so both
+    light-on-dark and dark-on-light overlays work.
+    """
+    import numpy as np
+
+    lo, hi = np.percentile(strip, [5, 95])
+    if hi - lo < 32:
+        return []
+    mask = strip > (lo + hi) / 2
+    if mask.mean() > 0.5:
+        mask = ~mask
+    rows = _runs(mask.any(axis=1))
+    if not len(rows):
+        return []
+    # Text line: the tallest band of inked rows
+    y0, y1 = max(rows, key=lambda r: r[1] - r[0])
+    line = mask[y0:y1]
+    height = y1 - y0
+    scale = GLYPH_H / height
+    words = []
+    last_end = None
+    for x0, x1 in _runs(line.any(axis=0)):
+        if last_end is None or x0 - last_end > WORD_GAP * height:
+            words.append([])
+        words[-1].append(_normalise(line[:, x0:x1], scale))
+        last_end = x1
+    return words
+
+
+# -----------------------------
+# Templates
+# -----------------------------
+
+_TEMPLATES = {}  # camera model -> (chars, (K, GLYPH_H * GLYPH_W) array)
+
+
+def load_templates(model):
+    import numpy as np
+
+    if model not in _TEMPLATES:
+        path = template_path(model)
+        if path.exists():
+            data = np.load(path)
+            _TEMPLATES[model] = (str(data["chars"]), data["glyphs"])
+        else:
+            _TEMPLATES[model] = None
+    return _TEMPLATES[model]
+
+
+def save_templates(model, sums):
+    """Average the collected glyphs per character and cache them for model."""
+    import numpy as np
+
+    chars = "".join(sorted(sums))
+    glyphs = np.stack([sums[c][0] / sums[c][1] for c in chars])
+    glyphs -= glyphs.mean(axis=1, keepdims=True)
+    glyphs /= np.maximum(np.linalg.norm(glyphs, axis=1, keepdims=True), 1e-6)
+    TEMPLATES_DIR.mkdir(parents=True, exist_ok=True)
+    np.savez(template_path(model), chars=np.array(chars), glyphs=glyphs)
+    _TEMPLATES[model] = (chars, glyphs)
+    return chars
+
+
+def exif_datetime(image_path):
+    from PIL import Image
+
+    with Image.open(image_path) as img:
+        exif = img.getexif()
+        value = exif.get_ifd(EXIF_IFD).get(EXIF_DATETIME_ORIGINAL) or exif.get(306)
+    try:
+        return datetime.strptime(str(value).strip("\x00 "), "%Y:%m:%d %H:%M:%S")
+    except ValueError:
+        return None
+
+
+def expected_words(image_path, layout):
+    """Overlay words whose text is known from EXIF: {word index: text}."""
+    taken = exif_datetime(image_path)
+    if taken is None:
+        return {}
+    return {
+        layout["words"]["date"]: taken.strftime(layout["date_format"]),
+        layout["words"]["time"]: taken.strftime(layout["time_format"]),
+    }
+
+
+def learn_templates(image_paths, labels=None):
+    """
+    Build glyph templates per camera model from frames whose overlay text is
+    known: the date and time words come from EXIF DateTimeOriginal, and
+    labels ({image path: full overlay text}) teach the remaining glyphs
+    (degree sign, units, AM/PM). Words whose glyph count doesn't match the
+    expected text are skipped.
+    """
+    import numpy as np
+
+    labels = labels or {}
+    sums = {}  # model -> char -> [sum vector, count]
+    for path in image_paths:
+        model, strip, layout = load_strip(path)
+        words = segment(strip)
+        if str(path) in labels:
+            known = dict(enumerate(labels[str(path)].split()))
+        else:
+            known = expected_words(path, layout)
+        for index, text in known.items():
+            if not -len(words) <= index < len(words) or len(words[index]) != len(text):
+                continue
+            model_sums = sums.setdefault(model, {})
+            for char, glyph in zip(text, words[index]):
+                entry = model_sums.setdefault(char, [np.zeros_like(glyph), 0])
+                entry[0] += glyph
+                entry[1] += 1
+    return {
+        model: save_templates(model, model_sums) for model, model_sums in sums.items()
+    }
+
+
+# -----------------------------
+# Recognition
+# -----------------------------
+
+
+def recognise(words, templates):
+    """Words of glyph vectors -> list of strings, one template match per glyph."""
+    import numpy as np
+
+    chars, glyphs = templates
+    if not words:
+        return []
+    flat = np.stack([g for word in words for g in word])
+    scores = flat @ glyphs.T
+    best = scores.argmax(axis=1)
+    text = [chars[b] if scores[i, b] >= MIN_MATCH else "?" for i, b in enumerate(best)]
+    out, k = [], 0
+    for word in words:
+        out.append("".join(text[k : k + len(word)]))
+        k += len(word)
+    return out
+
+
+def _word(words, index):
+    if index is None or not -len(words) <= index < len(words):
+        return None
+    return words[index]
+
+
+def parse_fields(words, layout):
+    """{"date": YYYY-MM-DD, "time": HH:MM:SS, "temperature": e.g. 43F}, None if unread."""
+    fields = {"date": None, "time": None, "temperature": None}
+    for key, fmt, out_fmt in [
+        ("date", layout["date_format"], "%Y-%m-%d"),
+        ("time", layout["time_format"], "%H:%M:%S"),
+    ]:
+        text = _word(words, layout["words"].get(key))
+        try:
+            fields[key] = datetime.strptime(text, fmt).strftime(out_fmt)
+        except (TypeError, ValueError):
+            pass
+    text = _word(words, layout["words"].get("temperature"))
+    m = re.fullmatch(r"(-?\d{1,3})(\D*)", text or "")
+    if m:
+        unit = next((u for u in "FC" if u in m.group(2)), layout["temperature_unit"])
+        fields["temperature"] = f"{int(m.group(1))}{unit}"
+    return fields
+
+
+def read_overlay(image_path):
+    """
+    OCR the burned-in overlay of one frame. Returns the parse_fields() dict
+    plus "text"; all None when the camera model has no templates yet.
+    """
+    from PIL import Image
+
+    with Image.open(image_path) as img:
+        return read_overlay_image(img)
+
+
+def read_overlay_image(img):
+    """read_overlay() for a frame that is open but not yet decoded."""
+    model, strip, layout = image_strip(img)
+    templates = load_templates(model)
+    if templates is None:
+        return {"date": None, "time": None, "temperature": None, "text": None}
+    words = recognise(segment(strip), templates)
+    return {**parse_fields(words, layout), "text": " ".join(words)}
+
+
+def overlay_fields(image_paths):
+    """
+    Date, time and temperature for a sequence: the first sampled frame whose
+    overlay reads completely. None when no frame does.
+    """
+    for path in image_paths:
+        fields = read_overlay(path)
+        fields.pop("text")
+        if all(fields.values()):
+            return fields
+    return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Learn overlay glyph templates or read camera overlays."
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    learn = sub.add_parser("learn", help="Learn templates from frames with EXIF times")
+    learn.add_argument("root", type=str, help="Image folder or tree")
+    learn.add_argument("--limit", type=int, default=500, help="Frames to learn from")
+    learn.add_argument(
+        "--label",
+        nargs=2,
+        action="append",
+        default=[],
+        metavar=("IMAGE", "TEXT"),
+        help="Full overlay text of one frame, to teach units and symbols",
+    )
+    read = sub.add_parser("read", help="OCR the overlay of some frames")
+    read.add_argument("images", nargs="+")
+    args = parser.parse_args()
+    if args.command == "learn":
+        paths = sorted(get_crawler().iter_files(args.root, IMAGE_EXTS))
+        step = max(1, len(paths) // args.limit)
+        labels = {image: text for image, text in args.label}
+        learned = learn_templates(paths[::step][: args.limit] + list(labels), labels)
+        for model, chars in learned.items():
+            print(
+                f"✅ {model or 'default'}: templates for {chars!r} -> {template_path(model)}"
+            )
+        if not learned:
+            print("❌ No overlay words matched their EXIF date/time; check the layout.")
+    else:
+        for image in args.images:
+            print(image, read_overlay(image))
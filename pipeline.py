@@ -0,0 +1,347 @@
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from crawler import get_crawler
+
+# -----------------------------
+# Configurable Parameters
+# -----------------------------
+
+FRAMES_DIR = "Frames"
+STATE_PATH = Path(".pipeline_state.json")
+MAX_WORKERS = 2
+PYTHON = sys.executable
+
+# -----------------------------
+# Stage Graph
+# -----------------------------
+
+
+def month_stages(month):
+    """
+    The per-month stages. Each stage lists the files or directories it reads
+    and writes; "deps" name stages that must finish first. "cmds" run in
+    order. Stages sharing a "serial" group never run at the same time.
+    """
+    frames = f"{FRAMES_DIR}/{month}"
+    predictions = f"results/predictions_{month}.json"
+    smoothed = f"results/predictions_{month}_smoothed.json"
+    batch_dir = f"preview_batch/predictions_{month}_smoothed"
+    csv_path = f"{batch_dir}/sequence_max_detections.csv"
+    lvlm_json = f"lvlm/{month}.json"
+    merged = f"{batch_dir}/merged_{month}.csv"
+    return [
+        {
+            "id": f"thumbs:{month}",
+            "deps": [],
+            "inputs": [frames],
+            "outputs": [f"thumbs/{month}.u8", f"thumbs/{month}.idx.json"],
+            "cmds": [[PYTHON, "thumb_store.py", "--months", month]],
+        },
+        {
+            "id": f"speciesnet:{month}",
+            "deps": [],
+            "inputs": [frames],
+            "outputs": [predictions, smoothed],
+            "cmds": [
+                [PYTHON, "run_speciesnet.py", "--base_dir", frames, "--single_run"]
+            ],
+        },
+        {
+            "id": f"convert_md:{month}",
+            "deps": [f"speciesnet:{month}"],
+            "inputs": [smoothed],
+            "outputs": [f"results_md/md_predictions_{month}_smoothed.json"],
+            "cmds": [
+                [PYTHON, "convert_speciesnet_to_md.py", "--results_file", smoothed]
+            ],
+        },
+        {
+            "id": f"postprocess:{month}",
+            "deps": [f"speciesnet:{month}"],
+            "inputs": [smoothed],
+            "outputs": [csv_path],
+            # video_match adds its match column to the CSV in place, so it runs
+            # here: the recorded fingerprint is then that of the final CSV
+            "cmds": [
+                [PYTHON, "postprocess_results.py", "--results_file", smoothed],
+                [
+                    PYTHON,
+                    "video_match.py",
+                    "--batch_dirs",
+                    batch_dir,
+                    "--mismatches_csv",
+                    f"{batch_dir}/mismatches.csv",
+                ],
+            ],
+        },
+        {
+            "id": f"lvlm:{month}",
+            "deps": [f"postprocess:{month}"],
+            "inputs": [frames, csv_path],
+            "outputs": [lvlm_json],
+            "cmds": [[PYTHON, "call_lvlm.py", "--root", frames]],
+            # Months share lvlm/'s log, metrics and sequence cache files
+            "serial": "lvlm",
+        },
+        {
+            "id": f"merge:{month}",
+            "deps": [f"lvlm:{month}"],
+            "inputs": [lvlm_json, csv_path],
+            "outputs": [merged],
+            "cmds": [[PYTHON, "merge.py", "--json_month", f"{month}.json"]],
+        },
+        {
+            "id": f"copy_images:{month}",
+            "deps": [f"merge:{month}"],
+            "inputs": [merged],
+            "outputs": [f"streamlit_app/updated_merged_{month}.csv"],
+            "cmds": [
+                [
+                    PYTHON,
+                    "streamlit_app/copy_images_and_update_csv.py",
+                    "--csv_path",
+                    merged,
+                ]
+            ],
+        },
+    ]
+
+
+def build_graph(months):
+    stages = []
+    for month in months:
+        stages.extend(month_stages(month))
+    csv_files = [
+        out
+        for s in stages
+        if s["id"].startswith("postprocess:")
+        for out in s["outputs"]
+    ]
+    stages.append(
+        {
+            "id": "evaluate",
+            "deps": [f"lvlm:{m}" for m in months],
+            "inputs": csv_files + [f"lvlm/{m}.json" for m in months],
+            "outputs": ["evaluation/report.json"],
+            "cmds": [[PYTHON, "evaluate.py", "--months", *months]],
+        }
+    )
+    return {s["id"]: s for s in stages}
+
+
+# -----------------------------
+# Fingerprints
+# -----------------------------
+
+
+class Fingerprinter:
+    """
+    Content hashes for files (sha1, re-read only when size/mtime change) and
+    listing hashes for directories (relative path, size and mtime of every
+    file, so a month of JPEGs is not re-read to detect a new sequence).
+    """
+
+    def __init__(self, cache):
+        self.cache = cache  # path -> [size, mtime_ns, sha1]
+
+    def file_hash(self, path):
+        st = os.stat(path)
+        cached = self.cache.get(path)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        digest = hashlib.sha1()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        self.cache[path] = [st.st_size, st.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def dir_hash(self, path):
+        digest = hashlib.sha1()
+        for file_path in sorted(get_crawler().iter_files(path)):
+            st = os.stat(file_path)
+            rel = os.path.relpath(file_path, path)
+            digest.update(f"{rel}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+        return digest.hexdigest()
+
+    def __call__(self, path):
+        if os.path.isdir(path):
+            return self.dir_hash(path)
+        if os.path.isfile(path):
+            return self.file_hash(path)
+        return None
+
+    def stage(self, stage):
+        return {p: self(p) for p in stage["inputs"] + stage["outputs"]}
+
+
+def load_state(path=STATE_PATH):
+    if path.exists():
+        with open(path, "r") as f:
+            return json.load(f)
+    return {"stages": {}, "hashes": {}}
+
+
+def save_state(state, path=STATE_PATH):
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp, path)
+
+
+# -----------------------------
+# Scheduler
+# -----------------------------
+
+
+def select(graph, targets):
+    """The target stages and everything they depend on."""
+    if not targets:
+        return set(graph)
+    wanted = set()
+    stack = [s for s in graph if any(s == t or s.startswith(t + ":") for t in targets)]
+    while stack:
+        stage_id = stack.pop()
+        if stage_id not in wanted:
+            wanted.add(stage_id)
+            stack.extend(graph[stage_id]["deps"])
+    return wanted
+
+
+def command_line(stage):
+    return " && ".join(" ".join(cmd) for cmd in stage["cmds"])
+
+
+def run_stage(stage, log_dir):
+    """Run the stage's commands in order, stopping at the first failure."""
+    log_path = log_dir / f"{stage['id'].replace(':', '_')}.log"
+    start = time.perf_counter()
+    code = 0
+    with open(log_path, "w") as log:
+        for cmd in stage["cmds"]:
+            log.write(f"$ {' '.join(cmd)}\n")
+            log.flush()
+            code = subprocess.run(cmd, stdout=log, stderr=subprocess.STDOUT).returncode
+            if code:
+                break
+    return code, time.perf_counter() - start, log_path
+
+
+def run(graph, targets=None, workers=MAX_WORKERS, force=False, dry_run=False):
+    """
+    Run the selected stages in dependency order, up to `workers` at a time.
+    A stage is skipped when its input and output fingerprints match those
+    recorded after its last successful run and none of its deps re-ran.
+    A ready stage waits while another stage of its serial group runs.
+    """
+    state = load_state()
+    fingerprint = Fingerprinter(state["hashes"])
+    wanted = select(graph, targets)
+    pending = {s: set(graph[s]["deps"]) & wanted for s in wanted}
+    report = {}
+    rebuilt = set()
+    log_dir = Path("logs") / "pipeline"
+    log_dir.mkdir(parents=True, exist_ok=True)
+
+    def is_current(stage_id):
+        if force or set(graph[stage_id]["deps"]) & rebuilt:
+            return False
+        recorded = state["stages"].get(stage_id, {}).get("fingerprint")
+        current = fingerprint.stage(graph[stage_id])
+        return recorded == current and all(v is not None for v in current.values())
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        running = {}
+        while pending or running:
+            ready = sorted(s for s, deps in pending.items() if not deps)
+            busy = {graph[s].get("serial") for s in running.values()} - {None}
+            for stage_id in ready:
+                if graph[stage_id].get("serial") in busy:
+                    continue
+                del pending[stage_id]
+                failed_deps = [
+                    d
+                    for d in graph[stage_id]["deps"]
+                    if report.get(d, {}).get("status") in ("failed", "blocked")
+                ]
+                if failed_deps:
+                    report[stage_id] = {"status": "blocked", "seconds": 0.0}
+                elif is_current(stage_id):
+                    report[stage_id] = {"status": "up-to-date", "seconds": 0.0}
+                elif dry_run:
+                    report[stage_id] = {"status": "would run", "seconds": 0.0}
+                    rebuilt.add(stage_id)
+                else:
+                    print(f"▶️  {stage_id}: {command_line(graph[stage_id])}")
+                    running[pool.submit(run_stage, graph[stage_id], log_dir)] = stage_id
+                    if graph[stage_id].get("serial"):
+                        busy.add(graph[stage_id]["serial"])
+                    continue
+                for deps in pending.values():
+                    deps.discard(stage_id)
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage_id = running.pop(future)
+                code, seconds, log_path = future.result()
+                if code == 0:
+                    rebuilt.add(stage_id)
+                    state["stages"][stage_id] = {
+                        "fingerprint": fingerprint.stage(graph[stage_id]),
+                        "seconds": seconds,
+                        "finished": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    }
+                    save_state(state)
+                    report[stage_id] = {"status": "ran", "seconds": seconds}
+                    print(f"✅ {stage_id} ({seconds:.1f}s)")
+                else:
+                    report[stage_id] = {"status": "failed", "seconds": seconds}
+                    print(f"❌ {stage_id} failed (exit {code}), see {log_path}")
+                for deps in pending.values():
+                    deps.discard(stage_id)
+    get_crawler().save_manifest()
+    return report
+
+
+def print_report(report):
+    print(f"\n{'stage':28s} {'status':12s} {'seconds':>9s}")
+    for stage_id in sorted(report):
+        r = report[stage_id]
+        print(f"{stage_id:28s} {r['status']:12s} {r['seconds']:9.1f}")
+    total = sum(r["seconds"] for r in report.values())
+    print(f"{'total stage time':28s} {'':12s} {total:9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Incrementally rebuild the camera-trap pipeline per month."
+    )
+    parser.add_argument(
+        "targets",
+        nargs="*",
+        help="Stages to build, e.g. merge or merge:202506 (default: everything)",
+    )
+    parser.add_argument(
+        "--months", nargs="*", default=None, help="Months to include (default: all)"
+    )
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    parser.add_argument("--force", action="store_true", help="Ignore recorded state")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Show what would run without running"
+    )
+    args = parser.parse_args()
+    months = args.months or get_crawler().list_dirs(FRAMES_DIR)
+    graph = build_graph(months)
+    report = run(graph, args.targets, args.workers, args.force, args.dry_run)
+    print_report(report)
+    if any(r["status"] == "failed" for r in report.values()):
+        sys.exit(1)
@@ -8,59 +8,75 @@ preview_dir = "preview"
 preview_batch_dir = "preview_batch"
 images_dir = "/home/sronen/code/wildaware/cameratrap"
 
-# Argument parser
-parser = argparse.ArgumentParser()
-parser.add_argument(
-    "--include_all",
-    action="store_true",
-    help="include human and blank",
-)
-args = parser.parse_args()
 
-# List all results files in results_dir
-results_files = [f for f in os.listdir(results_dir) if f.endswith("smoothed.json")]
+def main(results_file=None, include_all=False):
+    """Preview HTML and batch postprocessing (sequence CSVs) per smoothed results file."""
+    # List all results files in results_dir
+    if results_file:
+        results_files = [os.path.basename(results_file)]
+    else:
+        results_files = [
+            f for f in os.listdir(results_dir) if f.endswith("smoothed.json")
+        ]
 
-for results_file in results_files:
-    results_path = os.path.join(results_dir, results_file)
-    # Use a unique html output file per results file
-    html_output_file = f"preview/preview_{os.path.splitext(results_file)[0]}.html"
-    # Create a unique preview subdirectory for each results file
-    preview_subdir = os.path.join(preview_dir, os.path.splitext(results_file)[0])
-    os.makedirs(preview_subdir, exist_ok=True)
-    # Visualization command
-    cmd_vis = [
-        "python",
-        "-m",
-        "megadetector.visualization.visualize_detector_output",
-        results_path,
-        preview_subdir,
-        "--images_dir",
-        images_dir,
-        "--html_output_file",
-        html_output_file,
-    ]
-    # print(f'Running: {" ".join(cmd_vis)}')
-    subprocess.run(cmd_vis, check=True)
-    # Create a unique preview_batch subdirectory for each results file
-    preview_batch_subdir = os.path.join(
-        preview_batch_dir, os.path.splitext(results_file)[0]
+    for results_file in results_files:
+        results_path = os.path.join(results_dir, results_file)
+        # Use a unique html output file per results file
+        html_output_file = f"preview/preview_{os.path.splitext(results_file)[0]}.html"
+        # Create a unique preview subdirectory for each results file
+        preview_subdir = os.path.join(preview_dir, os.path.splitext(results_file)[0])
+        os.makedirs(preview_subdir, exist_ok=True)
+        # Visualization command
+        cmd_vis = [
+            "python",
+            "-m",
+            "megadetector.visualization.visualize_detector_output",
+            results_path,
+            preview_subdir,
+            "--images_dir",
+            images_dir,
+            "--html_output_file",
+            html_output_file,
+        ]
+        # print(f'Running: {" ".join(cmd_vis)}')
+        subprocess.run(cmd_vis, check=True)
+        # Create a unique preview_batch subdirectory for each results file
+        preview_batch_subdir = os.path.join(
+            preview_batch_dir, os.path.splitext(results_file)[0]
+        )
+        os.makedirs(preview_batch_subdir, exist_ok=True)
+        # Batch postprocess command
+        print(results_path, preview_batch_subdir)
+        cmd_batch = [
+            "python",
+            "-m",
+            "megadetector.postprocessing.postprocess_batch_results",
+            results_path,
+            preview_batch_subdir,
+            "--num_images_to_sample",
+            "-1",
+            "--image_base_dir",
+            images_dir,
+            "--separate_animals_by_classification",
+        ]
+        if include_all:
+            cmd_batch.append("--include_all")
+        print(f'Running: {" ".join(cmd_batch)}')
+        subprocess.run(cmd_batch, check=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--include_all",
+        action="store_true",
+        help="include human and blank",
+    )
+    parser.add_argument(
+        "--results_file",
+        type=str,
+        default=None,
+        help="Process only this smoothed results file (default: all)",
     )
-    os.makedirs(preview_batch_subdir, exist_ok=True)
-    # Batch postprocess command
-    print(results_path, preview_batch_subdir)
-    cmd_batch = [
-        "python",
-        "-m",
-        "megadetector.postprocessing.postprocess_batch_results",
-        results_path,
-        preview_batch_subdir,
-        "--num_images_to_sample",
-        "-1",
-        "--image_base_dir",
-        images_dir,
-        "--separate_animals_by_classification",
-    ]
-    if args.include_all:
-        cmd_batch.append("--include_all")
-    print(f'Running: {" ".join(cmd_batch)}')
-    subprocess.run(cmd_batch, check=True)
+    args = parser.parse_args()
+    main(args.results_file, args.include_all)
@@ -1,6 +1,7 @@
 import os
 import subprocess
 import argparse
+from crawler import get_crawler
 
 # Parameters
 country = "USA"
@@ -11,46 +12,79 @@ IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".tiff", ".bmp", ".gif"}
 
 
 def contains_images(path):
-    return any(
-        f.lower().endswith(tuple(IMAGE_EXTS))
-        for f in os.listdir(path)
-        if os.path.isfile(os.path.join(path, f))
-    )
+    return bool(get_crawler().list_files(path, IMAGE_EXTS))
+
 
+def main(
+    base_dir,
+    group_by_folder=False,
+    time_gap_minutes=None,
+    video_dir=None,
+    cull=False,
+    single_run=False,
+    backend="speciesnet",
+    precision="fp32",
+):
+    if video_dir is not None:
+        # Decode only the sampled video frames into base_dir/<month>/<video>/
+        from video_ingest import ingest_videos
 
-def main(base_dir, group_by_folder=False, time_gap_minutes=None):
+        ingest_videos(video_dir, frames_root=base_dir)
     # If base_dir contains images, run on base_dir itself
 
     os.makedirs("results", exist_ok=True)
-    if contains_images(base_dir):
+    if single_run or contains_images(base_dir):
         folders = [base_dir]
     else:
         # Otherwise, run on each subfolder
-        folders = [
-            os.path.join(base_dir, f)
-            for f in os.listdir(base_dir)
-            if os.path.isdir(os.path.join(base_dir, f))
-        ]
+        folders = [os.path.join(base_dir, f) for f in get_crawler().list_dirs(base_dir)]
+    get_crawler().save_manifest()
 
     for folder_path in folders:
         folder_name = os.path.basename(folder_path)
         output_json = f"results/predictions_{folder_name}.json"
-        cmd = [
-            "python",
-            "-m",
-            "speciesnet.scripts.run_model",
-            "--folders",
-            folder_path,
-            "--predictions_json",
-            output_json,
-            "--country",
-            country,
-            "--admin1_region",
-            admin1_region,
-            # "--geo_distribute",
-        ]
-        print(f'Running: {" ".join(cmd)}')
-        subprocess.run(cmd, check=True)
+        if cull:
+            # Only moving frames and one frame per near-duplicate burst
+            from burst_cull import cull_tree, write_filepaths_txt
+
+            plan = cull_tree(folder_path)
+            filepaths_txt = f"results/filepaths_{folder_name}.txt"
+            write_filepaths_txt(plan, filepaths_txt)
+            input_args = ["--filepaths_txt", filepaths_txt]
+        else:
+            input_args = ["--folders", folder_path]
+        if backend == "onnx":
+            # Exported, optionally int8-quantized models on ONNX Runtime, run
+            # in-process so a warm cameratrap daemon keeps the sessions loaded
+            from speciesnet_onnx import run as run_onnx
+
+            run_onnx(
+                [input_args[1]],
+                output_json,
+                precision=precision,
+                country=country,
+                admin1_region=admin1_region,
+            )
+        else:
+            cmd = [
+                "python",
+                "-m",
+                "speciesnet.scripts.run_model",
+                *input_args,
+                "--predictions_json",
+                output_json,
+                "--country",
+                country,
+                "--admin1_region",
+                admin1_region,
+                # "--geo_distribute",
+            ]
+            print(f'Running: {" ".join(cmd)}')
+            subprocess.run(cmd, check=True)
+        if cull:
+            from burst_cull import propagate_labels
+
+            propagate_labels(output_json, plan)
 
         cmd = [
             "python",
@@ -92,5 +126,42 @@ if __name__ == "__main__":
         default=None,
         help="Time gap (in minutes) for sequence_smoothing.",
     )
+    parser.add_argument(
+        "--video_dir",
+        type=str,
+        default=None,
+        help="Ingest camera videos from this folder into base_dir before running.",
+    )
+    parser.add_argument(
+        "--cull",
+        action="store_true",
+        help="Skip static and near-duplicate frames, then copy their labels back.",
+    )
+    parser.add_argument(
+        "--single_run",
+        action="store_true",
+        help="Run once on base_dir as a whole (e.g. one Frames/<month>), not per subfolder.",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["speciesnet", "onnx"],
+        default="speciesnet",
+        help="Inference backend: stock SpeciesNet or the exported ONNX Runtime models.",
+    )
+    parser.add_argument(
+        "--precision",
+        choices=["fp32", "int8"],
+        default="fp32",
+        help="ONNX model precision (with --backend onnx).",
+    )
     args = parser.parse_args()
-    main(args.base_dir, args.group_by_folder, args.time_gap_minutes)
+    main(
+        args.base_dir,
+        args.group_by_folder,
+        args.time_gap_minutes,
+        args.video_dir,
+        args.cull,
+        args.single_run,
+        args.backend,
+        args.precision,
+    )
@@ -0,0 +1,454 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from crawler import get_crawler
+
+# -----------------------------
+# Configurable Parameters
+# -----------------------------
+
+ONNX_DIR = Path("models") / "speciesnet_onnx"
+IMAGE_EXTS = (".jpg", ".jpeg", ".png")
+DETECTOR_SIZE = 1280  # MegaDetector v5 input (letterboxed square)
+CLASSIFIER_SIZE = 480  # SpeciesNet classifier input
+DETECTION_CONF_MIN = 0.01  # detections kept in the predictions JSON
+NMS_IOU = 0.45
+MAX_DETECTIONS = 300
+TOP_K = 5  # classifier classes kept per image, as in run_model output
+DETECTION_LABELS = {1: "animal", 2: "human", 3: "vehicle"}
+PRECISIONS = ("fp32", "int8")
+# int8 is opt-in: export --no-quantize skips it and it is not always faster
+DEFAULT_PRECISION = "fp32"  # the CLI and run_speciesnet.py default too
+
+
+def model_path(model_dir, name, precision):
+    suffix = "" if precision == "fp32" else f".{precision}"
+    return Path(model_dir) / f"{name}{suffix}.onnx"
+
+
+# -----------------------------
+# Export
+# -----------------------------
+
+
+def _torch_module(component):
+    """The torch.nn.Module inside a SpeciesNet detector/classifier wrapper."""
+    module = component.model
+    # yolov5's DetectMultiBackend / AutoShape keep the network in .model
+    while not hasattr(module, "state_dict") or hasattr(module, "pt"):
+        module = module.model
+    return module.float().eval()
+
+
+def export(model_dir=ONNX_DIR, model_name=None, quantize=True, opset=17):
+    """
+    Export the SpeciesNet detector and classifier to ONNX (and int8 dynamic
+    quantized copies), plus meta.json with the labels and input layout.
+    """
+    import numpy as np
+    import torch
+    from speciesnet import DEFAULT_MODEL
+    from speciesnet.classifier import SpeciesNetClassifier
+    from speciesnet.detector import SpeciesNetDetector
+
+    model_name = model_name or DEFAULT_MODEL
+    model_dir = Path(model_dir)
+    model_dir.mkdir(parents=True, exist_ok=True)
+
+    detector = _torch_module(SpeciesNetDetector(model_name))
+    for module in detector.modules():
+        # yolov5 Detect: return only the concatenated predictions
+        if type(module).__name__ == "Detect":
+            module.export = True
+    torch.onnx.export(
+        detector,
+        torch.zeros(1, 3, DETECTOR_SIZE, DETECTOR_SIZE),
+        model_path(model_dir, "detector", "fp32"),
+        input_names=["images"],
+        output_names=["predictions"],
+        dynamic_axes={"images": {0: "batch"}, "predictions": {0: "batch"}},
+        opset_version=opset,
+    )
+
+    wrapper = SpeciesNetClassifier(model_name)
+    classifier = _torch_module(wrapper)
+    # The classifier was converted from Keras; find which layout it takes
+    layout, probe = None, None
+    for name, shape in [
+        ("nhwc", (1, CLASSIFIER_SIZE, CLASSIFIER_SIZE, 3)),
+        ("nchw", (1, 3, CLASSIFIER_SIZE, CLASSIFIER_SIZE)),
+    ]:
+        try:
+            with torch.no_grad():
+                probe = classifier(torch.rand(*shape))
+            layout = name
+            break
+        except RuntimeError:
+            continue
+    if layout is None:
+        raise RuntimeError("Could not find the classifier's input layout")
+    probe = probe.numpy()
+    is_softmax = bool(np.all(probe >= 0) and abs(probe.sum() - 1) < 1e-3)
+    torch.onnx.export(
+        classifier,
+        torch.zeros(*shape),
+        model_path(model_dir, "classifier", "fp32"),
+        input_names=["images"],
+        output_names=["scores"],
+        dynamic_axes={"images": {0: "batch"}, "scores": {0: "batch"}},
+        opset_version=opset,
+    )
+    meta = {
+        "model_name": model_name,
+        "classifier_layout": layout,
+        "classifier_softmax": is_softmax,
+        "always_crop": wrapper.model_info.type_ == "always_crop",
+        "labels": [wrapper.labels[i] for i in range(len(wrapper.labels))],
+    }
+    with open(model_dir / "meta.json", "w") as f:
+        json.dump(meta, f, indent=1)
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        for name in ["detector", "classifier"]:
+            quantize_dynamic(
+                model_path(model_dir, name, "fp32"),
+                model_path(model_dir, name, "int8"),
+                weight_type=QuantType.QInt8,
+                per_channel=True,
+            )
+    print(f"✅ Exported SpeciesNet ({model_name}) to {model_dir}")
+    return meta
+
+
+# -----------------------------
+# Pre/Post-processing
+# -----------------------------
+
+
+def letterbox(img, size=DETECTOR_SIZE):
+    """Resize keeping aspect into a size x size grey canvas, as yolov5 does."""
+    import numpy as np
+    from PIL import Image
+
+    scale = size / max(img.size)
+    w, h = round(img.width * scale), round(img.height * scale)
+    canvas = Image.new("RGB", (size, size), (114, 114, 114))
+    pad_x, pad_y = (size - w) // 2, (size - h) // 2
+    canvas.paste(img.resize((w, h), Image.Resampling.BILINEAR), (pad_x, pad_y))
+    arr = np.asarray(canvas, dtype=np.float32).transpose(2, 0, 1) / 255.0
+    return arr[None], scale, pad_x, pad_y
+
+
+def nms(boxes, scores, iou=NMS_IOU):
+    """Greedy non-maximum suppression on [x0, y0, x1, y1] boxes."""
+    import numpy as np
+
+    order = scores.argsort()[::-1]
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    keep = []
+    while order.size and len(keep) < MAX_DETECTIONS:
+        i = order[0]
+        keep.append(i)
+        xx0 = np.maximum(boxes[i, 0], boxes[order[1:], 0])
+        yy0 = np.maximum(boxes[i, 1], boxes[order[1:], 1])
+        xx1 = np.minimum(boxes[i, 2], boxes[order[1:], 2])
+        yy1 = np.minimum(boxes[i, 3], boxes[order[1:], 3])
+        inter = np.clip(xx1 - xx0, 0, None) * np.clip(yy1 - yy0, 0, None)
+        overlap = inter / (areas[i] + areas[order[1:]] - inter + 1e-9)
+        order = order[1:][overlap <= iou]
+    return np.array(keep, dtype=np.int64)
+
+
+def decode_detections(pred, img_size, scale, pad_x, pad_y):
+    """yolov5 output rows [cx, cy, w, h, obj, cls...] -> run_model detections."""
+    import numpy as np
+
+    pred = pred[pred[:, 4] > DETECTION_CONF_MIN]
+    if not len(pred):
+        return []
+    class_scores = pred[:, 5:] * pred[:, 4:5]
+    classes = class_scores.argmax(axis=1)
+    conf = class_scores.max(axis=1)
+    keep = conf > DETECTION_CONF_MIN
+    pred, classes, conf = pred[keep], classes[keep], conf[keep]
+    xy0 = pred[:, :2] - pred[:, 2:4] / 2
+    boxes = np.concatenate([xy0, xy0 + pred[:, 2:4]], axis=1)
+    # Class-aware NMS: offset boxes per class so classes never suppress each other
+    kept = nms(boxes + classes[:, None] * DETECTOR_SIZE * 2, conf)
+    width, height = img_size
+    detections = []
+    for i in kept:
+        x0 = (boxes[i, 0] - pad_x) / scale / width
+        y0 = (boxes[i, 1] - pad_y) / scale / height
+        x1 = (boxes[i, 2] - pad_x) / scale / width
+        y1 = (boxes[i, 3] - pad_y) / scale / height
+        x0, y0, x1, y1 = np.clip([x0, y0, x1, y1], 0.0, 1.0)
+        category = int(classes[i]) + 1
+        detections.append(
+            {
+                "category": str(category),
+                "label": DETECTION_LABELS.get(category, "animal"),
+                "conf": round(float(conf[i]), 4),
+                "bbox": [round(float(v), 4) for v in (x0, y0, x1 - x0, y1 - y0)],
+            }
+        )
+    return detections
+
+
+def classifier_input(img, detections, meta):
+    """Crop to the top detection (always_crop models) and resize for the classifier."""
+    import numpy as np
+    from PIL import Image
+
+    if meta["always_crop"] and detections:
+        x, y, w, h = detections[0]["bbox"]
+        box = (x * img.width, y * img.height, (x + w) * img.width, (y + h) * img.height)
+        img = img.crop(tuple(round(v) for v in box))
+    img = img.resize((CLASSIFIER_SIZE, CLASSIFIER_SIZE), Image.Resampling.BILINEAR)
+    arr = np.asarray(img, dtype=np.float32) / 255.0
+    if meta["classifier_layout"] == "nchw":
+        arr = arr.transpose(2, 0, 1)
+    return arr[None]
+
+
+def top_classes(scores, meta):
+    import numpy as np
+
+    if not meta["classifier_softmax"]:
+        scores = np.exp(scores - scores.max())
+        scores /= scores.sum()
+    top = np.argsort(scores)[::-1][:TOP_K]
+    return {
+        "classes": [meta["labels"][i] for i in top],
+        "scores": [round(float(scores[i]), 6) for i in top],
+    }
+
+
+# -----------------------------
+# Inference
+# -----------------------------
+
+
+class OnnxSpeciesNet:
+    """Detector + classifier ONNX Runtime sessions sharing one thread budget."""
+
+    def __init__(
+        self,
+        model_dir=ONNX_DIR,
+        precision=DEFAULT_PRECISION,
+        intra_threads=None,
+        inter_threads=1,
+    ):
+        import onnxruntime as ort
+
+        self.model_dir = Path(model_dir)
+        with open(self.model_dir / "meta.json", "r") as f:
+            self.meta = json.load(f)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = intra_threads or 0  # 0 = ORT default
+        options.inter_op_num_threads = inter_threads
+        providers = ["CPUExecutionProvider"]
+        self.detector = ort.InferenceSession(
+            str(model_path(model_dir, "detector", precision)),
+            options,
+            providers=providers,
+        )
+        self.classifier = ort.InferenceSession(
+            str(model_path(model_dir, "classifier", precision)),
+            options,
+            providers=providers,
+        )
+        self._ensemble = None
+
+    @property
+    def ensemble(self):
+        """SpeciesNet's ensemble (rollups and geofencing), loaded on first use."""
+        if self._ensemble is None:
+            from speciesnet.ensemble import SpeciesNetEnsemble
+
+            self._ensemble = SpeciesNetEnsemble(self.meta["model_name"], geofence=True)
+        return self._ensemble
+
+    def predict_image(self, filepath):
+        """(detector result, classifier result) dicts in SpeciesNet's format."""
+        from PIL import Image
+
+        try:
+            with Image.open(filepath) as img:
+                img = img.convert("RGB")
+        except Exception:
+            return (
+                {"filepath": filepath, "failures": ["DETECTOR"]},
+                {"filepath": filepath, "failures": ["CLASSIFIER"]},
+            )
+        arr, scale, pad_x, pad_y = letterbox(img)
+        pred = self.detector.run(None, {"images": arr})[0][0]
+        detections = decode_detections(pred, img.size, scale, pad_x, pad_y)
+        scores = self.classifier.run(
+            None, {"images": classifier_input(img, detections, self.meta)}
+        )[0][0]
+        return (
+            {"filepath": filepath, "detections": detections},
+            {"filepath": filepath, "classifications": top_classes(scores, self.meta)},
+        )
+
+
+def predict_files(filepaths, model, workers=1, country=None, admin1_region=None):
+    """
+    Run the ONNX models over filepaths on `workers` threads (ONNX Runtime
+    releases the GIL) and combine the results with SpeciesNet's own
+    ensemble, so rollups and geofencing match run_model exactly.
+    """
+    detector_results, classifier_results = {}, {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for det, cls in pool.map(model.predict_image, filepaths):
+            detector_results[det["filepath"]] = det
+            classifier_results[cls["filepath"]] = cls
+    geolocation_results = {
+        fp: {"country": country, "admin1_region": admin1_region} for fp in filepaths
+    }
+    return model.ensemble.combine(
+        filepaths=filepaths,
+        classifier_results=classifier_results,
+        detector_results=detector_results,
+        geolocation_results=geolocation_results,
+        partial_predictions={},
+    )
+
+
+def load_thread_config(model_dir=ONNX_DIR):
+    path = Path(model_dir) / "threads.json"
+    if path.exists():
+        with open(path, "r") as f:
+            return json.load(f)
+    return {"workers": 1, "intra_threads": os.cpu_count() or 1}
+
+
+def tune_threads(
+    filepaths, model_dir=ONNX_DIR, precision=DEFAULT_PRECISION, cores=None
+):
+    """
+    Time worker x intra-op thread splits of the cores on a few images and
+    store the fastest in threads.json. Many small sessions usually beat one
+    wide one for per-image CNN inference.
+    """
+    cores = cores or os.cpu_count() or 1
+    trials = []
+    workers = 1
+    while workers <= cores:
+        intra = max(1, cores // workers)
+        model = OnnxSpeciesNet(model_dir, precision, intra)
+        model.predict_image(filepaths[0])  # warm-up
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(model.predict_image, filepaths))
+        rate = len(filepaths) / (time.perf_counter() - start)
+        trials.append(
+            {"workers": workers, "intra_threads": intra, "images_per_second": rate}
+        )
+        print(f"workers={workers} intra={intra}: {rate:.2f} images/s")
+        workers *= 2
+    best = max(trials, key=lambda t: t["images_per_second"])
+    with open(Path(model_dir) / "threads.json", "w") as f:
+        json.dump({**best, "trials": trials}, f, indent=1)
+    print(f"✅ Best: {best['workers']} workers x {best['intra_threads']} threads")
+    return best
+
+
+# Loaded models, reused by later runs in the same process (e.g. the cameratrap daemon)
+_MODELS = {}
+
+
+def get_model(model_dir=ONNX_DIR, precision=DEFAULT_PRECISION, intra_threads=None):
+    key = (str(model_dir), precision, intra_threads)
+    if key not in _MODELS:
+        _MODELS[key] = OnnxSpeciesNet(model_dir, precision, intra_threads)
+    return _MODELS[key]
+
+
+def run(
+    inputs,
+    predictions_json,
+    model_dir=ONNX_DIR,
+    precision=DEFAULT_PRECISION,
+    country=None,
+    admin1_region=None,
+    workers=None,
+    intra_threads=None,
+):
+    """
+    Predict every image in inputs (folders or a filepaths .txt) and write a
+    predictions JSON in run_model's format.
+    """
+    filepaths = []
+    for item in inputs:
+        if str(item).endswith(".txt"):
+            with open(item, "r") as f:
+                filepaths.extend(line.strip() for line in f if line.strip())
+        else:
+            filepaths.extend(sorted(get_crawler().iter_files(item, IMAGE_EXTS)))
+    threads = load_thread_config(model_dir)
+    model = get_model(model_dir, precision, intra_threads or threads["intra_threads"])
+    start = time.perf_counter()
+    predictions = predict_files(
+        filepaths, model, workers or threads["workers"], country, admin1_region
+    )
+    seconds = time.perf_counter() - start
+    with open(predictions_json, "w") as f:
+        json.dump({"predictions": predictions}, f, indent=1)
+    print(
+        f"✅ {len(filepaths)} images in {seconds:.1f}s "
+        f"({len(filepaths) / seconds:.2f} images/s, {precision}) -> {predictions_json}"
+    )
+    return predictions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="SpeciesNet on ONNX Runtime (CPU): export, tune and run."
+    )
+    parser.add_argument("--model_dir", type=str, default=str(ONNX_DIR))
+    sub = parser.add_subparsers(dest="command", required=True)
+    exp = sub.add_parser("export", help="Export the models to ONNX")
+    exp.add_argument("--model", type=str, default=None, help="SpeciesNet model name")
+    exp.add_argument("--no-quantize", action="store_true", help="Skip int8 copies")
+    tune = sub.add_parser("tune", help="Pick worker/thread counts for this machine")
+    tune.add_argument("folder", type=str)
+    tune.add_argument("--images", type=int, default=32)
+    tune.add_argument("--precision", choices=PRECISIONS, default=DEFAULT_PRECISION)
+    run_p = sub.add_parser("run", help="Write a predictions JSON")
+    run_p.add_argument("--folders", nargs="*", default=[])
+    run_p.add_argument("--filepaths_txt", type=str, default=None)
+    run_p.add_argument("--predictions_json", type=str, required=True)
+    run_p.add_argument("--precision", choices=PRECISIONS, default=DEFAULT_PRECISION)
+    run_p.add_argument("--country", type=str, default=None)
+    run_p.add_argument("--admin1_region", type=str, default=None)
+    run_p.add_argument("--workers", type=int, default=None)
+    run_p.add_argument("--intra_threads", type=int, default=None)
+    args = parser.parse_args()
+    if args.command == "export":
+        export(args.model_dir, args.model, quantize=not args.no_quantize)
+    elif args.command == "tune":
+        paths = sorted(get_crawler().iter_files(args.folder, IMAGE_EXTS))
+        step = max(1, len(paths) // args.images)
+        tune_threads(paths[::step][: args.images], args.model_dir, args.precision)
+    else:
+        inputs = args.folders + ([args.filepaths_txt] if args.filepaths_txt else [])
+        run(
+            inputs,
+            args.predictions_json,
+            args.model_dir,
+            args.precision,
+            args.country,
+            args.admin1_region,
+            args.workers,
+            args.intra_threads,
+        )
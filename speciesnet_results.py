@@ -0,0 +1,119 @@
+import csv
+import json
+import os
+from pathlib import Path
+
+RESULTS_DIR = "results"
+PREVIEW_BATCH_DIR = "preview_batch"
+
+
+def predictions_json_path(month, results_dir=RESULTS_DIR):
+    return Path(results_dir) / f"predictions_{month}_smoothed.json"
+
+
+def sequence_csv_path(month, preview_batch_dir=PREVIEW_BATCH_DIR):
+    return (
+        Path(preview_batch_dir)
+        / f"predictions_{month}_smoothed"
+        / "sequence_max_detections.csv"
+    )
+
+
+def common_name(label):
+    """
+    Reduce a SpeciesNet label to its common name, e.g.
+    "uuid;mammalia;cetartiodactyla;cervidae;cervus;canadensis;elk" -> "elk".
+    """
+    if not label:
+        return "blank"
+    return label.split(";")[-1].strip().lower() or "blank"
+
+
+def _from_speciesnet(data):
+    records = {}
+    for pred in data.get("predictions", []):
+        detections = [
+            {
+                "label": det.get("label", ""),
+                "conf": det.get("conf", 0.0),
+                "bbox": det.get("bbox"),
+            }
+            for det in pred.get("detections", [])
+        ]
+        records[pred["filepath"]] = {
+            "species": common_name(pred.get("prediction")),
+            "score": pred.get("prediction_score"),
+            "detections": detections,
+        }
+    return records
+
+
+def _from_megadetector(data):
+    det_names = data.get("detection_categories", {})
+    cls_names = data.get("classification_categories", {})
+    records = {}
+    for image in data.get("images", []):
+        detections = []
+        species, score = "blank", None
+        for det in image.get("detections") or []:
+            detections.append(
+                {
+                    "label": det_names.get(det.get("category"), "animal"),
+                    "conf": det.get("conf", 0.0),
+                    "bbox": det.get("bbox"),
+                }
+            )
+            for category, conf in det.get("classifications") or []:
+                if score is None or conf > score:
+                    species, score = common_name(cls_names.get(category)), conf
+        if score is None:
+            # No classification: fall back to the strongest detector box
+            if detections:
+                best = max(detections, key=lambda d: d["conf"])
+                species, score = best["label"], best["conf"]
+            else:
+                species, score = "blank", 1.0
+        records[image["file"]] = {
+            "species": species,
+            "score": score,
+            "detections": detections,
+        }
+    return records
+
+
+def load_predictions(path):
+    """
+    Load a SpeciesNet predictions JSON (native or MegaDetector format) as
+    {file path: {"species", "score", "detections": [{"label", "conf", "bbox"}]}}.
+    Boxes are normalised [x_min, y_min, width, height].
+    """
+    with open(path, "r") as f:
+        data = json.load(f)
+    if "predictions" in data:
+        return _from_speciesnet(data)
+    return _from_megadetector(data)
+
+
+def predictions_by_folder(records):
+    """Group load_predictions() records by their parent folder."""
+    folders = {}
+    cwd = os.getcwd()
+    for file_path, record in records.items():
+        file_path = os.path.normpath(file_path)
+        if os.path.isabs(file_path) and file_path.startswith(cwd + os.sep):
+            file_path = os.path.relpath(file_path, cwd)
+        folder = os.path.dirname(file_path)
+        folders.setdefault(folder, {})[os.path.basename(file_path)] = record
+    return folders
+
+
+def load_sequence_rows(month, preview_batch_dir=PREVIEW_BATCH_DIR):
+    """Rows of sequence_max_detections.csv keyed by sequence folder."""
+    csv_path = sequence_csv_path(month, preview_batch_dir)
+    rows = {}
+    if not csv_path.exists():
+        return rows
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            rows.setdefault(os.path.dirname(row["file_name"]), row)
+    return rows
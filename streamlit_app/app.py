@@ -1,10 +1,35 @@
 import streamlit as st
 import pandas as pd
 import os
+import sys
 
 st.set_page_config(layout="wide")
 
 
+REPO_ROOT = os.path.join(os.path.dirname(__file__), "..")
+_THUMB_STORES = {}
+
+
+def stored_thumbnail(sample_image):
+    """Thumbnail from the packed store (thumb_store.py) when the copy is missing."""
+    if not isinstance(sample_image, str):
+        return None
+    frame_path = sample_image.split("images/", 1)[-1]  # images/Frames/... -> Frames/...
+    parts = frame_path.split("/")
+    if len(parts) < 3:
+        return None
+    month = parts[1]
+    if month not in _THUMB_STORES:
+        sys.path.insert(0, REPO_ROOT)
+        from thumb_store import ThumbStore
+
+        store = ThumbStore(month, root=os.path.join(REPO_ROOT, "thumbs"))
+        _THUMB_STORES[month] = store if store.frames else None
+    store = _THUMB_STORES[month]
+    entry = store.frames.get(frame_path) if store else None
+    return store.array()[entry["slot"]] if entry else None
+
+
 def visualize_merged_csv(csv_path):
     script_dir = os.path.dirname(__file__)  # this is streamlit_app/
     # Visualize merged wildlife camera trap data from a CSV file using Streamlit.
@@ -25,7 +50,12 @@ def visualize_merged_csv(csv_path):
             row = rows[idx]
             with col:
                 img_path = os.path.join(script_dir, row["sample_image"])
-                if img_path and os.path.exists(img_path):
+                thumbnail = None
+                if not (img_path and os.path.exists(img_path)):
+                    thumbnail = stored_thumbnail(row["sample_image"])
+                if thumbnail is not None:
+                    st.image(thumbnail, use_container_width=True)
+                elif img_path and os.path.exists(img_path):
                     st.image(img_path, use_container_width=True)
                 else:
                     st.write("No image")
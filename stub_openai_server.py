@@ -0,0 +1,440 @@
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# -----------------------------
+# Configurable Parameters
+# -----------------------------
+
+DEFAULT_PORT = 8089
+TOKENS_PER_IMAGE = 765  # 720p image at high detail
+TOKENS_PER_LOW_DETAIL_IMAGE = 85
+CHARS_PER_TOKEN = 4  # output text is streamed in pieces of this size
+RUNAWAY_TEXT = " and the animal keeps moving through the frame"
+
+STUB_SPECIES = [
+    ("elk", "Cervus canadensis (elk)"),
+    ("deer", "Odocoileus hemionus (mule deer)"),
+    ("moose", "Alces alces (moose)"),
+    ("bear", "Ursus americanus (black bear)"),
+    ("coyote", "Canis latrans (coyote)"),
+    ("fox", "Vulpes vulpes (red fox)"),
+]
+STUB_ACTIVITIES = ["grazing", "browsing", "walking", "resting", "alert", "drinking"]
+
+
+class StubConfig:
+    """Latency and fault-injection settings shared by all request handlers."""
+
+    def __init__(
+        self,
+        latency_ms=300,
+        jitter_ms=100,
+        ms_per_output_token=10,
+        rate_limit_prob=0.0,
+        server_error_prob=0.0,
+        malformed_prob=0.0,
+        runaway_prob=0.0,
+        retry_after=1.0,
+        rpm=None,
+        seed=0,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.ms_per_output_token = ms_per_output_token
+        self.rate_limit_prob = rate_limit_prob
+        self.server_error_prob = server_error_prob
+        self.malformed_prob = malformed_prob
+        self.runaway_prob = runaway_prob
+        self.retry_after = retry_after
+        self.rpm = rpm
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.request_times = []
+        self.stats = {
+            "requests": 0,
+            "ok": 0,
+            "429": 0,
+            "5xx": 0,
+            "malformed": 0,
+            "runaway": 0,
+            "streamed": 0,
+            "aborted": 0,
+        }
+
+    def draw(self):
+        with self.lock:
+            return self.rng.random()
+
+    def over_quota(self):
+        """Sliding one-minute window request quota, like a provider RPM limit."""
+        if not self.rpm:
+            return False
+        now = time.monotonic()
+        with self.lock:
+            self.request_times = [t for t in self.request_times if now - t < 60]
+            if len(self.request_times) >= self.rpm:
+                return True
+            self.request_times.append(now)
+            return False
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+
+def fake_analysis(rng):
+    """A plausible analysis object in the call_lvlm schema."""
+    key, species = rng.choice(STUB_SPECIES)
+    count = rng.randint(0, 3)
+    individuals = [
+        {
+            "id": f"{key}_{i + 1}",
+            "species": species,
+            "sex": rng.choice(["male", "female", "unknown"]),
+            "approx_age": rng.choice(["young", "adult"]),
+            "health": "healthy",
+            "activity": rng.choice(STUB_ACTIVITIES),
+            "interaction": (
+                "none" if count == 1 else f"near {key}_{(i + 1) % count + 1}"
+            ),
+            "notes": "",
+        }
+        for i in range(count)
+    ]
+    return {
+        "date": f"2025-06-{rng.randint(1, 28):02d}",
+        "time": f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}",
+        "habitat": rng.choice(
+            ["aspen meadow", "riparian zone", "mixed conifer forest"]
+        ),
+        "temperature": f"{rng.randint(20, 80)}F",
+        "weather": rng.choice(["sunny", "cloudy", "snowy", "unknown"]),
+        "count": count,
+        "individuals": individuals,
+        "summary": (
+            f"{count} {species} observed in the scene."
+            if count
+            else "No animals are visible in the sequence."
+        ),
+    }
+
+
+def fake_compact_analysis(rng):
+    """A plausible answer in the lvlm_compact wire format."""
+    count = rng.randint(0, 3)
+    code = rng.choice(["ELK", "MUDE", "MOOS", "BLBE", "COYO", "RFOX"])
+    return {
+        "d": f"2025-06-{rng.randint(1, 28):02d}",
+        "t": rng.choice(["day", "night"]),
+        "hb": rng.choice(["aspen meadow", "riparian", "conifer forest"]),
+        "tp": f"{rng.randint(20, 80)}F",
+        "w": rng.choice(["sunny", "cloudy", "?"]),
+        "n": count,
+        "ind": [
+            {
+                "s": code,
+                "x": rng.choice("MFU"),
+                "a": rng.choice("YA"),
+                "h": "H",
+                "c": rng.choice(["GR", "BR", "WA", "AL"]),
+                "i": 0,
+                "o": "",
+            }
+            for _ in range(count)
+        ],
+        "sm": f"{count} animal(s) in the scene." if count else "No animals visible.",
+    }
+
+
+def requested_schema(request):
+    response_format = request.get("response_format") or {}
+    return response_format.get("json_schema", {}).get("schema", {})
+
+
+def packed_sequences(request):
+    """Number of "=== Sequence k" markers in a packed request."""
+    return sum(
+        part.get("text", "").startswith("=== Sequence")
+        for message in request.get("messages", [])
+        if isinstance(message.get("content"), list)
+        for part in message["content"]
+    )
+
+
+def fake_response(request, rng):
+    """An answer shaped like the requested schema: full, compact or packed."""
+    schema = requested_schema(request)
+    packed = "sequences" in schema.get("properties", {})
+    if packed:
+        schema = schema["properties"]["sequences"]["items"]
+    properties = set(schema.get("properties", {}))
+
+    def one():
+        analysis = (
+            fake_compact_analysis(rng) if "ind" in properties else fake_analysis(rng)
+        )
+        if properties:
+            # e.g. date/time/temperature left out when OCR already read them
+            analysis = {k: v for k, v in analysis.items() if k in properties}
+        return analysis
+
+    if not packed:
+        return one()
+    return {
+        "sequences": [
+            {"sequence": k, **one()} for k in range(1, packed_sequences(request) + 1)
+        ]
+    }
+
+
+def malformed(text, rng):
+    """Damage a JSON string the way real model output goes wrong."""
+    choice = rng.randrange(3)
+    if choice == 0:
+        return text[: len(text) * 2 // 3]  # truncated
+    if choice == 1:
+        return text.replace('"individuals": [', '"individuals": [,', 1)  # bad syntax
+    return "Here is the analysis:\n```json\n" + text.replace("}", "},", 1) + "\n```"
+
+
+def runaway(text, repeats=500):
+    """A response whose last string rambles on until it hits max_tokens."""
+    end = text.rfind('"')
+    return text[:end] + RUNAWAY_TEXT * repeats + text[end:]
+
+
+def estimate_prompt_tokens(messages):
+    tokens = 0
+    for message in messages:
+        content = message.get("content", "")
+        if isinstance(content, str):
+            tokens += len(content) // 4
+            continue
+        for part in content:
+            if part.get("type") == "text":
+                tokens += len(part.get("text", "")) // 4
+            elif part.get("type") == "image_url":
+                detail = part.get("image_url", {}).get("detail", "auto")
+                tokens += (
+                    TOKENS_PER_LOW_DETAIL_IMAGE if detail == "low" else TOKENS_PER_IMAGE
+                )
+    return tokens
+
+
+# -----------------------------
+# HTTP Handler
+# -----------------------------
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    config = None  # set by make_server
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body, headers=None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def send_event(self, body):
+        self.wfile.write(f"data: {json.dumps(body)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def send_stream(self, request, text, finish_reason, prompt_tokens):
+        """
+        Server-sent chat.completion.chunk events, one per CHARS_PER_TOKEN
+        characters at ms_per_output_token, with a usage chunk when
+        stream_options.include_usage is set. Clients may hang up early.
+        """
+        config = self.config
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        base = {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-4o"),
+        }
+
+        def choice(delta, finish=None):
+            return {
+                **base,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+            }
+
+        sent = 0
+        try:
+            self.send_event(choice({"role": "assistant", "content": ""}))
+            for i in range(0, len(text), CHARS_PER_TOKEN):
+                time.sleep(config.ms_per_output_token / 1000.0)
+                self.send_event(choice({"content": text[i : i + CHARS_PER_TOKEN]}))
+                sent += 1
+            self.send_event(choice({}, finish_reason))
+            if (request.get("stream_options") or {}).get("include_usage"):
+                usage = {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": sent,
+                    "total_tokens": prompt_tokens + sent,
+                }
+                self.send_event({**base, "choices": [], "usage": usage})
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            config.count("aborted")
+            return
+        config.count("ok")
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self.send_json(200, {"object": "list", "data": [{"id": "gpt-4o"}]})
+        elif self.path.rstrip("/").endswith("/stats"):
+            self.send_json(200, self.config.stats)
+        else:
+            self.send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_json(404, {"error": {"message": "not found"}})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        config = self.config
+        config.count("requests")
+        if config.over_quota() or config.draw() < config.rate_limit_prob:
+            config.count("429")
+            self.send_json(
+                429,
+                {
+                    "error": {
+                        "message": "Rate limit reached",
+                        "type": "rate_limit_exceeded",
+                    }
+                },
+                {"Retry-After": f"{config.retry_after:g}"},
+            )
+            return
+        if config.draw() < config.server_error_prob:
+            config.count("5xx")
+            self.send_json(
+                503,
+                {
+                    "error": {
+                        "message": "The server is overloaded",
+                        "type": "server_error",
+                    }
+                },
+            )
+            return
+        with config.lock:
+            analysis = fake_response(request, config.rng)
+        text = json.dumps(analysis, indent=2)
+        if config.draw() < config.malformed_prob:
+            config.count("malformed")
+            with config.lock:
+                text = malformed(text, config.rng)
+        if config.draw() < config.runaway_prob:
+            config.count("runaway")
+            text = runaway(text)
+        # Like the real API, output stops at max_tokens
+        finish_reason = "stop"
+        max_chars = (request.get("max_tokens") or 4096) * CHARS_PER_TOKEN
+        if len(text) > max_chars:
+            text, finish_reason = text[:max_chars], "length"
+        prompt_tokens = estimate_prompt_tokens(request.get("messages", []))
+        if request.get("stream"):
+            config.count("streamed")
+            time.sleep((config.latency_ms + config.draw() * config.jitter_ms) / 1000.0)
+            self.send_stream(request, text, finish_reason, prompt_tokens)
+            return
+        completion_tokens = max(1, len(text) // CHARS_PER_TOKEN)
+        delay_ms = (
+            config.latency_ms
+            + config.draw() * config.jitter_ms
+            + completion_tokens * config.ms_per_output_token
+        )
+        time.sleep(delay_ms / 1000.0)
+        config.count("ok")
+        self.send_json(
+            200,
+            {
+                "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "gpt-4o"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": text},
+                        "finish_reason": finish_reason,
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            },
+        )
+
+
+def make_server(port=DEFAULT_PORT, host="127.0.0.1", **config_kwargs):
+    """Create a stub server; port=0 picks a free port (see server.server_port)."""
+    handler = type("ConfiguredStubHandler", (StubHandler,), {})
+    handler.config = StubConfig(**config_kwargs)
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def start_stub_server(port=0, **config_kwargs):
+    """Start a stub server on a daemon thread and return (server, base_url)."""
+    server = make_server(port, **config_kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_port}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Local OpenAI-compatible chat-completions stub for load testing."
+    )
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency_ms", type=float, default=300)
+    parser.add_argument("--jitter_ms", type=float, default=100)
+    parser.add_argument("--ms_per_output_token", type=float, default=10)
+    parser.add_argument("--rate_limit_prob", type=float, default=0.0)
+    parser.add_argument("--server_error_prob", type=float, default=0.0)
+    parser.add_argument("--malformed_prob", type=float, default=0.0)
+    parser.add_argument(
+        "--runaway_prob",
+        type=float,
+        default=0.0,
+        help="Chance a response rambles on until max_tokens",
+    )
+    parser.add_argument(
+        "--retry_after", type=float, default=1.0, help="Retry-After seconds on 429"
+    )
+    parser.add_argument(
+        "--rpm", type=int, default=None, help="Requests-per-minute quota before 429s"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    config = vars(args)
+    port = config.pop("port")
+    server = make_server(port, **config)
+    print(f"Stub OpenAI server listening on http://127.0.0.1:{port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,151 @@
+import re
+
+from lvlm_compact import SPECIES_CODES
+from lvlm_gate import SPECIESNET_ALIASES
+
+# -----------------------------
+# Shared Taxonomy Keys
+# -----------------------------
+
+BLANK = "blank"
+HUMAN = "human"
+VEHICLE = "vehicle"
+BIRD = "bird"
+UNKNOWN = "unknown animal"
+
+
+def _common(full_name):
+    """'Cervus canadensis (elk)' -> 'elk'; 'Aves (bird, unidentified)' -> 'bird'."""
+    common = full_name.split("(")[-1].rstrip(")")
+    return common.split(",")[0].strip().lower()
+
+
+# Taxonomy keys are the common names of the LVLM species table
+SPECIES_KEYS = {_common(name) for name in SPECIES_CODES.values()}
+BIRD_KEYS = {
+    _common(SPECIES_CODES[code])
+    for code in [
+        "TURK",
+        "GHOW",
+        "GBHE",
+        "MALL",
+        "CORA",
+        "AMCR",
+        "BBMA",
+        "STJA",
+        "RECR",
+        "CLNU",
+        "HAWK",
+        "BIRD",
+    ]
+}
+
+# Alternative names -> key: Latin names, SpeciesNet names and higher taxa,
+# and the shorthand used in folder names (see video_match.is_match)
+ALIASES = {
+    **{_common(name): _common(name) for name in SPECIES_CODES.values()},
+    **{
+        name.split("(")[0].strip().lower(): _common(name)
+        for name in SPECIES_CODES.values()
+        if "(" in name and " sp." not in name
+    },
+    **SPECIESNET_ALIASES,
+    "empty": BLANK,
+    "no cv result": UNKNOWN,
+    "animal": UNKNOWN,
+    "mammal": UNKNOWN,
+    "mammalia": UNKNOWN,
+    "person": HUMAN,
+    "homo species": HUMAN,
+    "car": VEHICLE,
+    "truck": VEHICLE,
+    "aves": BIRD,
+    "passeriformes": BIRD,
+    "corvidae": BIRD,
+    "corvus species": BIRD,
+    "corvus": BIRD,
+    "accipitridae": BIRD,
+    "anatidae": BIRD,
+    "strigiformes": BIRD,
+    "odocoileus species": "mule deer",
+    "deer": "mule deer",
+    "md": "mule deer",
+    "whitetail": "white-tailed deer",
+    "bear": "black bear",
+    "lion": "mountain lion",
+    "fox": "red fox",
+    "grey fox": "gray fox",
+    "gho": "great horned owl",
+    "owl": "great horned owl",
+    "gbh": "great blue heron",
+    "heron": "great blue heron",
+    "crow": "american crow",
+    "crows": "american crow",
+    "raven": "common raven",
+    "ravens": "common raven",
+    "magpie": "black-billed magpie",
+    "jay": "steller's jay",
+    "crossbill": "red crossbill",
+    "crossbills": "red crossbill",
+    "nutcracker": "clark's nutcracker",
+    "goshawk": "hawk",
+    "mallards": "mallard",
+    "turkey": "wild turkey",
+    "turkeys": "wild turkey",
+    "coyotes": "coyote",
+    "goose": BIRD,
+    "kingfisher": BIRD,
+    "woodpecker": BIRD,
+    "chickadee": BIRD,
+    "dipper": BIRD,
+    "grosbeaks": BIRD,
+    "me": HUMAN,
+    "trespasser": HUMAN,
+    "trespassers": HUMAN,
+    "shoulder": BLANK,
+}
+MAX_ALIAS_WORDS = max(len(alias.split()) for alias in ALIASES)
+# Words joining a second subject: "Fox 1 with Cottontail" is labelled fox
+CONNECTORS = {"with", "and", "plus", "vs"}
+
+
+def _words(text):
+    return re.findall(r"[a-z][a-z'-]*", re.sub(r"\d+", " ", text.lower()))
+
+
+def _scan_from_end(words):
+    for end in range(len(words), 0, -1):
+        for n in range(min(MAX_ALIAS_WORDS, end), 0, -1):
+            phrase = " ".join(words[end - n : end])
+            if phrase in ALIASES:
+                return ALIASES[phrase]
+    return None
+
+
+def taxon_key(text, default=None, coarse=False):
+    """
+    Map a species label from any source (folder name, SpeciesNet common
+    name, GPT species string) to a shared taxonomy key. The whole label is
+    tried first, then its parenthesised common name, then word n-grams
+    scanned from the end (folder names put the label after the location),
+    stopping at the first connector such as "with" so the main subject wins.
+    coarse=True folds every bird species into "bird".
+    """
+    key = None
+    if isinstance(text, str) and text.strip():
+        words = _words(text)
+        candidates = [" ".join(words)]
+        if "(" in text:
+            candidates.append(" ".join(_words(_common(text))))
+        key = next((ALIASES[c] for c in candidates if c in ALIASES), None)
+        first = next((i for i, w in enumerate(words) if w in CONNECTORS), None)
+        # The words before a connector, then the whole label as a fallback
+        for scanned in (words[:first], words) if first else (words,):
+            if key is not None:
+                break
+            key = _scan_from_end(scanned)
+    if key is None:
+        return default
+    if coarse and key in BIRD_KEYS:
+        return BIRD
+    return key
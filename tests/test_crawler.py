@@ -0,0 +1,22 @@
+import os
+
+from crawler import MTIME_RESOLUTION_NS, Crawler
+
+
+def test_listing_within_mtime_resolution_is_rescanned(tmp_path):
+    crawler = Crawler(manifest_path=None)
+    mtime_ns = os.stat(tmp_path).st_mtime_ns
+    assert crawler.listdir(tmp_path)["files"] == []
+    # A coarse-mtime filesystem can leave the same mtime after a change
+    (tmp_path / "IMG_0001.JPG").write_bytes(b"")
+    os.utime(tmp_path, ns=(mtime_ns, mtime_ns))
+    assert crawler.listdir(tmp_path)["files"] == ["IMG_0001.JPG"]
+
+
+def test_settled_listing_is_reused(tmp_path):
+    crawler = Crawler(manifest_path=None)
+    old_ns = os.stat(tmp_path).st_mtime_ns - 2 * MTIME_RESOLUTION_NS
+    os.utime(tmp_path, ns=(old_ns, old_ns))
+    crawler.listdir(tmp_path)
+    crawler.listdir(tmp_path)
+    assert (crawler.hits, crawler.misses) == (1, 1)
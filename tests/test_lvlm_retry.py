@@ -0,0 +1,16 @@
+from lvlm_retry import append_dead_letter, clear_dead_letters, read_dead_letters
+
+
+def test_clear_dead_letters_keeps_other_folders(tmp_path):
+    path = tmp_path / "dead_letter.jsonl"
+    append_dead_letter("a", ValueError("first"), path)
+    append_dead_letter("b", ValueError("second"), path)
+    clear_dead_letters(["a"], path)
+    assert [entry["folder"] for entry in read_dead_letters(path)] == ["b"]
+
+
+def test_clear_dead_letters_removes_empty_file(tmp_path):
+    path = tmp_path / "dead_letter.jsonl"
+    append_dead_letter("a", ValueError("first"), path)
+    clear_dead_letters(["a"], path)
+    assert not path.exists()
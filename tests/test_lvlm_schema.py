@@ -0,0 +1,26 @@
+from lvlm_schema import repair_json
+
+
+def test_unterminated_string_is_closed_at_line_break():
+    assert repair_json('{"weather": "sunny\n"count": 1}') == {
+        "weather": "sunny",
+        "count": 1,
+    }
+
+
+def test_prompt_template_slips():
+    # Unterminated "weather" string and no comma after "individuals"
+    text = (
+        '{\n  "weather": "sunny\n'
+        '  "individuals": [{"species": "deer"}]\n'
+        '  "count": 1\n}'
+    )
+    assert repair_json(text) == {
+        "weather": "sunny",
+        "individuals": [{"species": "deer"}],
+        "count": 1,
+    }
+
+
+def test_truncated_object_is_closed():
+    assert repair_json('{"summary": "a doe') == {"summary": "a doe"}
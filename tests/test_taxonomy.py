@@ -0,0 +1,15 @@
+from taxonomy import taxon_key
+
+
+def test_folder_label_stops_at_connector():
+    assert taxon_key("WR Woods Fox 1 with Cottontail") == "red fox"
+    assert taxon_key("Deer and Elk") == "mule deer"
+
+
+def test_label_after_connector_when_none_before():
+    assert taxon_key("Woods with Deer") == "mule deer"
+
+
+def test_folder_label_after_location():
+    assert taxon_key("WR Woods Fox 1") == "red fox"
+    assert taxon_key("Cervus canadensis (elk)") == "elk"
@@ -0,0 +1,270 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from crawler import get_crawler
+
+# -----------------------------
+# Configurable Parameters
+# -----------------------------
+
+FRAMES_DIR = "Frames"
+THUMBS_DIR = Path("thumbs")
+THUMB_W, THUMB_H = 320, 180  # every frame is letterboxed into this size
+INDEX_VERSION = 2  # 2: entries record the letterbox content "box"
+IMAGE_EXTS = (".jpg", ".jpeg", ".png")
+DECODE_WORKERS = 8
+EXIF_DATETIME_ORIGINAL = 36867
+EXIF_DATETIME = 306
+EXIF_IFD = 0x8769
+
+
+def make_thumbnail(data):
+    """
+    JPEG/PNG bytes -> (THUMB_H, THUMB_W, 3) uint8 array, EXIF datetime and
+    the [x, y, width, height] box the frame occupies inside the letterbox.
+    """
+    import numpy as np
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as img:
+        exif = img.getexif()
+        taken = exif.get_ifd(EXIF_IFD).get(EXIF_DATETIME_ORIGINAL) or exif.get(
+            EXIF_DATETIME
+        )
+        img.draft("RGB", (THUMB_W, THUMB_H))
+        img = img.convert("RGB")
+        img.thumbnail((THUMB_W, THUMB_H), Image.Resampling.BILINEAR)
+        canvas = Image.new("RGB", (THUMB_W, THUMB_H))
+        box = [(THUMB_W - img.width) // 2, (THUMB_H - img.height) // 2]
+        box += [img.width, img.height]
+        canvas.paste(img, tuple(box[:2]))
+    return np.asarray(canvas), str(taken).strip("\x00 ") if taken else None, box
+
+
+def _read_and_thumbnail(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    pixels, taken, box = make_thumbnail(data)
+    return hashlib.sha1(data).hexdigest(), pixels, taken, box
+
+
+class ThumbStore:
+    """
+    One month of fixed-size thumbnails packed into a single raw file
+    (thumbs/<month>.u8, slot after slot) with a JSON index of
+    {frame path: {"slot", "sha1", "size", "mtime_ns", "datetime", "box"}}.
+    Readers get numpy.memmap views; update() appends new or changed frames
+    and rebuild() compacts away slots of deleted or replaced frames.
+    """
+
+    def __init__(self, month, root=THUMBS_DIR, frames_dir=FRAMES_DIR):
+        self.month = month
+        self.frames_root = Path(frames_dir) / month
+        self.data_path = Path(root) / f"{month}.u8"
+        self.index_path = Path(root) / f"{month}.idx.json"
+        self._array = None
+        layout = {"version": INDEX_VERSION, "width": THUMB_W, "height": THUMB_H}
+        self.index = {**layout, "slots": 0, "frames": {}}
+        if self.index_path.exists():
+            with open(self.index_path, "r") as f:
+                self.index = json.load(f)
+            if any(self.index.get(k) != v for k, v in layout.items()):
+                print(f"⚠️ {self.index_path} has another thumbnail layout; rebuilding.")
+                self.index = {**self.index, **layout, "slots": 0, "frames": {}}
+
+    @property
+    def frames(self):
+        return self.index["frames"]
+
+    def _save_index(self):
+        tmp = self.index_path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.index, f)
+        os.replace(tmp, self.index_path)
+
+    # -----------------------------
+    # Reading
+    # -----------------------------
+
+    def array(self):
+        """All slots as a read-only (slots, H, W, 3) memmap, or None if empty."""
+        import numpy as np
+
+        slots = self.index["slots"]
+        if not slots:
+            return None
+        if self._array is None or len(self._array) != slots:
+            self._array = np.memmap(
+                self.data_path,
+                dtype=np.uint8,
+                mode="r",
+                shape=(slots, THUMB_H, THUMB_W, 3),
+            )
+        return self._array
+
+    def entry(self, path):
+        """Index entry for a frame, or None if missing or the file changed since."""
+        entry = self.frames.get(Path(path).as_posix())
+        if entry is None:
+            return None
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        if entry["size"] != st.st_size or entry["mtime_ns"] != st.st_mtime_ns:
+            return None
+        return entry
+
+    def get(self, path):
+        """Zero-copy (H, W, 3) view of one frame's thumbnail, or None."""
+        entry = self.entry(path)
+        if entry is None:
+            return None
+        return self.array()[entry["slot"]]
+
+    def gray(self, path, size):
+        """
+        Grayscale float32 thumbnail resized to size=(width, height), or None.
+        The letterbox bars are cropped off first, so the result has the same
+        geometry as resizing the full frame (burst_cull.load_gray()).
+        """
+        import numpy as np
+        from PIL import Image
+
+        entry = self.entry(path)
+        if entry is None:
+            return None
+        x, y, w, h = entry["box"]
+        view = self.array()[entry["slot"], y : y + h, x : x + w]
+        img = Image.fromarray(view).convert("L").resize(size, Image.Resampling.BILINEAR)
+        return np.asarray(img, dtype=np.float32)
+
+    def datetime(self, path):
+        entry = self.entry(path)
+        return entry["datetime"] if entry else None
+
+    # -----------------------------
+    # Writing
+    # -----------------------------
+
+    def update(self, workers=DECODE_WORKERS):
+        """
+        Append thumbnails for frames that are new or whose content changed,
+        and forget frames that no longer exist. Unchanged files are
+        recognised by size and mtime; a changed mtime with the same sha1
+        only refreshes the index.
+        """
+        seen = set()
+        candidates = []
+        for file_path in sorted(get_crawler().iter_files(self.frames_root, IMAGE_EXTS)):
+            key = Path(file_path).as_posix()
+            seen.add(key)
+            st = os.stat(file_path)
+            entry = self.frames.get(key)
+            if (
+                entry
+                and entry["size"] == st.st_size
+                and entry["mtime_ns"] == st.st_mtime_ns
+            ):
+                continue
+            candidates.append((key, st))
+        removed = [key for key in self.frames if key not in seen]
+        for key in removed:
+            del self.frames[key]
+        added = 0
+        self.data_path.parent.mkdir(parents=True, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=workers) as pool, open(
+            self.data_path, "ab"
+        ) as out:
+            # Keep the file length in step with the index even after a crash
+            out.truncate(self.index["slots"] * THUMB_H * THUMB_W * 3)
+            results = pool.map(_read_and_thumbnail, [key for key, _ in candidates])
+            for (key, st), (sha1, pixels, taken, box) in zip(candidates, results):
+                entry = self.frames.get(key)
+                if entry is None or entry["sha1"] != sha1:
+                    out.write(pixels.tobytes())
+                    entry = {"slot": self.index["slots"], "sha1": sha1}
+                    self.index["slots"] += 1
+                    added += 1
+                entry.update(
+                    {
+                        "size": st.st_size,
+                        "mtime_ns": st.st_mtime_ns,
+                        "datetime": taken,
+                        "box": box,
+                    }
+                )
+                self.frames[key] = entry
+        self._save_index()
+        self._array = None
+        print(
+            f"✅ {self.month}: {added} thumbnails added, {len(removed)} removed, "
+            f"{len(self.frames)} frames in {self.data_path}"
+        )
+        return added
+
+    def rebuild(self):
+        """Rewrite the data file with live frames only, in path order."""
+        old = self.array()
+        if old is None:
+            return
+        tmp = self.data_path.with_suffix(".tmp")
+        keys = sorted(self.frames)
+        with open(tmp, "wb") as out:
+            for slot, key in enumerate(keys):
+                out.write(old[self.frames[key]["slot"]].tobytes())
+                self.frames[key]["slot"] = slot
+        self._array = None
+        del old
+        os.replace(tmp, self.data_path)
+        self.index["slots"] = len(keys)
+        self._save_index()
+        print(f"✅ {self.month}: rebuilt {self.data_path} with {len(keys)} frames")
+
+
+# Open stores, one per month
+_STORES = {}
+
+
+def get_store(month):
+    """The shared ThumbStore for month, or None if it hasn't been built."""
+    if month not in _STORES:
+        store = ThumbStore(month)
+        _STORES[month] = store if store.index_path.exists() else None
+    return _STORES[month]
+
+
+def store_for_path(path):
+    """The built store holding a Frames/<month>/... path, or None."""
+    parts = Path(path).parts
+    if len(parts) < 3 or parts[0] != FRAMES_DIR:
+        return None
+    return get_store(parts[1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build or update the packed per-month thumbnail stores."
+    )
+    parser.add_argument(
+        "--months", nargs="*", default=None, help="Months to update (default: all)"
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Compact the data files after updating (drops stale slots).",
+    )
+    parser.add_argument("--workers", type=int, default=DECODE_WORKERS)
+    args = parser.parse_args()
+    months = args.months or get_crawler().list_dirs(FRAMES_DIR)
+    for month in months:
+        store = ThumbStore(month)
+        store.update(args.workers)
+        if args.rebuild and store.index["slots"] > len(store.frames):
+            store.rebuild()
+    get_crawler().save_manifest()
@@ -1,23 +1,24 @@
 import os
 import csv
+from crawler import get_crawler
 
 FRAMES_DIR = "Frames"
 PREVIEW_BATCH_DIR = "preview_batch"
 
 
-def get_all_frame_folders():
-    # Return all subfolders (recursively) under FRAMES_DIR, relative to FRAMES_DIR
+def get_all_frame_folders(frames_dir=FRAMES_DIR):
+    # Return all subfolders (recursively) under frames_dir, relative to frames_dir
     frame_folders = []
-    for root, dirs, _ in os.walk(FRAMES_DIR):
+    for root, dirs, _ in get_crawler().walk(frames_dir):
         for d in dirs:
-            rel_path = os.path.relpath(os.path.join(root, d), FRAMES_DIR)
+            rel_path = os.path.relpath(os.path.join(root, d), frames_dir)
             frame_folders.append(rel_path)
     return frame_folders
 
 
-def get_all_csv_files():
+def get_all_csv_files(preview_batch_dir=PREVIEW_BATCH_DIR):
     csv_files = []
-    for root, _, files in os.walk(PREVIEW_BATCH_DIR):
+    for root, _, files in get_crawler().walk(preview_batch_dir):
         for file in files:
             if file.endswith(".csv"):
                 csv_files.append(os.path.join(root, file))
@@ -36,9 +37,9 @@ def get_all_file_names_from_csvs(csv_files):
     return file_names
 
 
-def main():
-    frame_folders = get_all_frame_folders()
-    csv_files = get_all_csv_files()
+def main(frames_dir=FRAMES_DIR, preview_batch_dir=PREVIEW_BATCH_DIR):
+    frame_folders = get_all_frame_folders(frames_dir)
+    csv_files = get_all_csv_files(preview_batch_dir)
     file_names = get_all_file_names_from_csvs(csv_files)
 
     missing = []
@@ -53,7 +54,16 @@ def main():
             print(f"  {folder}")
     else:
         print("All frame folders are referenced in the preview_batch CSVs.")
+    get_crawler().save_manifest()
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="List Frames folders missing from the preview_batch CSVs."
+    )
+    parser.add_argument("--frames_dir", type=str, default=FRAMES_DIR)
+    parser.add_argument("--preview_batch_dir", type=str, default=PREVIEW_BATCH_DIR)
+    args = parser.parse_args()
+    main(args.frames_dir, args.preview_batch_dir)
@@ -0,0 +1,307 @@
+import argparse
+import io
+import json
+import os
+import shutil
+import subprocess
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from crawler import get_crawler
+
+# -----------------------------
+# Configurable Parameters
+# -----------------------------
+
+VIDEO_EXTS = (".mp4", ".avi", ".mov", ".mkv", ".m4v")
+FRAMES_ROOT = "Frames"
+FRAMES_PER_VIDEO = 12  # enough for SpeciesNet smoothing and LVLM sampling
+JPEG_QUALITY = 90
+EXIF_DATETIME_ORIGINAL = 36867
+EXIF_DATETIME = 306
+
+KEYFRAME = "keyframe"  # seek to evenly spaced times, keep the keyframe at or before
+STRIDE = "stride"  # decode sequentially, keep every k-th frame
+
+
+def decode_backend():
+    """Prefer PyAV (in-process decode), fall back to a local ffmpeg binary."""
+    try:
+        import av  # noqa: F401
+
+        return "pyav"
+    except ImportError:
+        pass
+    if shutil.which("ffmpeg") and shutil.which("ffprobe"):
+        return "ffmpeg"
+    raise RuntimeError("Video ingestion needs PyAV (pip install av) or ffmpeg on PATH")
+
+
+# -----------------------------
+# PyAV Decoding
+# -----------------------------
+
+
+def _pyav_rotation(stream, frame):
+    """Degrees counter-clockwise that turn a decoded frame upright for display."""
+    rotation = getattr(frame, "rotation", None)  # display matrix, PyAV >= 13
+    if rotation is None:
+        # Older PyAV: the clockwise "rotate" tag older ffmpeg versions expose
+        rotation = -int(stream.metadata.get("rotate", 0))
+    return rotation
+
+
+def _pyav_image(stream, frame):
+    # Decoded frames are stored unrotated; phone-style portrait clips carry
+    # the turn as side data, which ffmpeg applies but to_image() does not
+    image = frame.to_image()
+    rotation = _pyav_rotation(stream, frame) % 360
+    return image.rotate(rotation, expand=True) if rotation else image
+
+
+def _iter_pyav(video_path, n, mode):
+    import av
+
+    with av.open(str(video_path)) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+        time_base = float(stream.time_base)
+        fps = float(stream.average_rate or 30)
+        duration = (
+            float(stream.duration * stream.time_base)
+            if stream.duration
+            else (container.duration or 0) / 1_000_000
+        )
+        if mode == KEYFRAME and duration > 0:
+            stream.codec_context.skip_frame = "NONKEY"
+            last_pts = None
+            for i in range(n):
+                target = duration * (i + 0.5) / n
+                # backward=True lands on the last keyframe at or before target
+                container.seek(int(target / time_base), stream=stream, backward=True)
+                frame = next(container.decode(stream), None)
+                if frame is None or frame.pts == last_pts:
+                    continue  # short clip: several targets share a keyframe
+                last_pts = frame.pts
+                seconds = frame.pts * time_base
+                yield round(seconds * fps), seconds, _pyav_image(stream, frame)
+            return
+        total = stream.frames or int(duration * fps)
+        step = max(1, total // n) if total else 1
+        kept = 0
+        for index, frame in enumerate(container.decode(stream)):
+            if index % step == 0:
+                yield index, (frame.pts or 0) * time_base, _pyav_image(stream, frame)
+                kept += 1
+                if kept >= n:
+                    break
+
+
+# -----------------------------
+# ffmpeg Decoding
+# -----------------------------
+
+
+def _probe(video_path):
+    cmd = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-select_streams",
+        "v:0",
+        "-show_entries",
+        "stream=width,height,nb_frames,avg_frame_rate:stream_tags=rotate"
+        ":stream_side_data=rotation:format=duration",
+        "-of",
+        "json",
+        str(video_path),
+    ]
+    info = json.loads(subprocess.run(cmd, capture_output=True, check=True).stdout)
+    stream = info["streams"][0]
+    num, _, den = stream.get("avg_frame_rate", "30/1").partition("/")
+    fps = float(num) / float(den or 1) if float(num or 0) else 30.0
+    duration = float(info.get("format", {}).get("duration") or 0)
+    frames = int(stream.get("nb_frames") or 0) or int(duration * fps)
+    width, height = stream["width"], stream["height"]
+    # ffmpeg autorotates its output, so quarter turns swap the frame size
+    if _probe_rotation(stream) % 180 == 90:
+        width, height = height, width
+    return width, height, fps, duration, frames
+
+
+def _probe_rotation(stream):
+    for side_data in stream.get("side_data_list", []):
+        if "rotation" in side_data:
+            return int(side_data["rotation"])
+    return int(stream.get("tags", {}).get("rotate", 0))
+
+
+def _iter_ffmpeg(video_path, n, mode):
+    from PIL import Image
+
+    width, height, fps, duration, total = _probe(video_path)
+    if mode == KEYFRAME and duration > 0:
+        for i in range(n):
+            target = duration * (i + 0.5) / n
+            # -ss before -i is input seeking: the demuxer jumps to the keyframe
+            # before target and only the frames from there to target are
+            # decoded, so the frame is taken at target itself
+            cmd = [
+                "ffmpeg",
+                "-v",
+                "error",
+                "-ss",
+                f"{target:.3f}",
+                "-i",
+                str(video_path),
+                "-frames:v",
+                "1",
+                "-f",
+                "image2pipe",
+                "-vcodec",
+                "png",
+                "-",
+            ]
+            data = subprocess.run(cmd, capture_output=True, check=True).stdout
+            if data:
+                image = Image.open(io.BytesIO(data)).convert("RGB")
+                yield round(target * fps), target, image
+        return
+    step = max(1, total // n) if total else 1
+    cmd = [
+        "ffmpeg",
+        "-v",
+        "error",
+        "-i",
+        str(video_path),
+        "-vf",
+        f"select=not(mod(n\\,{step}))",
+        "-vsync",
+        "vfr",
+        "-frames:v",
+        str(n),
+        "-f",
+        "rawvideo",
+        "-pix_fmt",
+        "rgb24",
+        "-",
+    ]
+    frame_bytes = width * height * 3
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE) as proc:
+        for k in range(n):
+            data = proc.stdout.read(frame_bytes)
+            if len(data) < frame_bytes:
+                break
+            index = k * step
+            yield index, index / fps, Image.frombytes("RGB", (width, height), data)
+
+
+def iter_sampled_frames(video_path, n=FRAMES_PER_VIDEO, mode=KEYFRAME, backend=None):
+    """
+    Yield (frame_index, seconds, PIL.Image) for about n frames spread over the
+    video, decoding only what the sampling mode needs. Nothing is written.
+    """
+    backend = backend or decode_backend()
+    if backend == "pyav":
+        yield from _iter_pyav(video_path, n, mode)
+    else:
+        yield from _iter_ffmpeg(video_path, n, mode)
+
+
+# -----------------------------
+# Materialisation
+# -----------------------------
+
+
+def video_start_time(video_path):
+    """Recording start time: container creation_time if present, else file mtime."""
+    try:
+        import av
+
+        with av.open(str(video_path)) as container:
+            created = container.metadata.get("creation_time")
+        if created:
+            return datetime.fromisoformat(created.replace("Z", "+00:00")).replace(
+                tzinfo=None
+            )
+    except Exception:
+        pass
+    return datetime.fromtimestamp(os.path.getmtime(video_path))
+
+
+def ingest_video(
+    video_path,
+    month=None,
+    frames_root=FRAMES_ROOT,
+    n=FRAMES_PER_VIDEO,
+    mode=KEYFRAME,
+    overwrite=False,
+    backend=None,
+):
+    """
+    Write only the sampled frames of one video to
+    <frames_root>/<month>/<video stem>/frame_NNNN.jpg, with EXIF capture times.
+    Returns the written paths (empty if the sequence already exists).
+    """
+    from PIL import Image
+
+    video_path = Path(video_path)
+    start = video_start_time(video_path)
+    month = month or start.strftime("%Y%m")
+    out_dir = Path(frames_root) / month / video_path.stem
+    if (
+        out_dir.is_dir()
+        and get_crawler().list_files(out_dir, [".jpg"])
+        and not overwrite
+    ):
+        return []
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+    for index, seconds, img in iter_sampled_frames(video_path, n, mode, backend):
+        stamp = (start + timedelta(seconds=float(seconds))).strftime(
+            "%Y:%m:%d %H:%M:%S"
+        )
+        exif = Image.Exif()
+        exif[EXIF_DATETIME] = stamp
+        exif[EXIF_DATETIME_ORIGINAL] = stamp
+        # Keep the source frame number so sequence order survives sparse sampling
+        path = out_dir / f"frame_{index + 1:04d}.jpg"
+        img.save(path, format="JPEG", quality=JPEG_QUALITY, exif=exif.tobytes())
+        written.append(path)
+    return written
+
+
+def ingest_videos(
+    video_dir, month=None, frames_root=FRAMES_ROOT, n=FRAMES_PER_VIDEO, mode=KEYFRAME
+):
+    backend = decode_backend()
+    videos = sorted(get_crawler().iter_files(video_dir, VIDEO_EXTS))
+    print(f"Found {len(videos)} videos under {video_dir} (decoder: {backend}).")
+    total = 0
+    for video in videos:
+        written = ingest_video(video, month, frames_root, n, mode, backend=backend)
+        if written:
+            print(f"{video}: {len(written)} frames -> {written[0].parent}")
+        total += len(written)
+    get_crawler().save_manifest()
+    print(f"✅ Wrote {total} frames for {len(videos)} videos under {frames_root}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Decode camera videos and write only sampled frames to Frames/."
+    )
+    parser.add_argument(
+        "--video_dir", type=str, default="cameradata/DCIM", help="Folder of videos"
+    )
+    parser.add_argument(
+        "--month",
+        type=str,
+        default=None,
+        help="Month folder, e.g. 202506 (default: from each video's start time)",
+    )
+    parser.add_argument("--frames_root", type=str, default=FRAMES_ROOT)
+    parser.add_argument("--frames", type=int, default=FRAMES_PER_VIDEO)
+    parser.add_argument("--mode", choices=[KEYFRAME, STRIDE], default=KEYFRAME)
+    args = parser.parse_args()
+    ingest_videos(args.video_dir, args.month, args.frames_root, args.frames, args.mode)
@@ -1,7 +1,6 @@
 import os
 import csv
 import re
-from bs4 import BeautifulSoup
 
 PREVIEW_BATCH_DIR = "preview_batch"
 
@@ -107,10 +106,14 @@ def process_csv_file(csv_path):
     return positives, negatives, mismatches
 
 
-def highlight_mismatches_in_html_from_csv():
+def highlight_mismatches_in_html_from_csv(batch_dirs=None):
     # For each preview_batch subdir, read sequence_max_detections.csv and index.html
-    for subdir in os.listdir(PREVIEW_BATCH_DIR):
-        subdir_path = os.path.join(PREVIEW_BATCH_DIR, subdir)
+    if batch_dirs is None:
+        batch_dirs = [
+            os.path.join(PREVIEW_BATCH_DIR, subdir)
+            for subdir in os.listdir(PREVIEW_BATCH_DIR)
+        ]
+    for subdir_path in batch_dirs:
         if not os.path.isdir(subdir_path):
             continue
         csv_path = os.path.join(subdir_path, "sequence_max_detections.csv")
@@ -126,6 +129,8 @@ def highlight_mismatches_in_html_from_csv():
                     mismatched_files.add(row["file_name"])
         if not mismatched_files:
             continue
+        from bs4 import BeautifulSoup
+
         # Update index.html
         with open(index_path, "r", encoding="utf-8") as f:
             soup = BeautifulSoup(f, "html.parser")
@@ -145,27 +150,41 @@ def highlight_mismatches_in_html_from_csv():
             f.write(str(soup))
 
 
-def main():
+def main(batch_dirs=None, mismatches_csv="mismatches.csv"):
+    """
+    Add the match column to the CSVs under preview_batch/ and report
+    mismatches. With batch_dirs, only the sequence_max_detections.csv of
+    those preview_batch subdirectories is processed.
+    """
     total_positives = 0
     total_negatives = 0
     all_mismatches = []
-    for root, _, files in os.walk(PREVIEW_BATCH_DIR):
-        for file in files:
-            if file.endswith(".csv"):
-                csv_path = os.path.join(root, file)
-                print(f"Processing {csv_path}")
-                positives, negatives, mismatches = process_csv_file(csv_path)
-                total_positives += positives
-                total_negatives += negatives
-                all_mismatches.extend(mismatches)
+    if batch_dirs is None:
+        csv_paths = [
+            os.path.join(root, file)
+            for root, _, files in os.walk(PREVIEW_BATCH_DIR)
+            for file in files
+            if file.endswith(".csv")
+        ]
+    else:
+        csv_paths = [os.path.join(d, "sequence_max_detections.csv") for d in batch_dirs]
+    for csv_path in csv_paths:
+        if not os.path.exists(csv_path):
+            print(f"Skipping {csv_path}: not found")
+            continue
+        print(f"Processing {csv_path}")
+        positives, negatives, mismatches = process_csv_file(csv_path)
+        total_positives += positives
+        total_negatives += negatives
+        all_mismatches.extend(mismatches)
     # Write mismatches.csv
     if all_mismatches:
-        with open("mismatches.csv", "w", newline="", encoding="utf-8") as f:
+        with open(mismatches_csv, "w", newline="", encoding="utf-8") as f:
             writer = csv.DictWriter(f, fieldnames=["file_name", "species", "time"])
             writer.writeheader()
             writer.writerows(all_mismatches)
-        print(f"Wrote {len(all_mismatches)} mismatches to mismatches.csv")
-        highlight_mismatches_in_html_from_csv()
+        print(f"Wrote {len(all_mismatches)} mismatches to {mismatches_csv}")
+        highlight_mismatches_in_html_from_csv(batch_dirs)
     else:
         print("No mismatches found.")
     print(f"Total positives (true match): {total_positives}")
@@ -173,4 +192,17 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Check SpeciesNet labels against folder names and highlight mismatches."
+    )
+    parser.add_argument(
+        "--batch_dirs",
+        nargs="*",
+        default=None,
+        help="preview_batch subdirectories to process (default: every CSV under preview_batch)",
+    )
+    parser.add_argument("--mismatches_csv", type=str, default="mismatches.csv")
+    args = parser.parse_args()
+    main(args.batch_dirs, args.mismatches_csv)